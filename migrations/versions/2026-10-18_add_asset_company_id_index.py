@@ -0,0 +1,36 @@
+"""add asset company_id index
+
+Revision ID: 996506ae22c2
+Revises: c47fb968007f
+Create Date: 2026-10-18 14:21:43.774008
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "996506ae22c2"
+down_revision: Union[str, None] = "c47fb968007f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_asset_company_id_id",
+            "asset",
+            ["company_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_asset_company_id_id", table_name="asset", postgresql_concurrently=True, if_exists=True)
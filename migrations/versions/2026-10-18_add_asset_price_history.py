@@ -0,0 +1,50 @@
+"""add asset price history
+
+Revision ID: b636024bc84b
+Revises: 94d4db7c59cb
+Create Date: 2026-10-18 14:53:20.053773
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b636024bc84b"
+down_revision: Union[str, None] = "94d4db7c59cb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Daily partitions are created by the price refresh and maintenance tasks (see assets.history)
+    op.create_table(
+        "asset_price_history",
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("recorded_at", sa.DateTime(), nullable=False),
+        sa.Column("price", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.PrimaryKeyConstraint("asset_id", "recorded_at"),
+        postgresql_partition_by="RANGE (recorded_at)",
+    )
+    op.create_table(
+        "asset_price_candle",
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("interval", sa.Enum("MINUTE", "HOUR", "DAY", name="candleinterval"), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("open", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.Column("high", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.Column("low", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.Column("close", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.ForeignKeyConstraint(["asset_id"], ["asset.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("asset_id", "interval", "bucket_start"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("asset_price_candle")
+    # Partitions are dropped together with the parent table
+    op.drop_table("asset_price_history")
+    sa.Enum(name="candleinterval").drop(op.get_bind())
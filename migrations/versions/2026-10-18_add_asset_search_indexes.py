@@ -0,0 +1,57 @@
+"""add asset search indexes
+
+Revision ID: be75d44cdd91
+Revises: 28a30ac63696
+Create Date: 2026-10-18 14:24:01.429666
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "be75d44cdd91"
+down_revision: Union[str, None] = "28a30ac63696"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_asset_ticker_prefix",
+            "asset",
+            [sa.text("upper(ticker) text_pattern_ops")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_asset_name_trgm",
+            "asset",
+            ["name"],
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_company_name_trgm",
+            "company",
+            ["name"],
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_company_name_trgm", table_name="company", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_asset_name_trgm", table_name="asset", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_asset_ticker_prefix", table_name="asset", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,61 @@
+"""add balance ledger
+
+Revision ID: 458d7843dcf5
+Revises: be75d44cdd91
+Create Date: 2026-10-18 14:34:36.555644
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "458d7843dcf5"
+down_revision: Union[str, None] = "be75d44cdd91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing user.balance values become the initial checkpoints, so no data has to be moved
+    op.create_table(
+        "balance_ledger_entry",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.Enum("TOP_UP", "BUY", "SELL", name="ledgerentrytype"), nullable=False),
+        sa.Column("amount", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+        sa.Column("compacted", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["transaction_id"], ["transaction.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_balance_ledger_entry_user_id_id", "balance_ledger_entry", ["user_id", "id"], unique=False)
+    op.create_index(
+        "ix_balance_ledger_entry_pending",
+        "balance_ledger_entry",
+        ["user_id"],
+        unique=False,
+        postgresql_where=sa.text("NOT compacted"),
+    )
+
+
+def downgrade() -> None:
+    # Fold the pending tail into the checkpoints first, otherwise those balance changes would be lost
+    op.execute(
+        """
+        UPDATE "user" SET balance = "user".balance + pending.total
+        FROM (
+            SELECT user_id, sum(amount) AS total FROM balance_ledger_entry WHERE NOT compacted GROUP BY user_id
+        ) AS pending
+        WHERE "user".id = pending.user_id
+        """
+    )
+    op.drop_index("ix_balance_ledger_entry_pending", table_name="balance_ledger_entry")
+    op.drop_index("ix_balance_ledger_entry_user_id_id", table_name="balance_ledger_entry")
+    op.drop_table("balance_ledger_entry")
+    sa.Enum(name="ledgerentrytype").drop(op.get_bind())
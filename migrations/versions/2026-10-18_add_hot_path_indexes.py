@@ -0,0 +1,44 @@
+"""add hot path indexes
+
+Revision ID: 28a30ac63696
+Revises: 996506ae22c2
+Create Date: 2026-10-18 14:22:33.345592
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "28a30ac63696"
+down_revision: Union[str, None] = "996506ae22c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    (
+        "ix_transaction_user_id_datetime_id",
+        "transaction",
+        ["user_id", sa.text("transaction_datetime DESC"), sa.text("id DESC")],
+    ),
+    ("ix_transaction_datetime_id", "transaction", [sa.text("transaction_datetime DESC"), sa.text("id DESC")]),
+    ("ix_transaction_asset_id", "transaction", ["asset_id"]),
+    ("ix_user_asset_asset_id", "user_asset", ["asset_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,66 @@
+"""add user asset cost basis
+
+Revision ID: c6a44c1e3992
+Revises: d9962fbed638
+Create Date: 2026-10-18 15:10:33.637557
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6a44c1e3992"
+down_revision: Union[str, None] = "d9962fbed638"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_asset",
+        sa.Column("cost_basis", sa.DECIMAL(precision=20, scale=10), server_default=sa.text("0"), nullable=False),
+    )
+    # Replay each holding's trades at average cost: buys add their value, sells remove their share of the cost
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            trade record;
+            held numeric := 0;
+            cost numeric := 0;
+            holding_user integer;
+            holding_asset integer;
+        BEGIN
+            FOR trade IN
+                SELECT user_id, asset_id, type, amount, total_value FROM "transaction"
+                ORDER BY user_id, asset_id, transaction_datetime, id
+            LOOP
+                IF trade.user_id IS DISTINCT FROM holding_user OR trade.asset_id IS DISTINCT FROM holding_asset THEN
+                    UPDATE user_asset SET cost_basis = round(cost, 10)
+                    WHERE user_id = holding_user AND asset_id = holding_asset;
+                    holding_user := trade.user_id;
+                    holding_asset := trade.asset_id;
+                    held := 0;
+                    cost := 0;
+                END IF;
+                IF trade.type = 'BUY' THEN
+                    held := held + trade.amount;
+                    cost := cost + trade.total_value;
+                ELSIF held > 0 THEN
+                    cost := cost - cost * least(trade.amount, held) / held;
+                    held := greatest(held - trade.amount, 0);
+                END IF;
+            END LOOP;
+            UPDATE user_asset SET cost_basis = round(cost, 10)
+            WHERE user_id = holding_user AND asset_id = holding_asset;
+        END $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_asset", "cost_basis")
@@ -0,0 +1,123 @@
+"""partition transaction table
+
+Revision ID: d9962fbed638
+Revises: b636024bc84b
+Create Date: 2026-10-18 15:10:42.318215
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from transactions.partitions import add_months, month_start
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d9962fbed638"
+down_revision: Union[str, None] = "b636024bc84b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY = "transaction_legacy"
+
+
+def _indexes(table: str) -> list[tuple[str, list, dict]]:
+    return [
+        (f"ix_{table}_user_id_datetime_id", ["user_id", sa.text("transaction_datetime DESC"), sa.text("id DESC")], {}),
+        (f"ix_{table}_datetime_id", [sa.text("transaction_datetime DESC"), sa.text("id DESC")], {}),
+        (f"ix_{table}_asset_id", ["asset_id"], {}),
+    ]
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('transaction_id_seq')"), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("type", postgresql.ENUM("BUY", "SELL", name="transactiontype", create_type=False), nullable=False),
+        sa.Column(
+            "transaction_datetime", sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False
+        ),
+        sa.Column("amount", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.Column("total_value", sa.DECIMAL(precision=20, scale=10), nullable=False),
+        sa.ForeignKeyConstraint(["asset_id"], ["asset.id"], name="transaction_asset_id_fkey"),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], name="transaction_user_id_fkey"),
+    ]
+
+
+def upgrade() -> None:
+    # The existing table becomes the partition of everything before `bound`; monthly partitions start there
+    bound = add_months(month_start(datetime.now(timezone.utc).replace(tzinfo=None)), 1)
+
+    # Slow steps run without blocking writes: a unique index matching the new primary key and a CHECK constraint
+    # proving the partition bound, so that ATTACH PARTITION below neither builds indexes nor scans the table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "transaction_legacy_id_datetime_key",
+            "transaction",
+            ["id", "transaction_datetime"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.execute(
+            "ALTER TABLE \"transaction\" ADD CONSTRAINT transaction_legacy_bound "
+            f"CHECK (transaction_datetime < '{bound}') NOT VALID"
+        )
+        op.execute('ALTER TABLE "transaction" VALIDATE CONSTRAINT transaction_legacy_bound')
+
+    # The swap itself only changes the catalog and holds its locks for a moment
+    op.drop_constraint("balance_ledger_entry_transaction_id_fkey", "balance_ledger_entry", type_="foreignkey")
+    op.rename_table("transaction", LEGACY)
+    op.execute(f"ALTER TABLE {LEGACY} RENAME CONSTRAINT transaction_pkey TO {LEGACY}_pkey")
+    op.execute(
+        f"ALTER TABLE {LEGACY} ADD CONSTRAINT transaction_legacy_id_datetime_key "
+        "UNIQUE USING INDEX transaction_legacy_id_datetime_key"
+    )
+    for (name, _, _), (legacy_name, _, _) in zip(_indexes("transaction"), _indexes(LEGACY)):
+        op.execute(f"ALTER INDEX {name} RENAME TO {legacy_name}")
+
+    op.create_table(
+        "transaction",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "transaction_datetime", name="transaction_pkey"),
+        postgresql_partition_by="RANGE (transaction_datetime)",
+    )
+    for name, columns, options in _indexes("transaction"):
+        op.create_index(name, "transaction", columns, unique=False, **options)
+    # The legacy table's indexes, key and foreign keys are equivalent to the new ones and get attached to them
+    op.execute(f"ALTER TABLE \"transaction\" ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO ('{bound}')")
+    op.execute(f"ALTER TABLE {LEGACY} DROP CONSTRAINT transaction_legacy_bound")
+    op.execute('CREATE TABLE transaction_default PARTITION OF "transaction" DEFAULT')
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+
+
+def downgrade() -> None:
+    # Copies the rows back into a plain table, blocking writes meanwhile; archived partitions are not restored
+    op.create_table(
+        "transaction_plain",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", name="transaction_plain_pkey"),
+    )
+    op.execute(
+        "INSERT INTO transaction_plain (id, user_id, asset_id, type, transaction_datetime, amount, total_value) "
+        'SELECT id, user_id, asset_id, type, transaction_datetime, amount, total_value FROM "transaction"'
+    )
+    op.execute("ALTER SEQUENCE transaction_id_seq OWNED BY transaction_plain.id")
+    op.drop_table("transaction")
+    op.rename_table("transaction_plain", "transaction")
+    op.execute('ALTER TABLE "transaction" RENAME CONSTRAINT transaction_plain_pkey TO transaction_pkey')
+    for name, columns, options in _indexes("transaction"):
+        op.create_index(name, "transaction", columns, unique=False, **options)
+    op.create_foreign_key(
+        "balance_ledger_entry_transaction_id_fkey",
+        "balance_ledger_entry",
+        "transaction",
+        ["transaction_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
@@ -0,0 +1,156 @@
+import json
+from bisect import bisect_left, insort
+from typing import Any, Iterable
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from assets.schemas import AssetSuggestion
+from database.database import get_async_session
+from database.models import Asset, Company
+from logger import logger
+from pubsub import SyncedSubscription
+
+AUTOCOMPLETE_CHANNEL = "asset-autocomplete"
+
+
+class PrefixIndex:
+    """Sorted `(key, asset_id)` arrays over tickers and name words, searched with bisect."""
+
+    def __init__(self):
+        self._entries: dict[int, AssetSuggestion] = {}
+        self._tickers: list[tuple[str, int]] = []
+        self._words: list[tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _word_keys(entry: AssetSuggestion) -> set[str]:
+        return set(entry.name.lower().split()) | set(entry.company_name.lower().split())
+
+    def rebuild(self, entries: Iterable[AssetSuggestion]) -> None:
+        self._entries = {entry.id: entry for entry in entries}
+        self._tickers = sorted((entry.ticker.lower(), entry.id) for entry in self._entries.values())
+        self._words = sorted((word, entry.id) for entry in self._entries.values() for word in self._word_keys(entry))
+
+    def upsert(self, entry: AssetSuggestion) -> None:
+        self.remove(entry.id)
+        self._entries[entry.id] = entry
+        insort(self._tickers, (entry.ticker.lower(), entry.id))
+        for word in self._word_keys(entry):
+            insort(self._words, (word, entry.id))
+
+    def remove(self, asset_id: int) -> None:
+        entry = self._entries.pop(asset_id, None)
+        if entry is None:
+            return
+        self._discard(self._tickers, (entry.ticker.lower(), asset_id))
+        for word in self._word_keys(entry):
+            self._discard(self._words, (word, asset_id))
+
+    def rename_company(self, company_id: int, company_name: str) -> None:
+        for entry in [entry for entry in self._entries.values() if entry.company_id == company_id]:
+            self.upsert(entry.model_copy(update={"company_name": company_name}))
+
+    def suggest(self, prefix: str, limit: int) -> list[AssetSuggestion]:
+        """Tickers starting with `prefix` first, then assets where every word of `prefix` starts a name word."""
+        words = prefix.lower().split()
+        if not words:
+            return []
+
+        found: dict[int, AssetSuggestion] = {}
+        if len(words) == 1:
+            for asset_id in self._scan(self._tickers, words[0]):
+                found.setdefault(asset_id, self._entries[asset_id])
+                if len(found) >= limit:
+                    return list(found.values())
+
+        # The longest word is the most selective one to scan by; the rest are checked per candidate
+        words.sort(key=len, reverse=True)
+        for asset_id in self._scan(self._words, words[0]):
+            if asset_id in found:
+                continue
+            entry = self._entries[asset_id]
+            keys = self._word_keys(entry)
+            if all(any(key.startswith(word) for key in keys) for word in words[1:]):
+                found[asset_id] = entry
+                if len(found) >= limit:
+                    break
+        return list(found.values())
+
+    @staticmethod
+    def _scan(keys: list[tuple[str, int]], prefix: str) -> Iterable[int]:
+        for i in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, asset_id = keys[i]
+            if not key.startswith(prefix):
+                break
+            yield asset_id
+
+    @staticmethod
+    def _discard(keys: list[tuple[str, int]], item: tuple[str, int]) -> None:
+        i = bisect_left(keys, item)
+        if i < len(keys) and keys[i] == item:
+            del keys[i]
+
+
+class AssetAutocomplete(SyncedSubscription):
+    """
+    Process-wide PrefixIndex, loaded from the asset table on startup.
+
+    Changes are applied locally and broadcast over Redis pub/sub so every worker's index stays current.
+    While the subscription is down the index is out of sync, `enabled` is False and searches go to the database;
+    changes made meanwhile are still broadcast to the other workers.
+    """
+
+    channel = AUTOCOMPLETE_CHANNEL
+    name = "Asset autocomplete"
+
+    def __init__(self):
+        super().__init__()
+        self.index = PrefixIndex()
+
+    async def start(self, redis: aioredis.Redis) -> None:
+        await super().start(redis)
+        logger.info(f"Asset autocomplete index loaded with {len(self.index)} assets.")
+
+    async def asset_saved(self, entry: AssetSuggestion) -> None:
+        await self._publish({"op": "upsert", "asset": entry.model_dump()})
+
+    async def asset_deleted(self, asset_id: int) -> None:
+        await self._publish({"op": "delete", "asset_id": asset_id})
+
+    async def company_renamed(self, company_id: int, company_name: str) -> None:
+        await self._publish({"op": "rename_company", "company_id": company_id, "company_name": company_name})
+
+    async def _load(self) -> None:
+        query = select(
+            Asset.id, Asset.ticker, Asset.name, Asset.company_id, Company.name.label("company_name")
+        ).join(Company)
+        async for session in get_async_session():
+            result = await session.execute(query)
+            self.index.rebuild(AssetSuggestion(**row._mapping) for row in result)
+
+    def _apply(self, message: dict[str, Any]) -> None:
+        if message["op"] == "upsert":
+            self.index.upsert(AssetSuggestion(**message["asset"]))
+        elif message["op"] == "delete":
+            self.index.remove(message["asset_id"])
+        elif message["op"] == "rename_company":
+            self.index.rename_company(message["company_id"], message["company_name"])
+
+    async def _publish(self, message: dict[str, Any]) -> None:
+        if not self.started:
+            return
+
+        # An index being reloaded picks the change up from the database
+        if self.enabled:
+            self._apply(message)
+        try:
+            await self._redis.publish(AUTOCOMPLETE_CHANNEL, json.dumps(message))
+        except RedisError as e:
+            logger.warning(f"Could not broadcast autocomplete update: {e}")
+
+
+asset_autocomplete = AssetAutocomplete()
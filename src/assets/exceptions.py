@@ -7,3 +7,27 @@ class AssetNotFound(HTTPException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"status": "error", "data": None, "details": "Asset not found"},
         )
+
+
+class PriceStreamUnavailable(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"status": "error", "data": None, "details": "Price stream is unavailable, try again later"},
+        )
+
+
+class TooManyTickers(HTTPException):
+    def __init__(self, max_tickers: int):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"status": "error", "data": None, "details": f"Cannot subscribe to more than {max_tickers} tickers"},
+        )
+
+
+class InvalidCandleRange(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"status": "error", "data": None, "details": "Candle range start must be before its end"},
+        )
@@ -0,0 +1,186 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Mapping, Sequence
+
+from sqlalchemy import ColumnElement, Row, Select, delete, func, literal, literal_column, select, text, union_all
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import AssetPriceCandle, AssetPriceHistory, CandleInterval
+from database.partitions import create_partition, drop_partitions_before
+
+HISTORY_TABLE = AssetPriceHistory.__tablename__
+PARTITION_PREFIX = f"{HISTORY_TABLE}_"
+
+# Единица date_trunc и длина свечи
+INTERVALS = {
+    CandleInterval.MINUTE: ("minute", timedelta(minutes=1)),
+    CandleInterval.HOUR: ("hour", timedelta(hours=1)),
+    CandleInterval.DAY: ("day", timedelta(days=1)),
+}
+
+
+def _partition_name(day: datetime) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def truncate(moment: datetime, interval: CandleInterval) -> datetime:
+    if interval == CandleInterval.DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == CandleInterval.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(second=0, microsecond=0)
+
+
+async def ensure_partitions(session: AsyncSession, first_day: date, days: int) -> None:
+    """Create the missing daily partitions of asset_price_history for `days` days from `first_day`."""
+    for offset in range(days):
+        start = datetime.combine(first_day + timedelta(days=offset), time())
+        await create_partition(
+            session, HISTORY_TABLE, _partition_name(start), "recorded_at", start, start + timedelta(days=1)
+        )
+
+
+async def record_prices(session: AsyncSession, prices: Mapping[int, Decimal], recorded_at: datetime) -> None:
+    """
+    Append `{asset_id: price}` to asset_price_history with COPY, in the session's transaction.
+
+    The day's partition is created first if the maintenance task has not done it yet.
+    """
+    if not prices:
+        return
+    # Запрос в ensure_partitions заодно открывает транзакцию сессии, в которой затем выполняется COPY
+    await ensure_partitions(session, recorded_at.date(), 1)
+    connection = await (await session.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        HISTORY_TABLE,
+        records=[(asset_id, recorded_at, price) for asset_id, price in prices.items()],
+        columns=["asset_id", "recorded_at", "price"],
+    )
+
+
+def _ohlc(
+    unit: str,
+    asset_id: ColumnElement,
+    moment: ColumnElement,
+    open_: ColumnElement,
+    high: ColumnElement,
+    low: ColumnElement,
+    close: ColumnElement,
+) -> Select:
+    # Единица встраивается в запрос: с параметром выражение в SELECT не совпало бы с GROUP BY
+    bucket_start = func.date_trunc(literal_column(f"'{unit}'"), moment)
+    return select(
+        asset_id.label("asset_id"),
+        bucket_start.label("bucket_start"),
+        array_agg(aggregate_order_by(open_, moment))[1].label("open"),
+        func.max(high).label("high"),
+        func.min(low).label("low"),
+        array_agg(aggregate_order_by(close, moment.desc()))[1].label("close"),
+    ).group_by(asset_id, bucket_start)
+
+
+def _raw_ohlc(interval: CandleInterval) -> Select:
+    unit, _ = INTERVALS[interval]
+    price = AssetPriceHistory.price
+    return _ohlc(unit, AssetPriceHistory.asset_id, AssetPriceHistory.recorded_at, price, price, price, price)
+
+
+def _hourly_ohlc(unit: str) -> Select:
+    candle = AssetPriceCandle
+    return _ohlc(
+        unit, candle.asset_id, candle.bucket_start, candle.open, candle.high, candle.low, candle.close
+    ).where(candle.interval == CandleInterval.HOUR)
+
+
+async def roll_up_candles(session: AsyncSession, now: datetime) -> int:
+    """
+    Roll completed hours of raw prices up into hourly candles, and completed days of those into daily ones.
+
+    Each run continues from the newest stored bucket; rolled buckets are upserted, so reruns are harmless.
+    """
+    sources = [
+        (CandleInterval.HOUR, _raw_ohlc(CandleInterval.HOUR), AssetPriceHistory.recorded_at),
+        (CandleInterval.DAY, _hourly_ohlc("day"), AssetPriceCandle.bucket_start),
+    ]
+    rolled = 0
+    for interval, source, moment in sources:
+        _, step = INTERVALS[interval]
+        latest = await session.scalar(
+            select(func.max(AssetPriceCandle.bucket_start)).where(AssetPriceCandle.interval == interval)
+        )
+        source = source.where(moment < truncate(now, interval))
+        if latest is not None:
+            source = source.where(moment >= latest + step)
+        buckets = source.subquery()
+
+        stmt = pg_insert(AssetPriceCandle).from_select(
+            ["asset_id", "interval", "bucket_start", "open", "high", "low", "close"],
+            select(
+                buckets.c.asset_id,
+                literal(interval, AssetPriceCandle.__table__.c.interval.type),
+                buckets.c.bucket_start,
+                buckets.c.open,
+                buckets.c.high,
+                buckets.c.low,
+                buckets.c.close,
+            ),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AssetPriceCandle.asset_id, AssetPriceCandle.interval, AssetPriceCandle.bucket_start],
+            set_={column: stmt.excluded[column] for column in ("open", "high", "low", "close")},
+        )
+        result = await session.execute(stmt)
+        rolled += result.rowcount
+    await session.commit()
+    return rolled
+
+
+async def load_candles(
+    session: AsyncSession, asset_id: int, interval: CandleInterval, start: datetime, end: datetime, limit: int
+) -> Sequence[Row]:
+    """
+    OHLC candles of the asset in `[start, end)`, oldest first.
+
+    Minute candles are aggregated from the raw prices. Hourly and daily ones are read from the rollups, and the
+    buckets not rolled up yet (the current one, at least) are aggregated from the raw prices in the same query.
+    """
+    live = _raw_ohlc(interval).where(AssetPriceHistory.asset_id == asset_id, AssetPriceHistory.recorded_at < end)
+    if interval == CandleInterval.MINUTE:
+        query = live.where(AssetPriceHistory.recorded_at >= start)
+    else:
+        _, step = INTERVALS[interval]
+        candle = AssetPriceCandle
+        rolled_up_to = (
+            select(func.max(candle.bucket_start) + step)
+            .where(candle.asset_id == asset_id, candle.interval == interval)
+            .scalar_subquery()
+        )
+        rolled = select(
+            candle.asset_id, candle.bucket_start, candle.open, candle.high, candle.low, candle.close
+        ).where(
+            candle.asset_id == asset_id,
+            candle.interval == interval,
+            candle.bucket_start >= start,
+            candle.bucket_start < end,
+        )
+        live = live.where(AssetPriceHistory.recorded_at >= func.greatest(start, func.coalesce(rolled_up_to, start)))
+        query = union_all(rolled, live).subquery().select()
+
+    query = query.order_by(text("bucket_start")).limit(limit)
+    result = await session.execute(query)
+    return result.all()
+
+
+async def apply_retention(session: AsyncSession, now: datetime, raw_days: int, hourly_days: int) -> list[str]:
+    """Drop raw partitions older than `raw_days` and hourly candles older than `hourly_days`; daily ones stay."""
+    raw_cutoff = truncate(now, CandleInterval.DAY) - timedelta(days=raw_days)
+    dropped = await drop_partitions_before(session, HISTORY_TABLE, raw_cutoff)
+    await session.execute(
+        delete(AssetPriceCandle).where(
+            AssetPriceCandle.interval == CandleInterval.HOUR,
+            AssetPriceCandle.bucket_start < now - timedelta(days=hourly_days),
+        )
+    )
+    await session.commit()
+    return dropped
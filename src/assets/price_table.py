@@ -0,0 +1,190 @@
+import json
+import time
+from array import array
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Iterable, Mapping, NamedTuple, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from config import config
+from database.database import get_async_session
+from database.models import Asset
+from logger import logger
+from pubsub import SyncedSubscription
+
+PRICE_CHANNEL = "asset-prices"
+REFRESHED_KEY = "asset-prices:refreshed"
+
+
+class PriceQuote(NamedTuple):
+    price: Decimal
+    updated_at: float  # Unix time, когда цену последний раз подтвердил источник
+
+
+async def publish_prices(
+    redis: aioredis.Redis,
+    changed: Mapping[int, tuple[str, Decimal]],
+    refreshed: Iterable[int] = (),
+    updated_at: Optional[float] = None,
+) -> None:
+    """
+    Announce new prices (`{asset_id: (ticker, price)}`) and confirm unchanged ones (`refreshed` asset ids).
+
+    Refresh times are also kept in a Redis hash, so a process that starts later knows how old its prices are.
+    """
+    updated_at = updated_at or time.time()
+    refreshed = set(refreshed) | set(changed)
+    if not refreshed:
+        return
+    message = {
+        "updated_at": updated_at,
+        "assets": [[asset_id, ticker, str(price)] for asset_id, (ticker, price) in changed.items()],
+        "refreshed": list(refreshed),
+    }
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hset(REFRESHED_KEY, mapping={asset_id: updated_at for asset_id in refreshed})
+            pipe.publish(PRICE_CHANNEL, json.dumps(message))
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not publish asset prices: {e}")
+
+
+class PriceTable:
+    """
+    `asset_id | ticker -> (price, updated_at)` in parallel arrays indexed by slot.
+
+    Lookups are two dict/list reads with no per-asset objects; slots of deleted assets are simply never reused.
+    """
+
+    def __init__(self):
+        self._slots: dict[int, int] = {}
+        self._ticker_slots: dict[str, int] = {}
+        self._tickers: list[str] = []
+        self._prices: list[Decimal] = []
+        self._updated_at = array("d")
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def rebuild(self, rows: Iterable[tuple[int, str, Decimal, float]]) -> None:
+        self._slots, self._ticker_slots = {}, {}
+        self._tickers, self._prices, self._updated_at = [], [], array("d")
+        for asset_id, ticker, price, updated_at in rows:
+            self.set(asset_id, ticker, price, updated_at)
+
+    def set(self, asset_id: int, ticker: str, price: Decimal, updated_at: float) -> None:
+        slot = self._slots.get(asset_id)
+        if slot is None:
+            slot = self._slots[asset_id] = len(self._prices)
+            self._tickers.append(ticker)
+            self._prices.append(price)
+            self._updated_at.append(updated_at)
+        else:
+            if self._tickers[slot] != ticker:
+                self._ticker_slots.pop(self._tickers[slot], None)
+                self._tickers[slot] = ticker
+            self._prices[slot] = price
+            self._updated_at[slot] = max(self._updated_at[slot], updated_at)
+        self._ticker_slots[ticker] = slot
+
+    def touch(self, asset_ids: Iterable[int], updated_at: float) -> None:
+        """Mark the prices of `asset_ids` as confirmed at `updated_at`."""
+        for asset_id in asset_ids:
+            slot = self._slots.get(asset_id)
+            if slot is not None and self._updated_at[slot] < updated_at:
+                self._updated_at[slot] = updated_at
+
+    def get(self, asset_id: int) -> Optional[PriceQuote]:
+        slot = self._slots.get(asset_id)
+        return None if slot is None else PriceQuote(self._prices[slot], self._updated_at[slot])
+
+    def get_by_ticker(self, ticker: str) -> Optional[PriceQuote]:
+        slot = self._ticker_slots.get(ticker)
+        return None if slot is None else PriceQuote(self._prices[slot], self._updated_at[slot])
+
+
+class AssetPrices(SyncedSubscription):
+    """
+    The process's single subscription to price notifications, and the PriceTable they keep current.
+
+    With `use_table` the table is loaded from the asset table on startup and used while it is in sync: from the first
+    load until the subscription drops. It is reloaded once the subscription is back, and meanwhile `enabled` is
+    False, so prices are read from the database. Either way the changed prices of every notification are passed on
+    to the callbacks registered with `on_prices`, after the table has been updated, and the `on_resync` callbacks
+    are awaited on every (re)subscription, since notifications published meanwhile are lost.
+    """
+
+    channel = PRICE_CHANNEL
+    name = "Asset prices"
+
+    def __init__(self, use_table: bool):
+        super().__init__()
+        self.table = PriceTable()
+        self._use_table = use_table
+        self._price_callbacks: list[Callable[[dict[str, str]], None]] = []
+        self._resync_callbacks: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self._use_table and super().enabled
+
+    def on_prices(self, callback: Callable[[dict[str, str]], None]) -> None:
+        """Pass the `{ticker: price}` changes of every notification to `callback`."""
+        self._price_callbacks.append(callback)
+
+    def on_resync(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Await `callback` whenever the subscription is made again, before its queued notifications are applied."""
+        self._resync_callbacks.append(callback)
+
+    async def start(self, redis: aioredis.Redis) -> None:
+        await super().start(redis)
+        if self._use_table:
+            logger.info(f"Asset price table loaded with {len(self.table)} assets.")
+
+    async def publish(self, changed: Mapping[int, tuple[str, Decimal]]) -> None:
+        """Apply prices set in this process locally and announce them to the others and to the price stream."""
+        if not self.started:
+            return
+        updated_at = time.time()
+        # Перезагружаемая таблица получит цену из базы, а другим процессам она нужна в любом случае
+        if self.enabled:
+            for asset_id, (ticker, price) in changed.items():
+                self.table.set(asset_id, ticker, price, updated_at)
+        await publish_prices(self._redis, changed, updated_at=updated_at)
+
+    async def _load(self) -> None:
+        if self._use_table:
+            await self._load_table()
+        for callback in self._resync_callbacks:
+            await callback()
+
+    async def _load_table(self) -> None:
+        try:
+            refreshed = await self._redis.hgetall(REFRESHED_KEY)
+        except RedisError as e:
+            logger.warning(f"Could not read price refresh times, treating all prices as stale: {e}")
+            refreshed = {}
+        refreshed = {int(asset_id): float(updated_at) for asset_id, updated_at in refreshed.items()}
+
+        async for session in get_async_session():
+            result = await session.execute(select(Asset.id, Asset.ticker, Asset.price))
+            self.table.rebuild(
+                (asset_id, ticker, price, refreshed.get(asset_id, 0.0)) for asset_id, ticker, price in result
+            )
+
+    def _apply(self, message: Mapping[str, Any]) -> None:
+        updated_at, changed = message["updated_at"], message["assets"]
+        if self._use_table:
+            for asset_id, ticker, price in changed:
+                self.table.set(asset_id, ticker, Decimal(price), updated_at)
+            self.table.touch(message["refreshed"], updated_at)
+        if changed:
+            prices = {ticker: price for _, ticker, price in changed}
+            for callback in self._price_callbacks:
+                callback(prices)
+
+
+asset_prices = AssetPrices(use_table=config.PRICE_TABLE_ENABLED)
@@ -1,18 +1,26 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, Body
-from fastapi import status, Request
+from fastapi import status, Request, Response, Query
 from pydantic import condecimal
 
-from limiter import limiter
+from config import config
+from idempotency import idempotent
+from limiter import RateLimitTiers, limiter
+from response_cache import cached_route
 from transactions.dependencies import TransactionServiceDep
 from transactions.schemas import TransactionResponse
 from users.auth import current_user_admin, current_user
 from assets.dependencies import valid_asset_id, AssetServiceDep
-from database.models import Asset, User
-from assets.schemas import AssetCreate, AssetUpdate, AssetResponse, AssetPatchUpdate
-from pagination import PaginatorDep
+from database.models import Asset, CandleInterval, User
+from assets.schemas import AssetCreate, AssetUpdate, AssetResponse, AssetPatchUpdate, AssetSuggestion, Candle
+from pagination import OffsetPaginatorDep, PaginatorDep
 
 router = APIRouter(prefix="/assets", tags=["Asset"])
 
+RATE_LIMITS = RateLimitTiers("5/minute", admin="50/minute")
+ITEM_RATE_LIMITS = RateLimitTiers("7/minute", admin="70/minute")
+
 
 @router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
 async def create_asset(
@@ -24,25 +32,53 @@ async def create_asset(
 
 
 @router.get("/", response_model=list[AssetResponse], status_code=status.HTTP_200_OK)
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
+@cached_route("assets", expire=config.CACHE_TTL_ASSETS, schema=list[AssetResponse])
 async def get_assets(
     request: Request,
+    response: Response,
     pagination: PaginatorDep,
     service: AssetServiceDep,
     company_id: int | None = None,
 ):
-    return await service.get_all(pagination.limit, pagination.skip, company_id)
+    return await service.get_all(pagination, company_id)
 
 
 @router.get("/{asset_id}", response_model=AssetResponse, status_code=status.HTTP_200_OK)
-@limiter.limit("7/minute")
-async def get_specific_asset(request: Request, asset: Asset = Depends(valid_asset_id)):
-    return asset
+@limiter.limit(ITEM_RATE_LIMITS)
+@cached_route("assets", expire=config.CACHE_TTL_ASSET, schema=AssetResponse)
+async def get_specific_asset(request: Request, response: Response, asset_id: int, service: AssetServiceDep):
+    return await service.get_by_id(asset_id)
+
+
+@router.get("/{asset_id}/candles", response_model=list[Candle], status_code=status.HTTP_200_OK)
+@limiter.limit(ITEM_RATE_LIMITS)
+async def get_asset_candles(
+    request: Request,
+    response: Response,
+    asset_id: int,
+    service: AssetServiceDep,
+    interval: CandleInterval = CandleInterval.MINUTE,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = Query(500, ge=1, le=1000),
+):
+    """OHLC candles of the asset, oldest first. `start` and `end` are UTC; the range is `[start, end)`."""
+    return await service.get_candles(asset_id, interval, start, end, limit)
 
 
 @router.get("/search/", response_model=list[AssetResponse])
-async def search_assets(search_query: str, service: AssetServiceDep):
-    return await service.search_assets(search_query)
+async def search_assets(search_query: str, pagination: OffsetPaginatorDep, service: AssetServiceDep):
+    return await service.search_assets(search_query, pagination)
+
+
+@router.get("/autocomplete/", response_model=list[AssetSuggestion])
+async def autocomplete_assets(
+    service: AssetServiceDep,
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+):
+    return await service.autocomplete(prefix, limit)
 
 
 @router.post(
@@ -50,15 +86,17 @@ async def search_assets(search_query: str, service: AssetServiceDep):
     response_model=TransactionResponse,
     status_code=status.HTTP_201_CREATED,
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
+@idempotent(TransactionResponse)
 async def buy_asset(
     request: Request,
+    response: Response,
     service: TransactionServiceDep,
-    asset: Asset = Depends(valid_asset_id),
+    asset_id: int,
     amount: condecimal(gt=0, max_digits=20, decimal_places=10) = Body(...),
     current_user: User = Depends(current_user),
 ):
-    return await service.create_buy(asset, amount, current_user)
+    return await service.create_buy(asset_id, amount, current_user)
 
 
 @router.post(
@@ -66,13 +104,16 @@ async def buy_asset(
     response_model=TransactionResponse,
     status_code=status.HTTP_201_CREATED,
 )
+@idempotent(TransactionResponse)
 async def sell_asset(
+    request: Request,
+    response: Response,
     service: TransactionServiceDep,
-    asset: Asset = Depends(valid_asset_id),
+    asset_id: int,
     amount: condecimal(gt=0, max_digits=20, decimal_places=10) = Body(...),
     current_user: User = Depends(current_user),
 ):
-    return await service.create_sell(asset, amount, current_user)
+    return await service.create_sell(asset_id, amount, current_user)
 
 
 @router.put("/{asset_id}", response_model=AssetResponse, status_code=status.HTTP_200_OK)
@@ -1,5 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
+from typing import Literal
 
 from pydantic import BaseModel, condecimal, constr, conint
 
@@ -41,3 +42,24 @@ class UserAssetResponse(BaseModel):
     user_id: int
     asset_id: int
     amount: Decimal
+
+
+class AssetSuggestion(BaseModel):
+    id: int
+    ticker: str
+    name: str
+    company_id: int
+    company_name: str
+
+
+class PriceStreamCommand(BaseModel):
+    action: Literal["subscribe", "unsubscribe"]
+    tickers: list[constr(strip_whitespace=True, to_upper=True, min_length=1, max_length=10)]
+
+
+class Candle(BaseModel):
+    bucket_start: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
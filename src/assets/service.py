@@ -1,39 +1,83 @@
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, case, or_, func
+from sqlalchemy import insert, select, case, or_, func, any_, false, exists
 from typing import Sequence
 from fastapi import Depends
 
-from assets.exceptions import AssetNotFound
+from assets.autocomplete import asset_autocomplete
+from assets.exceptions import AssetNotFound, InvalidCandleRange
+from assets.history import INTERVALS, load_candles
+from assets.price_table import asset_prices
 from companies.exceptions import CompanyNotFound
-from database.models import Asset, Company
-from .schemas import AssetCreate, AssetUpdate, AssetPatchUpdate
-from database.database import get_async_session
+from database.models import Asset, CandleInterval, Company
+from .schemas import AssetCreate, AssetUpdate, AssetPatchUpdate, AssetSuggestion, Candle
+from database.database import get_async_session, get_read_session
+from pagination import OffsetPaginator, Paginator
+from response_cache import invalidate
+from users.portfolio_cache import portfolio_cache
+
+TICKER_MAX_LENGTH = 10
+
+
+def escape_like(term: str) -> str:
+    return term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def utc_naive(moment: datetime | None) -> datetime | None:
+    """`moment` as naive UTC, the way timestamps are stored; naive values are taken to be UTC already."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 class AssetService:
-    def __init__(self, session: AsyncSession = Depends(get_async_session)):
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session),
+    ):
         self.session = session
+        self.read_session = read_session  # Реплика для списков и поиска, если настроена
 
-    async def valid_company_id(self, company_id: int) -> Company:
-        result = await self.session.execute(select(Company).where(Company.id == company_id))
+    async def valid_company_id(self, company_id: int, session: AsyncSession | None = None) -> Company:
+        result = await (session or self.session).execute(select(Company).where(Company.id == company_id))
         if company := result.scalar_one_or_none():
             return company
         raise CompanyNotFound()
 
+    async def _sync_autocomplete(self, asset: Asset) -> None:
+        if not asset_autocomplete.started:
+            return
+        company_name = await self.session.scalar(select(Company.name).where(Company.id == asset.company_id))
+        await asset_autocomplete.asset_saved(
+            AssetSuggestion(
+                id=asset.id,
+                ticker=asset.ticker,
+                name=asset.name,
+                company_id=asset.company_id,
+                company_name=company_name,
+            )
+        )
+
     async def create(self, asset: AssetCreate) -> Asset:
         await self.valid_company_id(asset.company_id)
         stmt = insert(Asset).values(**asset.model_dump()).returning(Asset)
         result = await self.session.execute(stmt)
         await self.session.commit()
-        return result.scalar_one()
+        await invalidate("assets")
+        created_asset = result.scalar_one()
+        await self._sync_autocomplete(created_asset)
+        await asset_prices.publish({created_asset.id: (created_asset.ticker, created_asset.price)})
+        return created_asset
 
-    async def get_all(self, limit: int, skip: int, company_id: int | None) -> Sequence[Asset]:
+    async def get_all(self, pagination: Paginator, company_id: int | None) -> Sequence[Asset]:
+        query = select(Asset)
         if company_id is not None:
-            company = await self.valid_company_id(company_id)
-            return company.assets[skip : skip + limit]
-        query = select(Asset).limit(limit).offset(skip)
-        result = await self.session.execute(query)
-        return result.scalars().all()
+            await self.valid_company_id(company_id, self.read_session)
+            query = query.where(Asset.company_id == company_id)
+        query = pagination.apply(query, Asset.id)
+        result = await self.read_session.execute(query)
+        return pagination.page(result.scalars().all())
 
     async def get_by_id(self, asset_id: int) -> Asset:
         query = select(Asset).where(Asset.id == asset_id)
@@ -43,31 +87,97 @@ class AssetService:
             raise AssetNotFound()
         return asset
 
-    async def search_assets(self, search_query: str) -> Sequence[Asset]:
+    async def get_candles(
+        self,
+        asset_id: int,
+        interval: CandleInterval,
+        start: datetime | None,
+        end: datetime | None,
+        limit: int,
+    ) -> list[Candle]:
+        """OHLC candles in `[start, end)`, by default the last `limit` buckets up to now; times come back naive UTC."""
+        end = utc_naive(end) or datetime.now(timezone.utc).replace(tzinfo=None)
+        start = utc_naive(start) or end - INTERVALS[interval][1] * limit
+        if start >= end:
+            raise InvalidCandleRange()
+        if not await self.read_session.scalar(select(exists().where(Asset.id == asset_id))):
+            raise AssetNotFound()
+        rows = await load_candles(self.read_session, asset_id, interval, start, end, limit)
+        return [
+            Candle(bucket_start=row.bucket_start, open=row.open, high=row.high, low=row.low, close=row.close)
+            for row in rows
+        ]
+
+    async def search_assets(self, search_query: str, pagination: OffsetPaginator) -> Sequence[Asset]:
+        """
+        Search assets by ticker prefix, asset name or company name, most relevant first.
+
+        Every predicate is backed by an index (upper(ticker) text_pattern_ops, pg_trgm GIN on both names),
+        so Postgres can combine them with a BitmapOr instead of scanning the tables. Results are ranked by a computed
+        relevance, so they are paged by limit/skip rather than by cursor.
+        """
         search_terms = search_query.split()
-        name_conditions = [Asset.name.ilike(f"%{term}%") for term in search_terms]
-        company_conditions = [Company.name.ilike(f"%{term}%") for term in search_terms]
+        if not search_terms:
+            return []
+        phrase = " ".join(search_terms)
 
-        name_cases = [(Asset.name.ilike(f"%{term}%"), 1) for term in search_terms]
-        company_cases = [(Company.name.ilike(f"%{term}%"), 1) for term in search_terms]
-        name_match_score = case(*name_cases, else_=0)
-        company_match_score = case(*company_cases, else_=0)
+        if len(search_terms) == 1 and len(phrase) <= TICKER_MAX_LENGTH:
+            ticker_prefix = func.upper(Asset.ticker).like(f"{escape_like(phrase.upper())}%", escape="/")
+        else:
+            ticker_prefix = false()
+        name_conditions = [Asset.name.ilike(f"%{escape_like(term)}%", escape="/") for term in search_terms]
+        matching_companies = select(Company.id).where(
+            or_(*(Company.name.ilike(f"%{escape_like(term)}%", escape="/") for term in search_terms))
+        )
 
+        relevance = (
+            case((ticker_prefix, 1.0), else_=0.0)
+            + func.similarity(Asset.name, phrase)
+            + func.similarity(Company.name, phrase)
+        )
         query = (
             select(Asset)
             .join(Company)
-            .filter(or_(*name_conditions, *company_conditions))
-            .order_by((func.coalesce(name_match_score, 0) + func.coalesce(company_match_score, 0)).desc())
+            .where(
+                or_(
+                    ticker_prefix,
+                    *name_conditions,
+                    Asset.company_id == any_(func.array(matching_companies.scalar_subquery())),
+                )
+            )
+            .order_by(relevance.desc(), Asset.id)
+            .limit(pagination.limit)
+            .offset(pagination.skip)
         )
-        result = await self.session.execute(query)
+        result = await self.read_session.execute(query)
         return result.scalars().all()
 
+    async def autocomplete(self, prefix: str, limit: int) -> list[AssetSuggestion]:
+        if asset_autocomplete.enabled:
+            return asset_autocomplete.index.suggest(prefix, limit)
+
+        assets = await self.search_assets(prefix, OffsetPaginator(limit=limit))
+        return [
+            AssetSuggestion(
+                id=asset.id,
+                ticker=asset.ticker,
+                name=asset.name,
+                company_id=asset.company_id,
+                company_name=asset.company.name,
+            )
+            for asset in assets
+        ]
+
     async def update_full(self, asset: Asset, updated_asset: AssetUpdate) -> Asset:
         await self.valid_company_id(asset.company_id)
         for key, value in updated_asset.model_dump(exclude_unset=True).items():
             setattr(asset, key, value)
         merged_asset = await self.session.merge(asset)
         await self.session.commit()
+        await invalidate("assets")
+        await self._sync_autocomplete(merged_asset)
+        await asset_prices.publish({merged_asset.id: (merged_asset.ticker, merged_asset.price)})
+        await portfolio_cache.invalidate_all()
         return merged_asset
 
     async def update_partial(self, asset: Asset, asset_data: AssetPatchUpdate) -> Asset:
@@ -78,8 +188,17 @@ class AssetService:
             setattr(asset, key, value)
         self.session.add(asset)
         await self.session.commit()
+        await invalidate("assets")
+        await self._sync_autocomplete(asset)
+        if "price" in update_data:
+            await asset_prices.publish({asset.id: (asset.ticker, asset.price)})
+            await portfolio_cache.invalidate_all()
         return asset
 
     async def delete(self, asset: Asset) -> None:
+        asset_id = asset.id
         await self.session.delete(asset)
         await self.session.commit()
+        await invalidate("assets")
+        await asset_autocomplete.asset_deleted(asset_id)
+        await portfolio_cache.invalidate_all()
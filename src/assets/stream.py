@@ -0,0 +1,140 @@
+import asyncio
+from typing import Collection, Iterable, Mapping, Optional
+
+from sqlalchemy import select
+
+from assets.exceptions import PriceStreamUnavailable, TooManyTickers
+from assets.price_table import AssetPrices, asset_prices
+from config import config
+from database.database import get_async_session
+from database.models import Asset
+
+
+async def load_prices(tickers: Iterable[str]) -> dict[str, str]:
+    """Current `{ticker: price}`, sent to a client when it subscribes. Taken from the price table if it is running."""
+    if asset_prices.enabled:
+        quotes = {ticker: asset_prices.table.get_by_ticker(ticker) for ticker in tickers}
+        return {ticker: str(quote.price) for ticker, quote in quotes.items() if quote is not None}
+
+    query = select(Asset.ticker, Asset.price).where(Asset.ticker.in_(list(tickers)))
+    prices = {}
+    async for session in get_async_session():
+        result = await session.execute(query)
+        prices = {ticker: str(price) for ticker, price in result}
+    return prices
+
+
+class PriceSubscription:
+    """
+    One client's tickers and the prices it has not received yet.
+
+    A newer price replaces a pending one (latest value wins), so a slow client holds at most one price per ticker
+    and the broadcaster never waits for it.
+    """
+
+    def __init__(self):
+        self.tickers: set[str] = set()
+        self._pending: dict[str, str] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, prices: Mapping[str, str], replace: bool = True) -> None:
+        for ticker, price in prices.items():
+            if replace or ticker not in self._pending:
+                self._pending[ticker] = price
+        if self._pending:
+            self._ready.set()
+
+    async def next(self, timeout: float) -> dict[str, str]:
+        """Wait up to `timeout` seconds and take all pending prices; `{}` if nothing arrived."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class PriceBroadcaster:
+    """
+    Fans price updates out to the subscriptions of this process.
+
+    The updates come from the process's single price subscription (AssetPrices), however many clients are
+    connected; each one is routed through a `ticker -> subscriptions` index, so its cost depends on the subscribers
+    of the changed tickers only.
+    """
+
+    def __init__(self, max_subscribers: int, max_tickers: int):
+        self._max_subscribers = max_subscribers
+        self._max_tickers = max_tickers
+        self._subscribers: dict[str, set[PriceSubscription]] = {}
+        self._connections = 0
+        self._prices: Optional[AssetPrices] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._prices is not None and self._prices.started
+
+    def stats(self) -> dict[str, int]:
+        return {"subscribers": self._connections, "tickers": len(self._subscribers)}
+
+    def start(self, prices: AssetPrices) -> None:
+        """Stream the notifications received by `prices`, which must be started as well."""
+        prices.on_prices(self.dispatch)
+        prices.on_resync(self.resync)
+        self._prices = prices
+
+    def stop(self) -> None:
+        self._prices = None
+
+    def check(self, tickers: Collection[str] = ()) -> None:
+        """Raise the error that `connect` and then `add_tickers(tickers)` would raise right now, if any."""
+        if not self.enabled or self._connections >= self._max_subscribers:
+            raise PriceStreamUnavailable()
+        if len(tickers) > self._max_tickers:
+            raise TooManyTickers(self._max_tickers)
+
+    def connect(self) -> PriceSubscription:
+        self.check()
+        self._connections += 1
+        return PriceSubscription()
+
+    def disconnect(self, subscription: PriceSubscription) -> None:
+        self.remove_tickers(subscription, list(subscription.tickers))
+        self._connections -= 1
+
+    def add_tickers(self, subscription: PriceSubscription, tickers: Iterable[str]) -> set[str]:
+        """Subscribe to `tickers`; returns the ones that are new for this subscription."""
+        added = set(tickers) - subscription.tickers
+        if len(subscription.tickers) + len(added) > self._max_tickers:
+            raise TooManyTickers(self._max_tickers)
+        for ticker in added:
+            self._subscribers.setdefault(ticker, set()).add(subscription)
+        subscription.tickers |= added
+        return added
+
+    def remove_tickers(self, subscription: PriceSubscription, tickers: Iterable[str]) -> None:
+        for ticker in set(tickers) & subscription.tickers:
+            subscribers = self._subscribers[ticker]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[ticker]
+            subscription.tickers.discard(ticker)
+
+    async def resync(self) -> None:
+        """Send the current prices of every subscribed ticker: changes published while unsubscribed are lost."""
+        if self._subscribers:
+            self.dispatch(await load_prices(list(self._subscribers)))
+
+    def dispatch(self, prices: Mapping[str, str]) -> None:
+        by_subscription: dict[PriceSubscription, dict[str, str]] = {}
+        for ticker, price in prices.items():
+            for subscription in self._subscribers.get(ticker, ()):
+                by_subscription.setdefault(subscription, {})[ticker] = price
+        for subscription, subscription_prices in by_subscription.items():
+            subscription.offer(subscription_prices)
+
+
+price_broadcaster = PriceBroadcaster(
+    max_subscribers=config.PRICE_STREAM_MAX_SUBSCRIBERS, max_tickers=config.PRICE_STREAM_MAX_TICKERS
+)
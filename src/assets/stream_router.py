@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from assets.exceptions import PriceStreamUnavailable
+from assets.schemas import PriceStreamCommand
+from assets.stream import PriceSubscription, load_prices, price_broadcaster
+from config import config
+from logger import logger
+
+# Подключается в main раньше router из assets.router, иначе GET /assets/stream попадёт в /assets/{asset_id}
+router = APIRouter(prefix="/assets", tags=["Asset"])
+
+
+def parse_tickers(tickers: str) -> set[str]:
+    return {ticker.strip().upper() for ticker in tickers.split(",") if ticker.strip()}
+
+
+async def subscribe(subscription: PriceSubscription, tickers: set[str]) -> None:
+    added = price_broadcaster.add_tickers(subscription, tickers)
+    if added:
+        # Уже пришедшие из канала цены новее снимка из базы
+        subscription.offer(await load_prices(added), replace=False)
+
+
+@router.get("/stream")
+async def stream_prices(request: Request, tickers: str = Query(..., min_length=1)):
+    """
+    Server-sent events with the prices of the comma-separated `tickers`: the current ones first, then every change.
+
+    Each `prices` event carries `{ticker: price}` for the tickers changed since the previous event. If the server
+    filled up between the request and the start of the stream, a single `error` event is sent instead.
+    """
+    requested = parse_tickers(tickers)
+    # Ошибки проверяются до начала ответа, чтобы вернуться HTTP-статусом
+    price_broadcaster.check(requested)
+
+    async def events():
+        # Подключение внутри генератора: если клиент уйдёт до его запуска, освобождать будет нечего
+        try:
+            subscription = price_broadcaster.connect()
+        except PriceStreamUnavailable as e:
+            yield f"event: error\ndata: {json.dumps(e.detail['details'])}\n\n"
+            return
+        try:
+            await subscribe(subscription, requested)
+            while True:
+                prices = await subscription.next(config.PRICE_STREAM_HEARTBEAT)
+                if prices:
+                    yield f"event: prices\ndata: {json.dumps(prices)}\n\n"
+                else:
+                    yield ": ping\n\n"
+        finally:
+            price_broadcaster.disconnect(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/stream")
+async def stream_prices_ws(websocket: WebSocket, tickers: str = ""):
+    """
+    WebSocket price stream. `tickers` subscribes on connect; afterwards the client sends
+    `{"action": "subscribe" | "unsubscribe", "tickers": [...]}` and receives `{"type": "prices", "data": {...}}`.
+    """
+    try:
+        subscription = price_broadcaster.connect()
+    except PriceStreamUnavailable:
+        await websocket.close(code=1013)  # Try again later
+        return
+
+    send_lock = asyncio.Lock()
+
+    async def send(message: dict) -> None:
+        async with send_lock:
+            await asyncio.wait_for(websocket.send_json(message), config.PRICE_STREAM_SEND_TIMEOUT)
+
+    async def receive_commands() -> None:
+        while True:
+            try:
+                command = PriceStreamCommand.model_validate_json(await websocket.receive_text())
+                if command.action == "subscribe":
+                    await subscribe(subscription, set(command.tickers))
+                else:
+                    price_broadcaster.remove_tickers(subscription, command.tickers)
+            except ValidationError as e:
+                await send({"type": "error", "details": e.errors(include_url=False, include_context=False)})
+            except HTTPException as e:
+                await send({"type": "error", "details": e.detail["details"]})
+
+    async def send_prices() -> None:
+        while True:
+            prices = await subscription.next(config.PRICE_STREAM_HEARTBEAT)
+            if prices:
+                await send({"type": "prices", "data": prices})
+
+    tasks = []
+    try:
+        await websocket.accept()
+        await subscribe(subscription, parse_tickers(tickers))
+        tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(send_prices())]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        # Медленный клиент не должен копить данные в буфере сервера
+        logger.info("Closing price stream of a client that stopped reading.")
+        await websocket.close(code=1008)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail["details"])
+    finally:
+        for task in tasks:
+            task.cancel()
+        price_broadcaster.disconnect(subscription)
@@ -0,0 +1,114 @@
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import BalanceLedgerEntry, LedgerEntryType, User
+
+# Пространство ключей pg_advisory_xact_lock(int, int) для списаний с баланса
+DEBIT_LOCK_NAMESPACE = 1
+
+COMPACTION_BATCH_SIZE = 10000
+
+
+def _balance_query(user_id: int):
+    # Checkpoint and tail are read by one statement, i.e. from one snapshot, so a concurrent compaction
+    # is seen either entirely or not at all
+    tail = select(func.coalesce(func.sum(BalanceLedgerEntry.amount), 0)).where(
+        BalanceLedgerEntry.user_id == user_id, ~BalanceLedgerEntry.compacted
+    )
+    return select(User.balance + tail.scalar_subquery()).where(User.id == user_id)
+
+
+async def current_balance(session: AsyncSession, user_id: int) -> Decimal:
+    """The user's balance: the last checkpoint in `User.balance` plus the ledger entries not compacted into it."""
+    return await session.scalar(_balance_query(user_id))
+
+
+async def credit(
+    session: AsyncSession,
+    user_id: int,
+    entry_type: LedgerEntryType,
+    amount: Decimal,
+    transaction_id: Optional[int] = None,
+) -> None:
+    """Append a positive entry. A plain INSERT: credits never wait on each other or on the user row."""
+    await session.execute(
+        insert(BalanceLedgerEntry).values(
+            user_id=user_id, type=entry_type, amount=amount, transaction_id=transaction_id
+        )
+    )
+
+
+async def debit(
+    session: AsyncSession,
+    user_id: int,
+    entry_type: LedgerEntryType,
+    amount: Decimal,
+    transaction_id: Optional[int] = None,
+) -> Optional[Decimal]:
+    """
+    Append a negative entry if the balance covers `amount`.
+
+    Debits of one user are serialized by a transaction-scoped advisory lock (not a row lock, so credits and
+    compaction are not blocked). The caller owns the transaction.
+
+    :return: The balance after the debit, or None if funds are insufficient (nothing is written).
+    """
+    await session.execute(select(func.pg_advisory_xact_lock(DEBIT_LOCK_NAMESPACE, user_id)))
+    balance = await current_balance(session, user_id)
+    if balance < amount:
+        return None
+
+    await session.execute(
+        insert(BalanceLedgerEntry).values(
+            user_id=user_id, type=entry_type, amount=-amount, transaction_id=transaction_id
+        )
+    )
+    return balance - amount
+
+
+async def compact_ledger(session: AsyncSession, batch_size: int = COMPACTION_BATCH_SIZE) -> int:
+    """
+    Fold pending ledger entries into `User.balance`, `batch_size` entries per statement.
+
+    Each batch marks its entries compacted and adds their sums to the checkpoints in one statement, so
+    `current_balance` never changes. Entries committed later are picked up by the next run.
+
+    :return: Number of entries compacted.
+    """
+    compacted = 0
+    while True:
+        pending = (
+            select(BalanceLedgerEntry.id)
+            .where(~BalanceLedgerEntry.compacted)
+            .order_by(BalanceLedgerEntry.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        batch = (
+            update(BalanceLedgerEntry)
+            .where(BalanceLedgerEntry.id.in_(pending.scalar_subquery()))
+            .values(compacted=True)
+            .returning(BalanceLedgerEntry.user_id, BalanceLedgerEntry.amount)
+            .cte("batch")
+        )
+        totals = (
+            select(batch.c.user_id, func.sum(batch.c.amount).label("total"), func.count().label("entries"))
+            .group_by(batch.c.user_id)
+            .subquery("totals")
+        )
+        stmt = (
+            update(User)
+            .where(User.id == totals.c.user_id)
+            .values(balance=User.balance + totals.c.total)
+            .returning(totals.c.entries)
+        )
+        result = await session.execute(stmt, execution_options={"synchronize_session": False})
+        entries = sum(result.scalars().all())
+        await session.commit()
+
+        compacted += entries
+        if entries < batch_size:
+            return compacted
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from fastapi import Request
+from fastapi import Request, Response
 
-from limiter import limiter
+from idempotency import idempotent
+from limiter import RateLimitTiers, limiter
 from .schemas import TopUpBalanceRequest
 from database.models import User
 from .dependencies import BalanceServiceDep
@@ -9,14 +10,18 @@ from users.auth import current_user
 
 router = APIRouter(prefix="/balance", tags=["Balance"])
 
+RATE_LIMITS = RateLimitTiers("5/minute")
+
 
 @router.post("/top-up", status_code=status.HTTP_200_OK)
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
+@idempotent()
 async def top_up_balance(
     request: Request,
+    response: Response,
     top_up: TopUpBalanceRequest,
     service: BalanceServiceDep,
     current_user: User = Depends(current_user),
 ):
-    updated_user = await service.top_up_balance(current_user, top_up.amount)
-    return {"message": "Баланс успешно пополнен", "new_balance": updated_user.balance}
+    new_balance = await service.top_up_balance(current_user, top_up.amount)
+    return {"message": "Баланс успешно пополнен", "new_balance": new_balance}
@@ -2,7 +2,8 @@ from decimal import Decimal
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from database.models import User
+from balance import ledger
+from database.models import User, LedgerEntryType
 from database.database import get_async_session
 
 
@@ -10,8 +11,11 @@ class BalanceService:
     def __init__(self, session: AsyncSession = Depends(get_async_session)):
         self.session = session
 
-    async def top_up_balance(self, user: User, amount: Decimal) -> User:
-        user.balance += amount
-        await self.session.merge(user)
+    async def get_balance(self, user_id: int) -> Decimal:
+        return await ledger.current_balance(self.session, user_id)
+
+    async def top_up_balance(self, user: User, amount: Decimal) -> Decimal:
+        await ledger.credit(self.session, user.id, LedgerEntryType.TOP_UP, amount)
+        balance = await ledger.current_balance(self.session, user.id)
         await self.session.commit()
-        return user
+        return balance
@@ -1,6 +1,9 @@
-from fastapi import status, Request, APIRouter, Depends
+from fastapi import status, Request, Response, APIRouter, Depends
 
-from limiter import limiter
+from config import config
+from companies.exceptions import CompanyNotFound
+from limiter import RateLimitTiers, limiter
+from response_cache import cached_route
 from users.auth import current_user_admin
 from companies.dependencies import valid_company_id, CompanyServiceDep
 from companies.schemas import (
@@ -14,6 +17,8 @@ from pagination import PaginatorDep
 
 router = APIRouter(prefix="/companies", tags=["Company"])
 
+RATE_LIMITS = RateLimitTiers("5/minute", admin="50/minute")
+
 
 @router.post("/", response_model=CompanyResponse, status_code=status.HTTP_201_CREATED)
 async def create_company(
@@ -25,21 +30,25 @@ async def create_company(
 
 
 @router.get("/", response_model=list[CompanyResponse], status_code=status.HTTP_200_OK)
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
+@cached_route("companies", expire=config.CACHE_TTL_COMPANIES, schema=list[CompanyResponse])
 async def get_companies(
-    request: Request, pagination: PaginatorDep, service: CompanyServiceDep
+    request: Request, response: Response, pagination: PaginatorDep, service: CompanyServiceDep
 ):
-    return await service.get_all(pagination.limit, pagination.skip)
+    return await service.get_all(pagination)
 
 
 @router.get(
     "/{company_id}", response_model=CompanyResponse, status_code=status.HTTP_200_OK
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
+@cached_route("companies", expire=config.CACHE_TTL_COMPANY, schema=CompanyResponse)
 async def get_specific_company(
-    request: Request, company: Company = Depends(valid_company_id)
+    request: Request, response: Response, company_id: int, service: CompanyServiceDep
 ):
-    return company
+    if company := await service.get_by_id(company_id):
+        return company
+    raise CompanyNotFound()
 
 
 @router.put(
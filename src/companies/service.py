@@ -3,15 +3,23 @@ from sqlalchemy import insert, select
 from typing import Sequence
 from fastapi import Depends
 
+from assets.autocomplete import asset_autocomplete
 from companies.exceptions import CompanyAlreadyExists
 from database.models import Company
 from .schemas import CompanyCreate, CompanyUpdate, CompanyPatchUpdate
-from database.database import get_async_session
+from database.database import get_async_session, get_read_session
+from pagination import Paginator
+from response_cache import invalidate
 
 
 class CompanyService:
-    def __init__(self, session: AsyncSession = Depends(get_async_session)):
+    def __init__(
+        self,
+        session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session),
+    ):
         self.session = session
+        self.read_session = read_session  # Реплика для списков, если настроена
 
     async def create(self, company: CompanyCreate) -> Company:
         company.name = company.name.title()
@@ -21,12 +29,13 @@ class CompanyService:
         stmt = insert(Company).values(**company.model_dump()).returning(Company)
         result = await self.session.execute(stmt)
         await self.session.commit()
+        await invalidate("companies")
         return result.scalar_one()
 
-    async def get_all(self, limit: int, skip: int) -> Sequence[Company]:
-        query = select(Company).limit(limit).offset(skip)
-        result = await self.session.execute(query)
-        return result.scalars().all()
+    async def get_all(self, pagination: Paginator) -> Sequence[Company]:
+        query = pagination.apply(select(Company), Company.id)
+        result = await self.read_session.execute(query)
+        return pagination.page(result.scalars().all())
 
     async def get_by_id(self, company_id: int) -> Company | None:
         query = select(Company).where(Company.id == company_id)
@@ -43,6 +52,8 @@ class CompanyService:
             setattr(company, key, value)
         merged_company = await self.session.merge(company)
         await self.session.commit()
+        await invalidate("companies")
+        await asset_autocomplete.company_renamed(merged_company.id, merged_company.name)
         return merged_company
 
     async def update_partial(self, company: Company, update_data: CompanyPatchUpdate) -> Company:
@@ -50,8 +61,11 @@ class CompanyService:
             setattr(company, key, value)
         self.session.add(company)
         await self.session.commit()
+        await invalidate("companies")
+        await asset_autocomplete.company_renamed(company.id, company.name)
         return company
 
     async def delete(self, company: Company) -> None:
         await self.session.delete(company)
         await self.session.commit()
+        await invalidate("companies")
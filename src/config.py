@@ -7,6 +7,18 @@ class Config(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
+    POSTGRES_REPLICA_HOST: str = ""  # Реплика для чтения; пусто - все запросы на основной сервер
+    POSTGRES_REPLICA_PORT: str = ""
+    REPLICA_STICKY_SECONDS: int = 10  # Столько клиент читает с основного сервера после записи
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # Секунды; -1 - не пересоздавать соединения
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Кэш prepared statements в asyncpg на соединение
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # Кэш SQLAlchemy поверх него
+    DB_PGBOUNCER: bool = False  # PgBouncer в режиме transaction pooling: без именованных prepared statements
 
     REDIS_HOST: str
     REDIS_PORT: str
@@ -14,6 +26,45 @@ class Config(BaseSettings):
     SECRET: str
     DEBUG: bool
 
+    USER_CACHE_ENABLED: bool = False
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_MAX_SIZE: int = 1024
+
+    ASSET_AUTOCOMPLETE_ENABLED: bool = False
+
+    PORTFOLIO_CACHE_ENABLED: bool = False
+    PORTFOLIO_CACHE_TTL: int = 300
+
+    # Цены активов в памяти процесса для сделок; подписка на цены работает и без неё - для потока цен клиентам
+    PRICE_TABLE_ENABLED: bool = True
+    PRICE_MAX_AGE: float = 0  # Сделка отклоняется, если цена старше, секунды; 0 - без ограничения
+    PRICE_HISTORY_PARTITIONS_AHEAD: int = 3  # Дневные секции создаются заранее на столько дней
+    PRICE_HISTORY_RAW_RETENTION_DAYS: int = 7  # Сырые цены; дальше остаются только свечи
+    PRICE_HISTORY_HOURLY_RETENTION_DAYS: int = 90  # Часовые свечи; дневные хранятся всегда
+    TRANSACTION_PARTITIONS_AHEAD: int = 3  # Месячные секции transaction создаются заранее на столько месяцев
+    # Месяцы старше переносятся в архивную схему и пропадают из истории и себестоимости; 0 - без архивации
+    TRANSACTION_ARCHIVE_AFTER_MONTHS: int = 0
+    TRANSACTION_ARCHIVE_SCHEMA: str = "archive"
+    # Архивация блокирует таблицу transaction; дольше этого она не ждёт и повторяется при следующем запуске
+    TRANSACTION_ARCHIVE_LOCK_TIMEOUT: float = 5
+    PRICE_STREAM_MAX_SUBSCRIBERS: int = 10000  # На процесс
+    PRICE_STREAM_MAX_TICKERS: int = 100  # На одно подключение
+    PRICE_STREAM_HEARTBEAT: float = 15  # Комментарий-пинг в SSE, если цены не менялись
+    PRICE_STREAM_SEND_TIMEOUT: float = 10  # Клиент, не принимающий данные дольше, отключается
+
+    CACHE_TTL_ASSETS: int = 60
+    CACHE_TTL_ASSET: int = 60
+    CACHE_TTL_COMPANIES: int = 300
+    CACHE_TTL_COMPANY: int = 300
+
+    RATE_LIMIT_STORAGE_URI: str = ""  # По умолчанию - тот же Redis, что и кэш
+    RATE_LIMIT_STRATEGY: str = "moving-window"
+    RATE_LIMIT_STORAGE_TIMEOUT: float = 0.5
+    TRUSTED_PROXIES: list[str] = []  # Адреса/подсети балансировщиков, чьему X-Forwarded-For можно верить
+
+    IDEMPOTENCY_KEY_TTL: int = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TTL: int = 60
+
     MAIL_USERNAME: str = ""
     MAIL_PASSWORD: str = ""
     MAIL_FROM: str = ""
@@ -26,6 +77,18 @@ class Config(BaseSettings):
     VALIDATE_CERTS: bool = True
 
     FINNHUB_API_KEY: str
+    FINNHUB_MAX_CONCURRENCY: int = 10
+    FINNHUB_RATE_LIMIT_PER_MINUTE: int = 60
+
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5
+    HTTP_CLIENT_TIMEOUT: float = 10
+    HTTP_CLIENT_MAX_RETRIES: int = 3  # Повторы на 5xx и ошибки соединения, только для GET
+    HTTP_CLIENT_RETRY_BACKOFF: float = 0.5  # Базовая задержка, удваивается с каждой попыткой
+    HTTP_CLIENT_RETRY_BACKOFF_MAX: float = 10
 
 
 config = Config()
@@ -0,0 +1,38 @@
+from collections.abc import Mapping
+from decimal import Decimal
+
+from sqlalchemy import DECIMAL, Integer, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Asset
+
+# asyncpg caps a statement at 32767 bind parameters; each row binds two.
+PRICE_UPDATE_CHUNK_SIZE = 5000
+
+
+async def bulk_update_asset_prices(
+    session: AsyncSession, prices: Mapping[int, Decimal], chunk_size: int = PRICE_UPDATE_CHUNK_SIZE
+) -> dict[int, Decimal]:
+    """
+    Apply `{asset_id: price}` with one `UPDATE ... FROM (VALUES ...)` per chunk.
+
+    Rows whose price is unchanged are not touched. The caller owns the transaction.
+
+    :return: `{asset_id: price}` of the rows actually updated.
+    """
+    items = list(prices.items())
+    updated = {}
+    for start in range(0, len(items), chunk_size):
+        new_prices = values(
+            column("id", Integer), column("price", DECIMAL(precision=20, scale=10)), name="new_prices"
+        ).data(items[start : start + chunk_size])
+        stmt = (
+            update(Asset)
+            .where(Asset.id == new_prices.c.id, Asset.price.is_distinct_from(new_prices.c.price))
+            .values(price=new_prices.c.price)
+            .returning(Asset.id, Asset.price)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        updated.update(result.tuples())
+    return updated
@@ -1,10 +1,14 @@
+import time
 from typing import AsyncGenerator, Annotated, Any, Optional
+from uuid import uuid4
 
+from fastapi import Depends, Request, Response
 from sqlalchemy import JSON
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase, mapped_column
 
 from config import config
+from database.pool import TimedAsyncAdaptedQueuePool
 from logger import logger
 
 
@@ -16,27 +20,81 @@ intpk = Annotated[int, mapped_column(primary_key=True, index=True, autoincrement
 
 _engine: Optional[AsyncEngine] = None
 _async_session_maker: Optional[async_sessionmaker] = None
+_replica_engine: Optional[AsyncEngine] = None
+_replica_session_maker: Optional[async_sessionmaker] = None
+
+PRIMARY_READS_COOKIE = "read-primary-until"
+
+
+def create_database_engine(url: str) -> AsyncEngine:
+    """Engine with the pool and statement cache settings from config, shared by the app and Celery workers."""
+    statement_cache_size = config.DB_STATEMENT_CACHE_SIZE
+    prepared_statement_cache_size = config.DB_PREPARED_STATEMENT_CACHE_SIZE
+    connect_args: dict[str, Any] = {}
+    if config.DB_PGBOUNCER:
+        # Соседние транзакции могут попасть на другое серверное соединение, поэтому prepared statements
+        # не кэшируются, а их имена уникальны
+        statement_cache_size = prepared_statement_cache_size = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    connect_args["statement_cache_size"] = statement_cache_size
+
+    return create_async_engine(
+        f"{url}?prepared_statement_cache_size={prepared_statement_cache_size}",
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """Current occupancy plus checkout wait metrics of this process's pools, per engine."""
+    stats = {}
+    for name, engine in (("primary", _engine), ("replica", _replica_engine)):
+        if engine is None:
+            continue
+        pool = engine.pool
+        stats[name] = pool.metrics.snapshot()
+        stats[name].update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    return stats
 
 
 def setup_database():
-    global _engine, _async_session_maker
+    global _engine, _async_session_maker, _replica_engine, _replica_session_maker
 
     if _engine is not None:
         return
 
     url = f"postgresql+asyncpg://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@{config.POSTGRES_HOST}:{config.POSTGRES_PORT}/{config.POSTGRES_DB}"
-    _engine = create_async_engine(url)
+    _engine = create_database_engine(url)
     _async_session_maker = async_sessionmaker(_engine, expire_on_commit=False)
     logger.info("Database engine and session maker have been initialized.")
 
+    if config.POSTGRES_REPLICA_HOST:
+        replica_port = config.POSTGRES_REPLICA_PORT or config.POSTGRES_PORT
+        replica_url = (
+            f"postgresql+asyncpg://{config.POSTGRES_USER}:{config.POSTGRES_PASSWORD}@"
+            f"{config.POSTGRES_REPLICA_HOST}:{replica_port}/{config.POSTGRES_DB}"
+        )
+        _replica_engine = create_database_engine(replica_url)
+        _replica_session_maker = async_sessionmaker(_replica_engine, expire_on_commit=False)
+        logger.info("Read replica engine and session maker have been initialized.")
+
 
 async def dispose_database_engine():
-    global _engine, _async_session_maker
+    global _engine, _async_session_maker, _replica_engine, _replica_session_maker
     if _engine:
         await _engine.dispose()
         _engine = None
         _async_session_maker = None
         logger.info("Database engine and session maker have been disposed.")
+    if _replica_engine:
+        await _replica_engine.dispose()
+        _replica_engine = None
+        _replica_session_maker = None
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -45,3 +103,36 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
     async with _async_session_maker() as session:
         yield session
+
+
+def replica_enabled() -> bool:
+    return _replica_session_maker is not None
+
+
+def mark_primary_reads(response: Response) -> None:
+    """Pin the client's reads to the primary for REPLICA_STICKY_SECONDS, so it sees its own writes."""
+    until = int(time.time()) + config.REPLICA_STICKY_SECONDS
+    response.set_cookie(PRIMARY_READS_COOKIE, str(until), max_age=config.REPLICA_STICKY_SECONDS, httponly=True)
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        return int(request.cookies.get(PRIMARY_READS_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_async_session)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only queries: the replica if one is configured, otherwise the request's primary session.
+
+    Clients that wrote recently (see mark_primary_reads) keep reading from the primary.
+    """
+    if _replica_session_maker is None or reads_pinned_to_primary(request):
+        yield session
+        return
+
+    async with _replica_session_maker() as replica_session:
+        yield replica_session
@@ -5,7 +5,7 @@ from typing import Any, List, Optional
 
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
 from pydantic import EmailStr
-from sqlalchemy import text, ForeignKey, String, DECIMAL, UniqueConstraint
+from sqlalchemy import text, DDL, ForeignKey, String, DECIMAL, UniqueConstraint, Index, event
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy import Enum as SQLAlchemyEnum
 
@@ -22,6 +22,18 @@ class TransactionType(Enum):
     SELL = "sell"
 
 
+class LedgerEntryType(Enum):
+    TOP_UP = "top_up"
+    BUY = "buy"
+    SELL = "sell"
+
+
+class CandleInterval(Enum):
+    MINUTE = "1m"
+    HOUR = "1h"
+    DAY = "1d"
+
+
 class Role(Base):
     __tablename__ = "role"
     id: Mapped[intpk]
@@ -42,13 +54,14 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     is_verified: Mapped[bool] = mapped_column(default=False)
     balance: Mapped[Decimal] = mapped_column(
         DECIMAL(precision=20, scale=10), default=Decimal("0.0")
-    )  # Баланс пользователя в USD (долларах США)
-    role: Mapped[Role] = relationship("Role", lazy="selectin")
+    )  # Баланс в USD на момент последней свёртки журнала; текущий - см. balance.ledger.current_balance
+    # Загружается при каждой аутентификации, поэтому только роль; портфель и история - по запросу
+    role: Mapped[Role] = relationship("Role", lazy="joined")
 
     user_assets: Mapped[List["UserAsset"]] = relationship(
-        "UserAsset", back_populates="user", lazy="selectin", cascade="all, delete-orphan"
+        "UserAsset", back_populates="user", lazy="select", cascade="all, delete-orphan"
     )
-    transactions = relationship("Transaction", back_populates="user", lazy="selectin")
+    transactions = relationship("Transaction", back_populates="user", lazy="select")
 
 
 class Company(Base):
@@ -57,7 +70,11 @@ class Company(Base):
     name: Mapped[str] = mapped_column(unique=True)
     profile: Mapped[Optional[str]] = mapped_column(nullable=True)
     foundation_date: Mapped[Optional[date]] = mapped_column(nullable=True)
-    assets: Mapped[List["Asset"]] = relationship("Asset", back_populates="company", lazy="selectin")
+    assets: Mapped[List["Asset"]] = relationship("Asset", back_populates="company", lazy="select")
+
+    __table_args__ = (
+        Index("ix_company_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
 
 class Asset(Base):
@@ -72,18 +89,27 @@ class Asset(Base):
     price: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))  # Цена актива в USD (долларах США)
     company: Mapped["Company"] = relationship("Company", back_populates="assets", lazy="selectin")
 
+    __table_args__ = (
+        Index("ix_asset_company_id_id", "company_id", "id"),  # Активы компании по порядку id
+        # Индексы поиска: префикс тикера и подстрока в названии (pg_trgm)
+        Index("ix_asset_ticker_prefix", text("upper(ticker) text_pattern_ops")),
+        Index("ix_asset_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
 
 class UserAsset(Base):
     __tablename__ = "user_asset"
     id: Mapped[intpk]
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
-    asset_id: Mapped[int] = mapped_column(ForeignKey("asset.id"))
+    asset_id: Mapped[int] = mapped_column(ForeignKey("asset.id"), index=True)
     amount: Mapped[Decimal] = mapped_column(
         DECIMAL(precision=20, scale=10), default=Decimal("0.0")
     )  # Количество актива в собственности пользователя
+    # Себестоимость остатка по средней цене: покупки прибавляют сумму, продажи списывают свою долю
+    cost_basis: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10), server_default=text("0"))
 
-    user: Mapped["User"] = relationship("User", back_populates="user_assets", lazy="selectin")
-    asset: Mapped["Asset"] = relationship("Asset", lazy="selectin")
+    user: Mapped["User"] = relationship("User", back_populates="user_assets", lazy="select")
+    asset: Mapped["Asset"] = relationship("Asset", lazy="select")
 
     __table_args__ = (
         UniqueConstraint(
@@ -93,16 +119,99 @@ class UserAsset(Base):
 
 
 class Transaction(Base):
+    """
+    Partitioned by month of `transaction_datetime` (see transactions.partitions), so the key includes it.
+
+    Trades outside of the monthly partitions land in transaction_default, which the maintenance task empties.
+    """
+
     __tablename__ = "transaction"
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
-    asset_id: Mapped[int] = mapped_column(ForeignKey("asset.id"))
+    asset_id: Mapped[int] = mapped_column(ForeignKey("asset.id"), index=True)
     type: Mapped[TransactionType] = mapped_column(SQLAlchemyEnum(TransactionType))
-    transaction_datetime: Mapped[datetime] = mapped_column(server_default=text("TIMEZONE('utc', now())"))
+    transaction_datetime: Mapped[datetime] = mapped_column(
+        primary_key=True, server_default=text("TIMEZONE('utc', now())")
+    )
     amount: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))  # Количество актива
     total_value: Mapped[Decimal] = mapped_column(
         DECIMAL(precision=20, scale=10)
     )  # Сумма транзакции в USD (долларах США)
 
-    user: Mapped["User"] = relationship("User", back_populates="transactions", lazy="selectin")
+    user: Mapped["User"] = relationship("User", back_populates="transactions", lazy="select")
     asset: Mapped["Asset"] = relationship("Asset")
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (transaction_datetime)"}
+
+
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL('CREATE TABLE transaction_default PARTITION OF "transaction" DEFAULT'),
+)
+
+# Ключи keyset-пагинации истории: по пользователю и общая (для админов)
+Index(
+    "ix_transaction_user_id_datetime_id",
+    Transaction.user_id,
+    Transaction.transaction_datetime.desc(),
+    Transaction.id.desc(),
+)
+Index("ix_transaction_datetime_id", Transaction.transaction_datetime.desc(), Transaction.id.desc())
+
+
+class BalanceLedgerEntry(Base):
+    """Append-only history of balance changes; `amount` is signed (top-ups and sells positive, buys negative)."""
+
+    __tablename__ = "balance_ledger_entry"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
+    type: Mapped[LedgerEntryType] = mapped_column(SQLAlchemyEnum(LedgerEntryType))
+    amount: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+    # Без внешнего ключа: ключ секционированной transaction - (id, transaction_datetime)
+    transaction_id: Mapped[Optional[int]]
+    created_at: Mapped[datetime] = mapped_column(server_default=text("TIMEZONE('utc', now())"))
+    compacted: Mapped[bool] = mapped_column(default=False)  # Уже учтена в User.balance
+
+    __table_args__ = (
+        Index("ix_balance_ledger_entry_user_id_id", "user_id", "id"),  # История по пользователю
+        # Хвост журнала, ещё не свёрнутый в User.balance
+        Index("ix_balance_ledger_entry_pending", "user_id", postgresql_where=text("NOT compacted")),
+    )
+
+
+class AssetPriceHistory(Base):
+    """
+    Every price fetched by the refresh task. Partitioned by day (see assets.history), old days are dropped whole.
+
+    No foreign key to asset: rows are appended with COPY on every refresh, and the checks would only slow it down.
+    """
+
+    __tablename__ = "asset_price_history"
+    asset_id: Mapped[int] = mapped_column(primary_key=True)
+    recorded_at: Mapped[datetime] = mapped_column(primary_key=True)
+    price: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (recorded_at)"}
+
+
+class AssetPriceCandle(Base):
+    """Hourly and daily OHLC rolled up from asset_price_history, kept after the raw prices are dropped."""
+
+    __tablename__ = "asset_price_candle"
+    asset_id: Mapped[int] = mapped_column(ForeignKey("asset.id", ondelete="CASCADE"), primary_key=True)
+    interval: Mapped[CandleInterval] = mapped_column(SQLAlchemyEnum(CandleInterval), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    open: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+    high: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+    low: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+    close: Mapped[Decimal] = mapped_column(DECIMAL(precision=20, scale=10))
+
+
+class IdempotencyKey(Base):
+    """Postgres fallback for the Redis idempotency store (see idempotency.IdempotencyStore)."""
+
+    __tablename__ = "idempotency_key"
+    key: Mapped[str] = mapped_column(String(length=512), primary_key=True)
+    record: Mapped[dict[str, Any]]
+    expires_at: Mapped[datetime] = mapped_column(index=True)
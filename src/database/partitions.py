@@ -0,0 +1,91 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+async def list_partitions(session: AsyncSession, table: str) -> list[tuple[str, Optional[datetime]]]:
+    """`(name, upper bound)` of each range partition of `table`; the default partition's bound is None."""
+    result = await session.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": f'"{table}"'},
+    )
+    partitions = []
+    for name, bound in result:
+        upper = _UPPER_BOUND.search(bound)
+        partitions.append((name, datetime.fromisoformat(upper.group(1)) if upper else None))
+    return partitions
+
+
+async def create_partition(
+    session: AsyncSession,
+    table: str,
+    name: str,
+    column: str,
+    start: datetime,
+    end: datetime,
+    default: Optional[str] = None,
+) -> bool:
+    """
+    Add the partition `name` of `table` for `[start, end)` unless it exists; the caller owns the transaction.
+
+    The partition is created as a plain table and then attached: ATTACH PARTITION takes a lock that lets reads
+    and writes of `table` go on, while CREATE TABLE ... PARTITION OF would block them. Rows of the range that
+    landed in the `default` partition meanwhile are moved over first, otherwise the attach would fail. Writes
+    into the `default` partition wait from the move until the commit, so that none slips in between.
+    """
+    if await session.scalar(select(func.to_regclass(name))) is not None:
+        return False
+    await session.execute(text(f'CREATE TABLE {name} (LIKE "{table}" INCLUDING DEFAULTS)'))
+    if default is not None:
+        # Чтение секции по умолчанию не блокируется, запись ждёт; ATTACH всё равно берёт на ней эксклюзивную блокировку
+        await session.execute(text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE"))
+        await session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {default} WHERE {column} >= :start AND {column} < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"start": start, "end": end},
+        )
+    await session.execute(
+        text(f"ALTER TABLE \"{table}\" ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    return True
+
+
+async def drop_partitions_before(session: AsyncSession, table: str, moment: datetime) -> list[str]:
+    """Drop the partitions of `table` holding only rows older than `moment`; the caller owns the transaction."""
+    expired = [name for name, upper in await list_partitions(session, table) if upper is not None and upper <= moment]
+    for name in expired:
+        await session.execute(text(f"DROP TABLE {name}"))
+    return expired
+
+
+async def archive_partitions_before(
+    session: AsyncSession, table: str, moment: datetime, schema: str, lock_timeout: Optional[float] = None
+) -> list[str]:
+    """
+    Detach the partitions of `table` holding only rows older than `moment` and move them to `schema`.
+
+    The archived tables keep their data and indexes but are no longer seen by queries on `table`.
+    DETACH PARTITION takes an ACCESS EXCLUSIVE lock on `table` until the commit: it waits for every running query
+    on `table`, and every new one waits behind it. With `lock_timeout` (seconds) the archival gives up instead of
+    stalling the table for longer. The caller owns the transaction.
+    """
+    expired = [name for name, upper in await list_partitions(session, table) if upper is not None and upper <= moment]
+    if expired:
+        if lock_timeout is not None:
+            await session.execute(text(f"SET LOCAL lock_timeout = '{int(lock_timeout * 1000)}ms'"))
+        await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    for name in expired:
+        await session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION {name}'))
+        await session.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+    return expired
@@ -0,0 +1,67 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+# Верхние границы корзин гистограммы ожидания, в секундах
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class PoolMetrics:
+    """Connection checkout wait times of one of this process's pools, as a cumulative histogram."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1))
+
+    def observe(self, waited: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.buckets[bisect_left(WAIT_BUCKETS, waited)] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        cumulative, histogram = 0, {}
+        for bound, count in zip([*map(str, WAIT_BUCKETS), "+Inf"], self.buckets):
+            cumulative += count
+            histogram[bound] = cumulative
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_total,
+            "wait_seconds_max": self.wait_max,
+            "wait_seconds_buckets": histogram,
+        }
+
+
+class TimedCheckoutMixin:
+    """
+    Records how long each checkout waits for a free connection (including opening an overflow one).
+
+    Every pool keeps its own `metrics`, so the primary's and the replica's waits are not mixed.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+
+class TimedAsyncAdaptedQueuePool(TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
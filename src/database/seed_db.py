@@ -9,6 +9,7 @@ from config import config
 from database.database import setup_database, dispose_database_engine
 from database.models import Company, Asset, Role
 from finnhub import FinnhubService
+from http_client import create_http_client
 from logger import logger
 
 TICKERS_TO_SEED = ["AAPL", "GOOGL", "MSFT", "TSLA"]
@@ -49,7 +50,7 @@ async def seed_database():
 
                 db.add_all([Role(name="users", permissions={}), Role(name="admin", permissions={})])
 
-                async with FinnhubService(api_key=config.FINNHUB_API_KEY) as finnhub:
+                async with create_http_client() as client, FinnhubService(config.FINNHUB_API_KEY, client) as finnhub:
                     for ticker in TICKERS_TO_SEED:
                         logger.info(f"Processing ticker: {ticker}")
 
@@ -9,27 +9,41 @@ FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
 
 
 class FinnhubService:
-    def __init__(self, api_key: str):
+    """
+    Finnhub REST client.
+
+    Pass the process-wide `client` from `http_client` to reuse its pooled connections; without one the service
+    opens (and closes) a client of its own for the duration of the `async with` block.
+    """
+
+    def __init__(self, api_key: str, client: httpx.AsyncClient | None = None):
         if not api_key:
             raise ValueError("Finnhub API key is required.")
 
         self._api_key = api_key
-        self._client = None
+        self._client = client
+        self._owns_client = client is None
 
     async def __aenter__(self):
-        self._client = httpx.AsyncClient(params={"token": self._api_key})
+        if self._owns_client:
+            self._client = httpx.AsyncClient()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client:
+        # Общий клиент закрывается его владельцем, а не сервисом
+        if self._owns_client and self._client:
             await self._client.aclose()
             self._client = None
 
+    async def _get(self, path: str, ticker: str) -> httpx.Response:
+        params = {"symbol": ticker, "token": self._api_key}
+        response = await self._client.get(f"{FINNHUB_BASE_URL}{path}", params=params)
+        response.raise_for_status()
+        return response
+
     async def get_company_profile(self, ticker: str) -> dict[str, Any] | None:
         try:
-            response = await self._client.get(f"{FINNHUB_BASE_URL}/stock/profile2", params={"symbol": ticker})
-            response.raise_for_status()
-            profile = response.json()
+            profile = (await self._get("/stock/profile2", ticker)).json()
             return profile if profile else None
         except (httpx.HTTPStatusError, KeyError) as e:
             logger.info(f"Could not fetch profile for {ticker}: {e}")
@@ -37,9 +51,7 @@ class FinnhubService:
 
     async def get_asset_price(self, ticker: str) -> Decimal | None:
         try:
-            response = await self._client.get(f"{FINNHUB_BASE_URL}/quote", params={"symbol": ticker})
-            response.raise_for_status()
-            quote_data = response.json()
+            quote_data = (await self._get("/quote", ticker)).json()
             price = Decimal(str(quote_data.get("c", "0.0")))
             return price if price > 0 else None
         except (httpx.HTTPStatusError, KeyError, ValueError) as e:
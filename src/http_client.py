@@ -0,0 +1,125 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from config import config
+from logger import logger
+
+# 429 не повторяется: темп запросов задаёт вызывающий код (например, TokenBucket обновления цен),
+# а скрытые повторы внутри транспорта расходовали бы лимит API мимо него
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Retries idempotent requests on 5xx responses and connection errors.
+
+    Delays grow exponentially from `backoff` up to `backoff_max` with full jitter; a `Retry-After` header,
+    if present, is used as the lower bound.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_retries: int, backoff: float, backoff_max: float):
+        self._transport = transport
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in RETRY_METHODS:
+            return await self._transport.handle_async_request(request)
+
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+                if attempt >= self._max_retries:
+                    raise
+                delay = self._delay(attempt)
+                logger.warning(f"{request.method} {request.url.path} failed ({e!r}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self._max_retries:
+                    return response
+                delay = max(self._delay(attempt), self._retry_after(response))
+                logger.warning(
+                    f"{request.method} {request.url.path} returned {response.status_code}, retrying in {delay:.2f}s"
+                )
+                await response.aclose()
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self._backoff_max, self._backoff * 2**attempt))
+
+    def _retry_after(self, response: httpx.Response) -> float:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return 0.0
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return 0.0
+        # Не ждём дольше, чем допускает сама стратегия повторов
+        return min(max(seconds, 0.0), self._backoff_max)
+
+
+def create_http_client(
+    http2: bool = config.HTTP_CLIENT_HTTP2,
+    max_connections: int = config.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = config.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry: float = config.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    connect_timeout: float = config.HTTP_CLIENT_CONNECT_TIMEOUT,
+    timeout: float = config.HTTP_CLIENT_TIMEOUT,
+    max_retries: int = config.HTTP_CLIENT_MAX_RETRIES,
+    backoff: float = config.HTTP_CLIENT_RETRY_BACKOFF,
+    backoff_max: float = config.HTTP_CLIENT_RETRY_BACKOFF_MAX,
+) -> httpx.AsyncClient:
+    """Pooled keep-alive client for outbound API calls, retrying 5xx with exponential backoff and jitter."""
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    transport = RetryTransport(
+        httpx.AsyncHTTPTransport(http2=http2, limits=limits),
+        max_retries=max_retries,
+        backoff=backoff,
+        backoff_max=backoff_max,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(timeout, connect=connect_timeout))
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """Create the process-wide client. Must be called from the event loop that will use it."""
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    if _http_client is None:
+        raise RuntimeError("HTTP client is not initialized; call open_http_client() first.")
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -0,0 +1,261 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.database import get_async_session
+from database.models import IdempotencyKey, User
+from logger import logger
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_PREFIX = "idempotency"
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+REDIS_BACKEND = "redis"
+POSTGRES_BACKEND = "postgres"
+
+# Конфликты, блокировки и ограничение частоты временные: повтор с тем же ключом должен выполниться заново
+RETRYABLE_STATUS_CODES = {status.HTTP_409_CONFLICT, status.HTTP_423_LOCKED, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+class IdempotencyKeyInProgress(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"status": "error", "data": None, "details": "A request with this Idempotency-Key is in progress"},
+        )
+
+
+class IdempotencyKeyReused(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "status": "error",
+                "data": None,
+                "details": "Idempotency-Key was already used with a different request body",
+            },
+        )
+
+
+class IdempotencyStore:
+    """
+    Records of idempotent requests: `{"request_hash", "state", "status_code", "body"}` per scoped key.
+
+    Redis is the primary store; whenever it is unreachable the `idempotency_key` table is used instead.
+    A claimed key holds an IN_PROGRESS record for `lock_ttl` seconds, a completed one lives for `ttl` seconds.
+    `claim()` reports the store that holds the key, and `complete()`/`release()` keep using it, so a request
+    claimed in one store is never finished in the other while the key there expires.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[aioredis.Redis],
+        ttl: int,
+        lock_ttl: int,
+        session_factory: Callable[[], AsyncGenerator[AsyncSession, None]] = get_async_session,
+    ):
+        self._redis = redis
+        self._ttl = ttl
+        self._lock_ttl = lock_ttl
+        self._session_factory = session_factory
+
+    async def claim(self, key: str, request_hash: str) -> tuple[Optional[dict[str, Any]], str]:
+        """
+        Claim `key` for a new request.
+
+        Returns the record already stored (None if the key was claimed) and the store holding the key,
+        REDIS_BACKEND or POSTGRES_BACKEND.
+        """
+        record = {"request_hash": request_hash, "state": IN_PROGRESS, "status_code": None, "body": None}
+        if self._redis is not None:
+            try:
+                stored = await self._claim_redis(key, record)
+            except RedisError as e:
+                logger.warning(f"Idempotency store falling back to Postgres: {e}")
+            else:
+                if stored is not None:
+                    return stored, REDIS_BACKEND
+                # Пока Redis был недоступен, запрос с этим ключом мог быть принят или выполнен через Postgres
+                stored = await self._find_postgres(key)
+                if stored is None:
+                    return None, REDIS_BACKEND
+                await self._release_redis(key)
+                return stored, POSTGRES_BACKEND
+
+        return await self._claim_postgres(key, record), POSTGRES_BACKEND
+
+    async def complete(self, key: str, backend: str, request_hash: str, status_code: Optional[int], body: Any) -> None:
+        """Store the final response of a request claimed in `backend` for `ttl` seconds."""
+        record = {"request_hash": request_hash, "state": COMPLETED, "status_code": status_code, "body": body}
+        if backend == REDIS_BACKEND:
+            try:
+                await self._redis.set(key, json.dumps(record), ex=self._ttl)
+                return
+            except RedisError as e:
+                # claim() проверяет и Postgres, поэтому повтор найдёт результат и после истечения ключа в Redis
+                logger.warning(f"Idempotency store falling back to Postgres: {e}")
+        await self._complete_postgres(key, record)
+
+    async def release(self, key: str, backend: str) -> None:
+        """Forget a key claimed in `backend`, so a retry runs the request again."""
+        if backend == REDIS_BACKEND:
+            await self._release_redis(key)
+        else:
+            await self._release_postgres(key)
+
+    async def _claim_redis(self, key: str, record: dict[str, Any]) -> Optional[dict[str, Any]]:
+        while not await self._redis.set(key, json.dumps(record), nx=True, ex=self._lock_ttl):
+            stored = await self._redis.get(key)
+            # Запись могла истечь между SET и GET - тогда ключ снова свободен
+            if stored is not None:
+                return json.loads(stored)
+        return None
+
+    async def _release_redis(self, key: str) -> None:
+        try:
+            await self._redis.delete(key)
+        except RedisError as e:
+            # Захват в Redis истечёт сам через lock_ttl
+            logger.warning(f"Idempotency key release failed: {e}")
+
+    async def _claim_postgres(self, key: str, record: dict[str, Any]) -> Optional[dict[str, Any]]:
+        expires_at = self._expires_at(self._lock_ttl)
+        stmt = pg_insert(IdempotencyKey).values(key=key, record=record, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={"record": stmt.excluded.record, "expires_at": stmt.excluded.expires_at},
+            where=IdempotencyKey.expires_at < func.timezone("utc", func.now()),
+        ).returning(IdempotencyKey.key)
+        stored = None
+        async for session in self._session_factory():
+            claimed = await session.scalar(stmt)
+            await session.commit()
+            if claimed is None:
+                stored = await session.scalar(select(IdempotencyKey.record).where(IdempotencyKey.key == key))
+        return stored
+
+    async def _complete_postgres(self, key: str, record: dict[str, Any]) -> None:
+        stmt = pg_insert(IdempotencyKey).values(key=key, record=record, expires_at=self._expires_at(self._ttl))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={"record": stmt.excluded.record, "expires_at": stmt.excluded.expires_at},
+        )
+        async for session in self._session_factory():
+            await session.execute(stmt)
+            await session.commit()
+
+    async def _release_postgres(self, key: str) -> None:
+        async for session in self._session_factory():
+            await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            await session.commit()
+
+    async def _find_postgres(self, key: str) -> Optional[dict[str, Any]]:
+        stored = None
+        async for session in self._session_factory():
+            stored = await session.scalar(
+                select(IdempotencyKey.record).where(
+                    IdempotencyKey.key == key, IdempotencyKey.expires_at >= func.timezone("utc", func.now())
+                )
+            )
+        return stored
+
+    @staticmethod
+    def _expires_at(ttl: int) -> datetime:
+        # Колонка без часового пояса, как и остальные даты в схеме (UTC)
+        return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=ttl)
+
+
+async def purge_expired_keys(session: AsyncSession) -> int:
+    """Delete expired rows from the Postgres fallback table."""
+    result = await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.timezone("utc", func.now()))
+    )
+    await session.commit()
+    return result.rowcount
+
+
+idempotency_store = IdempotencyStore(
+    redis=aioredis.from_url(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}"),
+    ttl=config.IDEMPOTENCY_KEY_TTL,
+    lock_ttl=config.IDEMPOTENCY_LOCK_TTL,
+)
+
+
+def idempotent(schema: Any = None):
+    """
+    Honour the `Idempotency-Key` header on a POST route.
+
+    The first request with a key runs the route and stores its result (or its 4xx error other than a transient
+    409/423/429); retries with the same key and body get the stored result back with `Idempotent-Replayed: true`
+    instead of running the route again.
+    Keys are scoped to the user and the path. The route must accept `request`, `response` and `current_user`;
+    its result is serialized through `schema` (or `jsonable_encoder` if not given).
+    """
+    adapter = TypeAdapter(schema) if schema is not None else None
+
+    def serialize(result: Any) -> Any:
+        if adapter is None:
+            return jsonable_encoder(result)
+        return adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @wraps(func)
+        async def inner(*args, request: Request, response: Response, current_user: User, **kwargs):
+            async def call() -> Any:
+                return await func(*args, request=request, response=response, current_user=current_user, **kwargs)
+
+            idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if idempotency_key is None:
+                return await call()
+
+            key_digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+            key = f"{IDEMPOTENCY_PREFIX}:{current_user.id}:{request.url.path}:{key_digest}"
+            request_hash = hashlib.sha256(request.url.query.encode() + b"\n" + await request.body()).hexdigest()
+            stored, backend = await idempotency_store.claim(key, request_hash)
+            if stored is not None:
+                if stored["request_hash"] != request_hash:
+                    raise IdempotencyKeyReused()
+                if stored["state"] == IN_PROGRESS:
+                    raise IdempotencyKeyInProgress()
+                if stored["status_code"] is not None:
+                    raise HTTPException(stored["status_code"], stored["body"], headers={REPLAYED_HEADER: "true"})
+                response.headers[REPLAYED_HEADER] = "true"
+                return stored["body"]
+
+            try:
+                result = await call()
+            except HTTPException as e:
+                # Ошибки клиента детерминированы и сохраняются; временные ошибки и 5xx можно повторить
+                if e.status_code < 500 and e.status_code not in RETRYABLE_STATUS_CODES:
+                    await idempotency_store.complete(
+                        key, backend, request_hash, e.status_code, jsonable_encoder(e.detail)
+                    )
+                else:
+                    await idempotency_store.release(key, backend)
+                raise
+            except BaseException:
+                await idempotency_store.release(key, backend)
+                raise
+
+            body = serialize(result)
+            await idempotency_store.complete(key, backend, request_hash, None, body)
+            return body
+
+        return inner
+
+    return decorator
@@ -1,4 +1,131 @@
+import asyncio
+from functools import lru_cache, wraps
+from ipaddress import ip_address, ip_network
+from typing import Any, Callable, Optional
+
+from fastapi import Request
 from slowapi import Limiter
-from slowapi.util import get_remote_address
+from starlette.concurrency import run_in_threadpool
+
+from config import config
+from database.models import ADMIN_ROLE_ID
+from users.tokens import AUTH_COOKIE_NAME, ROLE_CLAIM, read_token_claims
+
+ANONYMOUS_TIER = "anonymous"
+USER_TIER = "user"
+ADMIN_TIER = "admin"
+
+ROLE_TIERS = {ADMIN_ROLE_ID: ADMIN_TIER}
+
+_trusted_proxies = [ip_network(proxy, strict=False) for proxy in config.TRUSTED_PROXIES]
+
+
+@lru_cache(maxsize=4096)
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_proxies)
+
+
+def client_address(request: Request) -> str:
+    """
+    The client's IP. `X-Forwarded-For` is only believed when the peer is a trusted proxy: the chain is read from
+    the right and the first address that is not a trusted proxy is the client.
+    """
+    peer = request.client.host if request.client else "127.0.0.1"
+    if not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",")]
+    forwarded = [address for address in forwarded if address]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def rate_limit_key(request: Request) -> str:
+    """`user:<id>:<tier>` for a valid auth cookie (no DB access), `ip:<address>:anonymous` otherwise."""
+    claims = read_token_claims(request.cookies.get(AUTH_COOKIE_NAME))
+    if claims and "sub" in claims:
+        tier = ROLE_TIERS.get(claims.get(ROLE_CLAIM), USER_TIER)
+        return f"user:{claims['sub']}:{tier}"
+    return f"ip:{client_address(request)}:{ANONYMOUS_TIER}"
+
+
+class RateLimitTiers:
+    """
+    Per-role quotas for `limiter.limit`, e.g. `limiter.limit(RateLimitTiers("5/minute", admin="100/minute"))`.
+
+    `user` applies to authenticated users; `admin` and `anonymous` default to it.
+    """
+
+    def __init__(self, user: str, admin: Optional[str] = None, anonymous: Optional[str] = None):
+        self.limits = {USER_TIER: user, ADMIN_TIER: admin or user, ANONYMOUS_TIER: anonymous or user}
+
+    def __call__(self, key: str) -> str:
+        # slowapi передаёт сюда результат rate_limit_key
+        return self.limits[key.rsplit(":", 1)[-1]]
+
+
+class ThreadedLimiter(Limiter):
+    """
+    Limiter that checks the limits of async routes in the threadpool.
+
+    slowapi's storage calls are synchronous; made from the endpoint wrapper on the event loop, a slow storage would
+    stall every coroutine of the worker for up to the socket timeout on each limited request.
+    """
+
+    def limit(self, *args: Any, **kwargs: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        decorator = super().limit(*args, **kwargs)
+
+        def threaded(func: Callable[..., Any]) -> Callable[..., Any]:
+            wrapper = decorator(func)
+            # Синхронные эндпоинты FastAPI и так выполняет в пуле потоков
+            if not asyncio.iscoroutinefunction(func):
+                return wrapper
+
+            @wraps(func)
+            async def checked(*args: Any, **kwargs: Any) -> Any:
+                request = kwargs.get("request")
+                if (
+                    self.enabled
+                    and self._auto_check
+                    and isinstance(request, Request)
+                    and not getattr(request.state, "_rate_limiting_complete", False)
+                ):
+                    await run_in_threadpool(self._check_request_limit, request, func, False)
+                    # Обёртка slowapi видит метку и не проверяет лимиты повторно на event loop
+                    request.state._rate_limiting_complete = True
+                return await wrapper(*args, **kwargs)
+
+            return checked
+
+        return threaded
+
+
+def build_limiter(storage_uri: str) -> Limiter:
+    """
+    Limiter whose counters live in `storage_uri`, shared by every worker.
+
+    With the Redis storage each check is one atomic Lua script (moving window by default). While the storage is
+    unreachable slowapi applies the same route limits from per-process memory and probes the storage again
+    with exponential backoff. Checks of async routes run in the threadpool, see ThreadedLimiter.
+    """
+    return ThreadedLimiter(
+        key_func=rate_limit_key,
+        storage_uri=storage_uri,
+        strategy=config.RATE_LIMIT_STRATEGY,
+        # Короткие таймауты: при недоступном Redis запрос быстро уходит в локальный лимитер
+        storage_options={
+            "socket_connect_timeout": config.RATE_LIMIT_STORAGE_TIMEOUT,
+            "socket_timeout": config.RATE_LIMIT_STORAGE_TIMEOUT,
+        },
+        in_memory_fallback_enabled=True,
+        key_prefix="rate-limit",
+    )
+
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = build_limiter(config.RATE_LIMIT_STORAGE_URI or f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}")
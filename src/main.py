@@ -1,7 +1,7 @@
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,32 +9,65 @@ from redis import asyncio as aioredis
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
-from database.database import setup_database, dispose_database_engine
+from assets.autocomplete import asset_autocomplete
+from assets.price_table import asset_prices
+from assets.stream import price_broadcaster
+from database.database import setup_database, dispose_database_engine, replica_enabled, mark_primary_reads
+from http_client import open_http_client, close_http_client
+from idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER
 from limiter import limiter
+from pagination import NEXT_CURSOR_HEADER
+from response_cache import CACHE_PREFIX
 from users.auth import auth_backend, fastapi_users
 from config import config
 from users.schemas import UserRead, UserCreate
 from companies.router import router as companies_router
+from assets.stream_router import router as asset_stream_router
 from assets.router import router as assets_router
 from transactions.router import router as transactions_router
+from transactions.orders_router import router as orders_router
 from balance.router import router as balance_router
 from users.me_router import router as me_router
 from users.router import router as users_router
+from monitoring.router import router as monitoring_router
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     setup_database()
+    open_http_client()
     redis = aioredis.from_url(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}")
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    FastAPICache.init(RedisBackend(redis), prefix=CACHE_PREFIX)
+    if config.ASSET_AUTOCOMPLETE_ENABLED:
+        await asset_autocomplete.start(redis)
+    # Одна подписка на цены на процесс: она обновляет таблицу цен и передаёт изменения в поток цен клиентам
+    price_broadcaster.start(asset_prices)
+    await asset_prices.start(redis)
     yield
+    price_broadcaster.stop()
+    await asset_prices.stop()
+    await asset_autocomplete.stop()
+    await close_http_client()
     await dispose_database_engine()
 
 
 app = FastAPI(title="Invest app", lifespan=lifespan)
+
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+@app.middleware("http")
+async def pin_reads_after_writes(request: Request, call_next):
+    response = await call_next(request)
+    # После успешной записи клиент какое-то время читает с основного сервера, а не с отстающей реплики
+    if replica_enabled() and request.method not in SAFE_METHODS and response.status_code < 400:
+        mark_primary_reads(response)
+    return response
+
+
 origins = ["http://localhost:3000"]
 
 app.add_middleware(
@@ -48,7 +81,9 @@ app.add_middleware(
         "Access-Control-Allow-Headers",
         "Access-Control-Allow-Origin",
         "Authorization",
+        IDEMPOTENCY_HEADER,
     ],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER],
 )
 
 app.include_router(
@@ -79,5 +114,8 @@ app.include_router(me_router)
 app.include_router(balance_router)
 app.include_router(users_router)
 app.include_router(companies_router)
+app.include_router(asset_stream_router)
 app.include_router(assets_router)
 app.include_router(transactions_router)
+app.include_router(orders_router)
+app.include_router(monitoring_router)
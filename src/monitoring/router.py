@@ -0,0 +1,25 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+import response_cache
+from assets.stream import price_broadcaster
+from database.database import pool_stats
+from users.auth import current_user_admin
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/cache")
+async def get_cache_stats(current_user_admin=Depends(current_user_admin)) -> dict[str, dict[str, int]]:
+    return await response_cache.get_stats()
+
+
+@router.get("/database")
+async def get_database_stats(current_user_admin=Depends(current_user_admin)) -> dict[str, dict[str, Any]]:
+    return pool_stats()
+
+
+@router.get("/stream")
+async def get_stream_stats(current_user_admin=Depends(current_user_admin)) -> dict[str, int]:
+    return price_broadcaster.stats()
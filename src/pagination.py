@@ -1,12 +1,81 @@
-from typing import Annotated
+import base64
+import json
+from datetime import datetime
+from typing import Annotated, Any, Sequence, TypeVar
 
-from fastapi import Depends
-from pydantic import BaseModel, Field
+from fastapi import Depends, HTTPException, Response, status
+from pydantic import BaseModel, Field, PrivateAttr
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"status": "error", "data": None, "details": "Invalid pagination cursor"},
+        )
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidCursor()
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+class OffsetPaginator(BaseModel):
+    """Limit/skip paging, for lists without a unique sort key to build a cursor from (e.g. ranked searches)."""
 
-class Paginator(BaseModel):
     limit: int = Field(10, ge=1, le=100, description="Limit of items to return")
     skip: int = Field(0, ge=0, description="Number of items to skip")
 
 
-PaginatorDep = Annotated[Paginator, Depends(Paginator)]
+class Paginator(OffsetPaginator):
+    cursor: str | None = Field(
+        None, description=f"Keyset cursor from the {NEXT_CURSOR_HEADER} header of the previous page, overrides skip"
+    )
+
+    _response: Response | None = PrivateAttr(None)
+    _keys: tuple[InstrumentedAttribute, ...] = PrivateAttr(())
+
+    def apply(self, query: Select, *keys: InstrumentedAttribute, descending: bool = False) -> Select:
+        """Order `query` by the unique `keys` and page it either by cursor or by limit/skip."""
+        self._keys = keys
+        query = query.order_by(*(key.desc() if descending else key for key in keys)).limit(self.limit)
+        if self.cursor is None:
+            return query.offset(self.skip)
+
+        boundary = tuple_(*decode_cursor(self.cursor, keys), types=[key.type for key in keys])
+        return query.where(tuple_(*keys) < boundary if descending else tuple_(*keys) > boundary)
+
+    def page(self, items: Sequence[T]) -> Sequence[T]:
+        """Expose the cursor of the page following `items` in the response headers."""
+        if self._response is not None and self._keys and len(items) == self.limit:
+            last = items[-1]
+            self._response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, key.key) for key in self._keys])
+        return items
+
+
+def get_paginator(response: Response, pagination: Annotated[Paginator, Depends()]) -> Paginator:
+    pagination._response = response
+    return pagination
+
+
+PaginatorDep = Annotated[Paginator, Depends(get_paginator)]
+OffsetPaginatorDep = Annotated[OffsetPaginator, Depends()]
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from finnhub import FinnhubService
+from logger import logger
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("Token bucket rate and capacity must be positive.")
+
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+@dataclass
+class RefreshStats:
+    fetched: int = 0
+    failed: int = 0
+    skipped: int = 0
+    wall_time: float = 0.0
+
+
+class PriceRefresher:
+    def __init__(self, finnhub: FinnhubService, concurrency: int, bucket: TokenBucket):
+        if concurrency < 1:
+            raise ValueError("Refresh concurrency must be at least 1.")
+
+        self._finnhub = finnhub
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = bucket
+        self.stats = RefreshStats()
+
+    async def _fetch_one(self, ticker: str) -> Decimal | None:
+        async with self._semaphore:
+            await self._bucket.acquire()
+            try:
+                price = await self._finnhub.get_asset_price(ticker)
+            except Exception as e:
+                logger.error(f"An error occurred while fetching {ticker}: {e}")
+                self.stats.failed += 1
+                return None
+
+        if price is None:
+            logger.warning(f"Received invalid price for {ticker}. Skipping update.")
+            self.stats.skipped += 1
+        else:
+            self.stats.fetched += 1
+        return price
+
+    async def fetch_prices(self, tickers: dict[int, str]) -> dict[int, Decimal]:
+        """Fetch quotes for `{asset_id: ticker}` and return `{asset_id: price}` for the successful ones."""
+        asset_ids = list(tickers)
+        prices = await asyncio.gather(*(self._fetch_one(tickers[asset_id]) for asset_id in asset_ids))
+        return {asset_id: price for asset_id, price in zip(asset_ids, prices) if price is not None}
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from redis import asyncio as aioredis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from logger import logger
+
+RESUBSCRIBE_DELAY = 1  # Пауза перед повторной подпиской, секунды
+
+
+class SyncedSubscription:
+    """
+    Process-local state loaded from the database and kept current by the messages of a Redis pub/sub channel.
+
+    Subclasses set `channel` and `name` (for the logs) and implement `_load` and `_apply`. The channel is subscribed
+    before the load, so messages published meanwhile wait in the subscription. The state is in sync from the first
+    load until the subscription drops or a message fails to apply, and is reloaded once the channel is back; in
+    between `enabled` is False and callers should read the database instead.
+    """
+
+    channel: str
+    name: str
+
+    def __init__(self):
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._synced = False
+
+    @property
+    def started(self) -> bool:
+        """Whether the subscription runs, in sync or not; changes made meanwhile must still be published."""
+        return self._listener is not None
+
+    @property
+    def enabled(self) -> bool:
+        return self._listener is not None and self._synced
+
+    async def start(self, redis: aioredis.Redis) -> None:
+        self._redis = redis
+        pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _load(self) -> None:
+        raise NotImplementedError
+
+    def _apply(self, message: Any) -> None:
+        raise NotImplementedError
+
+    async def _subscribe(self) -> PubSub:
+        # Сначала подписка, потом загрузка: сообщения, опубликованные во время загрузки, дождутся в подписке
+        pubsub = self._redis.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            await self._load()
+        except BaseException:
+            await pubsub.reset()
+            raise
+        self._synced = True
+        return pubsub
+
+    async def _listen(self, pubsub: PubSub) -> None:
+        try:
+            while True:
+                try:
+                    async with pubsub:
+                        async for message in pubsub.listen():
+                            if message["type"] == "message":
+                                self._apply(json.loads(message["data"]))
+                except RedisError as e:
+                    logger.warning(f"{self.name} subscription lost, reloading: {e}")
+                except Exception as e:
+                    # Сообщение могло примениться частично - состояние перечитывается целиком
+                    logger.error(f"Could not apply a {self.name} message, reloading: {e}")
+                self._synced = False
+
+                # Сообщения, опубликованные без подписки, потеряны - состояние загружается заново
+                pubsub = None
+                while pubsub is None:
+                    await asyncio.sleep(RESUBSCRIBE_DELAY)
+                    try:
+                        pubsub = await self._subscribe()
+                    except Exception as e:
+                        logger.error(f"Could not reload {self.name}: {e}")
+        finally:
+            self._synced = False
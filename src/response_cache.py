@@ -0,0 +1,144 @@
+import json
+from functools import wraps
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.types import Backend
+from pydantic import TypeAdapter
+
+from config import config
+from database.database import reads_pinned_to_primary
+from logger import logger
+from pagination import NEXT_CURSOR_HEADER
+
+CACHE_PREFIX = "fastapi-cache"
+CACHE_STATUS_HEADER = "X-Cache"
+CACHED_HEADERS = (NEXT_CURSOR_HEADER,)
+STATS_KEY = "cache-stats"
+
+
+def _namespace_key(namespace: str) -> str:
+    return f"{CACHE_PREFIX}:{namespace}"
+
+
+def _version_key(namespace: str) -> str:
+    return f"{_namespace_key(namespace)}:version"
+
+
+def _recently_written_key(namespace: str) -> str:
+    return f"{_namespace_key(namespace)}:recently-written"
+
+
+async def _namespace_version(backend: Backend, namespace: str) -> int:
+    try:
+        return int(await backend.get(_version_key(namespace)) or 0)
+    except Exception as e:
+        logger.warning(f"Could not read cache namespace version of {namespace}: {e}")
+        return 0
+
+
+def _get_backend() -> Backend | None:
+    try:
+        return FastAPICache.get_backend()
+    except AssertionError:  # FastAPICache.init was not called, e.g. outside the app lifespan
+        return None
+
+
+async def _count(backend: Backend, namespace: str, outcome: str) -> None:
+    try:
+        await backend.redis.hincrby(STATS_KEY, f"{namespace}:{outcome}", 1)
+    except Exception as e:
+        logger.warning(f"Could not update cache stats: {e}")
+
+
+def cached_route(namespace: str, expire: int, schema: Any):
+    """
+    Cache a GET route's body (and pagination headers) in the FastAPICache backend, keyed by path and query.
+
+    The route must accept `request` and `response`; its result is serialized through `schema`.
+    Entries live for `expire` seconds or until `invalidate(namespace)`, which bumps the namespace version that
+    is part of every key, so the old entries are never read again and simply expire.
+
+    With a read replica, clients pinned to the primary after a write bypass the cache, and for
+    REPLICA_STICKY_SECONDS after an invalidation responses are not stored: they may come from a lagging replica.
+    """
+    adapter = TypeAdapter(schema)
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @wraps(func)
+        async def inner(*args, request: Request, response: Response, **kwargs):
+            backend = _get_backend()
+            if backend is None:
+                return await func(*args, request=request, response=response, **kwargs)
+            if config.POSTGRES_REPLICA_HOST and reads_pinned_to_primary(request):
+                response.headers[CACHE_STATUS_HEADER] = "BYPASS"
+                return await func(*args, request=request, response=response, **kwargs)
+
+            query = "&".join(sorted(request.url.query.split("&")))
+            version = await _namespace_version(backend, namespace)
+            key = f"{_namespace_key(namespace)}:{version}:{request.url.path}?{query}"
+
+            try:
+                cached = await backend.get(key)
+            except Exception as e:
+                logger.warning(f"Could not read cache key {key}: {e}")
+                cached = None
+
+            if cached is not None:
+                await _count(backend, namespace, "hit")
+                payload = json.loads(cached)
+                response.headers.update(payload["headers"])
+                response.headers[CACHE_STATUS_HEADER] = "HIT"
+                return payload["body"]
+
+            result = await func(*args, request=request, response=response, **kwargs)
+            body = adapter.dump_python(adapter.validate_python(result, from_attributes=True), mode="json")
+            headers = {header: response.headers[header] for header in CACHED_HEADERS if header in response.headers}
+            try:
+                if not (config.POSTGRES_REPLICA_HOST and await backend.get(_recently_written_key(namespace))):
+                    await backend.set(key, json.dumps({"body": body, "headers": headers}).encode(), expire)
+            except Exception as e:
+                logger.warning(f"Could not write cache key {key}: {e}")
+            await _count(backend, namespace, "miss")
+            response.headers[CACHE_STATUS_HEADER] = "MISS"
+            return body
+
+        return inner
+
+    return decorator
+
+
+async def invalidate(*namespaces: str, backend: Backend | None = None) -> None:
+    """Drop every cached response in `namespaces`. `backend` defaults to the one FastAPICache was initialized with."""
+    backend = backend or _get_backend()
+    if backend is None:
+        return
+
+    for namespace in namespaces:
+        try:
+            redis = getattr(backend, "redis", None)
+            if redis is not None:
+                await redis.incr(_version_key(namespace))
+            else:
+                # Бэкенд в памяти процесса: между чтением и записью нет переключения задач
+                version = await _namespace_version(backend, namespace)
+                await backend.set(_version_key(namespace), str(version + 1).encode())
+            if config.POSTGRES_REPLICA_HOST:
+                await backend.set(_recently_written_key(namespace), b"1", config.REPLICA_STICKY_SECONDS)
+        except Exception as e:
+            logger.warning(f"Could not invalidate cache namespace {namespace}: {e}")
+
+
+async def get_stats() -> dict[str, dict[str, int]]:
+    """Hit/miss counters per namespace, aggregated over all workers."""
+    backend = _get_backend()
+    if backend is None:
+        return {}
+
+    raw = await backend.redis.hgetall(STATS_KEY)
+    stats: dict[str, dict[str, int]] = {}
+    for field, value in raw.items():
+        namespace, outcome = field.decode().rsplit(":", 1)
+        stats.setdefault(namespace, {"hit": 0, "miss": 0})[outcome] = int(value)
+    return stats
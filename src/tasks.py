@@ -1,23 +1,71 @@
 import asyncio
+import time
+from datetime import datetime, timezone
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
 from sqlalchemy import select
 
 import database
+from assets.history import apply_retention, ensure_partitions, record_prices, roll_up_candles
+from assets.price_table import publish_prices
+from balance.ledger import compact_ledger
+from database.bulk import bulk_update_asset_prices
 from database.database import setup_database, dispose_database_engine, _async_session_maker
 from database.models import Asset
 from config import config
 from finnhub import FinnhubService
+from http_client import open_http_client, get_http_client, close_http_client
+from idempotency import purge_expired_keys
 from logger import logger
+from price_refresh import PriceRefresher, TokenBucket
+from response_cache import invalidate
+from transactions import partitions as transaction_partitions
+from users.portfolio_cache import PortfolioCache
 
 celery = Celery("fastapi_rest", broker="redis://redis:5370/0", backend="redis://redis:5370/0")
 
+# Пул HTTP-соединений привязан к циклу событий, поэтому задачи процесса выполняются в одном долгоживущем цикле
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+@worker_process_init.connect
+def init_worker(**_):
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    open_http_client()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker(**_):
+    if _worker_loop is not None:
+        _worker_loop.run_until_complete(close_http_client())
+        _worker_loop.close()
+
+
+async def _with_http_client(coro):
+    open_http_client()
+    try:
+        return await coro
+    finally:
+        await close_http_client()
+
+
+def run_async(coro):
+    """Run `coro` in the worker's loop; outside a prefork worker (e.g. the solo pool) use a throwaway loop."""
+    if _worker_loop is None:
+        return asyncio.run(_with_http_client(coro))
+    return _worker_loop.run_until_complete(coro)
+
 
 @celery.task
 def update_asset_prices():
     logger.info("Starting asset price update task.")
-    asyncio.run(async_update_prices())
+    run_async(async_update_prices())
 
 
 async def async_update_prices():
@@ -28,27 +76,51 @@ async def async_update_prices():
         logger.error("SessionMaker is None after setup_database. Aborting task.")
         return
 
+    started_at = time.monotonic()
     try:
-        async with FinnhubService(api_key=config.FINNHUB_API_KEY) as finnhub:
-            async with SessionMaker() as db:
-                result = await db.execute(select(Asset))
-                assets = result.scalars().all()
-
-                for asset in assets:
-                    try:
-                        logger.info(f"Updating price for {asset.ticker}...")
-                        new_price = await finnhub.get_asset_price(asset.ticker)
-
-                        if new_price is not None:
-                            asset.price = new_price
-                            logger.info(f"Successfully updated {asset.ticker} price to {new_price}")
-                        else:
-                            logger.warning(f"Received invalid price for {asset.ticker}. Skipping update.")
-                    except Exception as e:
-                        logger.error(f"An error occurred while updating {asset.ticker}: {e}")
+        async with SessionMaker() as db:
+            result = await db.execute(select(Asset.id, Asset.ticker))
+            tickers = dict(result.all())
+
+        recorded_at = datetime.now(timezone.utc).replace(tzinfo=None)
 
+        async with FinnhubService(api_key=config.FINNHUB_API_KEY, client=get_http_client()) as finnhub:
+            bucket = TokenBucket(
+                rate=config.FINNHUB_RATE_LIMIT_PER_MINUTE / 60, capacity=config.FINNHUB_MAX_CONCURRENCY
+            )
+            refresher = PriceRefresher(finnhub, concurrency=config.FINNHUB_MAX_CONCURRENCY, bucket=bucket)
+            prices = await refresher.fetch_prices(tickers)
+
+        if prices:
+            async with SessionMaker() as db:
+                changed = await bulk_update_asset_prices(db, prices)
+                # История пишется вместе с ценами: все полученные цены, а не только изменившиеся
+                await record_prices(db, prices, recorded_at)
                 await db.commit()
-                logger.info("Asset price update task finished successfully.")
+            logger.info(f"{len(changed)} asset prices changed.")
+            redis = aioredis.from_url(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}")
+            try:
+                if changed:
+                    await invalidate("assets", backend=RedisBackend(redis))
+                    # Кэш портфелей работает через клиент задачи: соединения общего клиента привязаны к циклу,
+                    # в котором открыты, а при запуске через asyncio.run цикл у каждой задачи свой
+                    if config.PORTFOLIO_CACHE_ENABLED:
+                        await PortfolioCache(redis, ttl=config.PORTFOLIO_CACHE_TTL).invalidate_all()
+                # Неизменившиеся цены тоже подтверждаются: по времени подтверждения проверяется их свежесть
+                await publish_prices(
+                    redis,
+                    {asset_id: (tickers[asset_id], price) for asset_id, price in changed.items()},
+                    refreshed=prices,
+                )
+            finally:
+                await redis.close()
+
+        refresher.stats.wall_time = time.monotonic() - started_at
+        stats = refresher.stats
+        logger.info(
+            f"Asset price update task finished: fetched={stats.fetched}, failed={stats.failed}, "
+            f"skipped={stats.skipped}, wall_time={stats.wall_time:.2f}s"
+        )
 
     except Exception as e:
         logger.error(f"A critical error occurred in async_update_prices: {e}")
@@ -58,10 +130,130 @@ async def async_update_prices():
         await dispose_database_engine()
 
 
+@celery.task
+def compact_balance_ledger():
+    run_async(async_compact_balance_ledger())
+
+
+async def async_compact_balance_ledger():
+    database.database.setup_database()
+    SessionMaker = database.database._async_session_maker
+
+    try:
+        async with SessionMaker() as db:
+            compacted = await compact_ledger(db)
+        logger.info(f"{compacted} balance ledger entries compacted.")
+
+    except Exception as e:
+        logger.error(f"A critical error occurred in async_compact_balance_ledger: {e}")
+
+    finally:
+        await dispose_database_engine()
+
+
+@celery.task
+def maintain_price_history():
+    run_async(async_maintain_price_history())
+
+
+async def async_maintain_price_history():
+    database.database.setup_database()
+    SessionMaker = database.database._async_session_maker
+
+    try:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        async with SessionMaker() as db:
+            await ensure_partitions(db, now.date(), config.PRICE_HISTORY_PARTITIONS_AHEAD + 1)
+            await db.commit()
+            rolled = await roll_up_candles(db, now)
+            dropped = await apply_retention(
+                db, now, config.PRICE_HISTORY_RAW_RETENTION_DAYS, config.PRICE_HISTORY_HOURLY_RETENTION_DAYS
+            )
+        logger.info(f"{rolled} price candles rolled up, {len(dropped)} price history partitions dropped.")
+
+    except Exception as e:
+        logger.error(f"A critical error occurred in async_maintain_price_history: {e}")
+
+    finally:
+        await dispose_database_engine()
+
+
+@celery.task
+def maintain_transaction_partitions():
+    run_async(async_maintain_transaction_partitions())
+
+
+async def async_maintain_transaction_partitions():
+    database.database.setup_database()
+    SessionMaker = database.database._async_session_maker
+
+    try:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        async with SessionMaker() as db:
+            created = await transaction_partitions.ensure_partitions(db, now, config.TRANSACTION_PARTITIONS_AHEAD)
+            await db.commit()
+            archived = []
+            if config.TRANSACTION_ARCHIVE_AFTER_MONTHS:
+                archived = await transaction_partitions.archive_partitions(
+                    db,
+                    now,
+                    config.TRANSACTION_ARCHIVE_AFTER_MONTHS,
+                    config.TRANSACTION_ARCHIVE_SCHEMA,
+                    lock_timeout=config.TRANSACTION_ARCHIVE_LOCK_TIMEOUT,
+                )
+                await db.commit()
+        logger.info(f"Transaction partitions ensured: {created}, archived: {archived}.")
+
+    except Exception as e:
+        logger.error(f"A critical error occurred in async_maintain_transaction_partitions: {e}")
+
+    finally:
+        await dispose_database_engine()
+
+
+@celery.task
+def purge_idempotency_keys():
+    run_async(async_purge_idempotency_keys())
+
+
+async def async_purge_idempotency_keys():
+    database.database.setup_database()
+    SessionMaker = database.database._async_session_maker
+
+    try:
+        async with SessionMaker() as db:
+            purged = await purge_expired_keys(db)
+        logger.info(f"{purged} expired idempotency keys purged.")
+
+    except Exception as e:
+        logger.error(f"A critical error occurred in async_purge_idempotency_keys: {e}")
+
+    finally:
+        await dispose_database_engine()
+
+
 celery.conf.beat_schedule = {
     "update-prices-every-5-minutes": {
         "task": "tasks.update_asset_prices",
         "schedule": crontab(minute="*/5"),
     },
+    "compact-balance-ledger-every-minute": {
+        "task": "tasks.compact_balance_ledger",
+        "schedule": crontab(minute="*"),
+    },
+    "purge-idempotency-keys-every-hour": {
+        "task": "tasks.purge_idempotency_keys",
+        "schedule": crontab(minute=0),
+    },
+    "maintain-price-history-every-hour": {
+        "task": "tasks.maintain_price_history",
+        # Чуть позже начала часа, чтобы закрытый час успел попасть в историю
+        "schedule": crontab(minute=5),
+    },
+    "maintain-transaction-partitions-every-day": {
+        "task": "tasks.maintain_transaction_partitions",
+        # Ночью: архивация ненадолго блокирует таблицу transaction
+        "schedule": crontab(minute=15, hour=0),
+    },
 }
 celery.conf.timezone = "UTC"
@@ -24,6 +24,14 @@ class AssetNotAvailable(HTTPException):
         )
 
 
+class StalePrice(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"status": "error", "data": None, "details": "Asset price is outdated, try again later"},
+        )
+
+
 class InsufficientFunds(HTTPException):
     def __init__(self):
         super().__init__(
@@ -38,3 +46,15 @@ class InsufficientAssets(HTTPException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"status": "error", "data": None, "details": "You own fewer assets than you are trying to sell."},
         )
+
+
+class BatchOrderRejected(HTTPException):
+    def __init__(self, results: list):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "status": "error",
+                "data": [result.model_dump(mode="json") for result in results],
+                "details": "Batch order rejected, no legs were executed",
+            },
+        )
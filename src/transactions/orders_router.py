@@ -0,0 +1,26 @@
+from fastapi import status, Request, Response, APIRouter, Depends
+
+from idempotency import idempotent
+from limiter import RateLimitTiers, limiter
+from users.auth import current_user
+from transactions.schemas import BatchOrderRequest, OrderLegResult
+from transactions.dependencies import TransactionServiceDep
+from database.models import User
+
+
+router = APIRouter(prefix="/orders", tags=["Order"])
+
+RATE_LIMITS = RateLimitTiers("5/minute")
+
+
+@router.post("/batch", response_model=list[OrderLegResult], status_code=status.HTTP_200_OK)
+@limiter.limit(RATE_LIMITS)
+@idempotent(list[OrderLegResult])
+async def place_batch_order(
+    request: Request,
+    response: Response,
+    order: BatchOrderRequest,
+    service: TransactionServiceDep,
+    current_user: User = Depends(current_user),
+):
+    return await service.execute_batch(order.legs, current_user, order.mode)
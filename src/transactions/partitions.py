@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Transaction
+from database.partitions import archive_partitions_before, create_partition, list_partitions
+
+TRANSACTION_TABLE = Transaction.__tablename__
+DEFAULT_PARTITION = f"{TRANSACTION_TABLE}_default"
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+async def ensure_partitions(session: AsyncSession, now: datetime, months_ahead: int) -> list[str]:
+    """Create the monthly partitions of the transaction table from the current month to `months_ahead` ahead."""
+    # Месяцы до верхней границы существующих секций уже покрыты, в том числе секцией со старыми данными из миграции
+    bounds = [upper for _, upper in await list_partitions(session, TRANSACTION_TABLE) if upper is not None]
+    month = max([month_start(now), *bounds])
+    last = add_months(month_start(now), months_ahead)
+    created = []
+    while month <= last:
+        name = f"{TRANSACTION_TABLE}_{month:%Y%m}"
+        next_month = add_months(month, 1)
+        await create_partition(
+            session, TRANSACTION_TABLE, name, "transaction_datetime", month, next_month, default=DEFAULT_PARTITION
+        )
+        created.append(name)
+        month = next_month
+    return created
+
+
+async def archive_partitions(
+    session: AsyncSession, now: datetime, after_months: int, schema: str, lock_timeout: Optional[float] = None
+) -> list[str]:
+    """
+    Move the partitions of months ended more than `after_months` ago to `schema`.
+
+    Archived trades drop out of the transaction lists and the users' history. The transaction table is locked
+    meanwhile, see `archive_partitions_before`.
+    """
+    return await archive_partitions_before(
+        session, TRANSACTION_TABLE, add_months(month_start(now), -after_months), schema, lock_timeout
+    )
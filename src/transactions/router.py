@@ -1,6 +1,6 @@
 from fastapi import status, Request, APIRouter, Depends
 
-from limiter import limiter
+from limiter import RateLimitTiers, limiter
 from users.auth import current_user_admin
 from transactions.schemas import (
     TransactionResponse,
@@ -14,18 +14,20 @@ from pagination import PaginatorDep
 
 router = APIRouter(prefix="/transactions", tags=["Transaction"])
 
+RATE_LIMITS = RateLimitTiers("5/minute", admin="60/minute")  # Маршруты только для админов
+
 
 @router.get(
     "/", response_model=list[TransactionResponse], status_code=status.HTTP_200_OK
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
 async def get_transactions(
     request: Request,
     pagination: PaginatorDep,
     service: TransactionServiceDep,
     current_user_admin: User = Depends(current_user_admin),
 ):
-    return await service.get_all(pagination.limit, pagination.skip)
+    return await service.get_all(pagination)
 
 
 @router.get(
@@ -33,7 +35,7 @@ async def get_transactions(
     response_model=TransactionResponse,
     status_code=status.HTTP_200_OK,
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
 async def get_specific_transaction(
     request: Request,
     transaction: Transaction = Depends(valid_transaction_id),
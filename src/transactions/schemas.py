@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
 from decimal import Decimal
+from enum import Enum
 
-from pydantic import BaseModel, conint, condecimal, field_validator
+from pydantic import BaseModel, Field, conint, condecimal, field_validator
 
 from database.models import TransactionType
 
@@ -38,3 +39,36 @@ class TransactionResponse(TransactionBase):
     type: TransactionType
     transaction_datetime: datetime
     total_value: Decimal
+
+
+BATCH_ORDER_MAX_LEGS = 100
+
+
+class BatchMode(Enum):
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+
+
+class OrderLeg(BaseModel):
+    asset_id: conint(ge=0)
+    type: TransactionType
+    amount: condecimal(gt=0, max_digits=20, decimal_places=10)
+
+
+class BatchOrderRequest(BaseModel):
+    mode: BatchMode = BatchMode.ALL_OR_NOTHING
+    legs: list[OrderLeg] = Field(min_length=1, max_length=BATCH_ORDER_MAX_LEGS)
+
+
+class OrderLegStatus(Enum):
+    FILLED = "filled"
+    REJECTED = "rejected"
+    ROLLED_BACK = "rolled_back"  # Исполнилась, но откатилась вместе с пакетом
+    SKIPPED = "skipped"  # Не исполнялась: пакет уже отклонён
+
+
+class OrderLegResult(BaseModel):
+    index: int
+    status: OrderLegStatus
+    transaction: TransactionResponse | None = None
+    error: str | None = None
@@ -1,21 +1,41 @@
+import time
 from decimal import Decimal
-from typing import Sequence
+from typing import Awaitable, Callable, Optional, Sequence
 
-from fastapi import Depends
-from sqlalchemy import insert, select
+from fastapi import Depends, HTTPException
+from sqlalchemy import delete, exists, func, insert, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from assets.exceptions import AssetNotFound
+from assets.price_table import asset_prices
+from balance import ledger
+from config import config
 from transactions.exceptions import (
     UserNotFound,
     AssetNotAvailable,
     TransactionNotFound,
     InsufficientFunds,
     InsufficientAssets,
+    BatchOrderRejected,
+    StalePrice,
+)
+from transactions.schemas import (
+    TransactionUpdate,
+    TransactionPatchUpdate,
+    TransactionResponse,
+    OrderLeg,
+    OrderLegResult,
+    OrderLegStatus,
+    BatchMode,
 )
-from transactions.schemas import TransactionUpdate, TransactionPatchUpdate
 from database.database import get_async_session
-from database.models import User, Asset, Transaction, UserAsset, TransactionType
+from pagination import Paginator
+from users.portfolio_cache import portfolio_cache
+from database.models import User, Asset, Transaction, UserAsset, TransactionType, LedgerEntryType, BalanceLedgerEntry
+
+# Строки меняются условными UPDATE в SQL; загруженные в сессию объекты при этом не синхронизируются
+_RAW_UPDATE = {"synchronize_session": False}
 
 
 class TransactionService:
@@ -35,80 +55,198 @@ class TransactionService:
             return asset
         raise AssetNotFound()
 
-    async def create_buy(self, asset: Asset, amount: Decimal, user: User) -> Transaction:
-        if asset.available_count <= 0:
-            raise AssetNotAvailable()
+    async def create_buy(self, asset_id: int, amount: Decimal, user: User) -> Transaction:
+        """
+        Buy `amount` of the asset at its current price in one DB transaction.
 
-        total_value = amount * asset.price
+        Stock is taken by a conditional UPDATE, so concurrent orders cannot oversell the asset, and the price is
+        debited through the balance ledger. The holding is upserted with ON CONFLICT, so concurrent first
+        purchases cannot trip `unique_user_asset`. Locks are always taken in the order asset -> user's debit
+        lock -> holding.
 
-        if user.balance < total_value:
-            raise InsufficientFunds()
+        The price comes from the in-process price table when it is running (see `_quote`), otherwise from the row.
+        """
+        return await self._trade(self._buy, asset_id, amount, user)
 
-        user.balance -= total_value
-        asset.available_count -= amount
+    async def create_sell(self, asset_id: int, amount: Decimal, user: User) -> Transaction:
+        """Sell `amount` of the asset back at its current price; the mirror image of `create_buy`."""
+        return await self._trade(self._sell, asset_id, amount, user)
 
-        stmt = select(UserAsset).filter(UserAsset.user_id == user.id, UserAsset.asset_id == asset.id)
-        user_asset = await self.session.scalar(stmt)
+    async def execute_batch(self, legs: Sequence[OrderLeg], user: User, mode: BatchMode) -> list[OrderLegResult]:
+        """
+        Execute `legs` in the given order inside one DB transaction.
 
-        if user_asset:
-            user_asset.amount += amount
-        else:
-            stmt = insert(UserAsset).values(user_id=user.id, asset_id=asset.id, amount=amount)
-            await self.session.execute(stmt)
+        All referenced assets are locked up front in id order, so two batches touching the same assets cannot
+        deadlock. In ALL_OR_NOTHING mode the first failing leg rolls back the whole batch and raises
+        BatchOrderRejected; in BEST_EFFORT mode each leg runs in a savepoint and failed legs are just reported.
+        """
+        asset_ids = sorted({leg.asset_id for leg in legs})
+        query = select(Asset.id).where(Asset.id.in_(asset_ids)).order_by(Asset.id).with_for_update()
+        found = set((await self.session.scalars(query)).all())
 
-        stmt = (
-            insert(Transaction)
-            .values(
-                amount=amount,
-                asset_id=asset.id,
-                user_id=user.id,
-                total_value=total_value,
-                type=TransactionType.BUY,
+        results = []
+        for index, leg in enumerate(legs):
+            execute = self._buy if leg.type == TransactionType.BUY else self._sell
+            try:
+                if leg.asset_id not in found:
+                    raise AssetNotFound()
+                if mode == BatchMode.ALL_OR_NOTHING:
+                    transaction = await execute(leg.asset_id, leg.amount, user.id)
+                else:
+                    async with self.session.begin_nested():
+                        transaction = await execute(leg.asset_id, leg.amount, user.id)
+            except HTTPException as e:
+                results.append(OrderLegResult(index=index, status=OrderLegStatus.REJECTED, error=e.detail["details"]))
+                if mode == BatchMode.ALL_OR_NOTHING:
+                    await self.session.rollback()
+                    results.extend(
+                        OrderLegResult(index=skipped, status=OrderLegStatus.SKIPPED)
+                        for skipped in range(index + 1, len(legs))
+                    )
+                    for result in results[:index]:
+                        result.status, result.transaction = OrderLegStatus.ROLLED_BACK, None
+                    raise BatchOrderRejected(results)
+                continue
+
+            results.append(
+                OrderLegResult(
+                    index=index,
+                    status=OrderLegStatus.FILLED,
+                    transaction=TransactionResponse.model_validate(transaction, from_attributes=True),
+                )
             )
-            .returning(Transaction)
-        )
-        result = await self.session.execute(stmt)
-        await self.session.merge(user)
-        self.session.add(asset)
+
         await self.session.commit()
-        return result.scalar_one()
+        await portfolio_cache.invalidate(user.id)
+        return results
+
+    async def _trade(
+        self, execute: Callable[[int, Decimal, int], Awaitable[Transaction]], asset_id: int, amount: Decimal, user: User
+    ) -> Transaction:
+        try:
+            transaction = await execute(asset_id, amount, user.id)
+        except HTTPException:
+            await self.session.rollback()
+            raise
+        await self.session.commit()
+        await portfolio_cache.invalidate(user.id)
+        return transaction
+
+    @staticmethod
+    def _quote(asset_id: int) -> Optional[Decimal]:
+        """
+        The asset's price from the price table, or None to use the price stored in the row.
 
-    async def create_sell(self, asset: Asset, amount: Decimal, user: User):
-        stmt = select(UserAsset).filter(UserAsset.user_id == user.id, UserAsset.asset_id == asset.id)
-        user_asset = await self.session.scalar(stmt)
-        if not user_asset or user_asset.amount < amount:
+        Raises StalePrice if the price was last confirmed more than PRICE_MAX_AGE seconds ago.
+        """
+        quote = asset_prices.table.get(asset_id) if asset_prices.enabled else None
+        if quote is None:
+            return None
+        if config.PRICE_MAX_AGE and time.time() - quote.updated_at > config.PRICE_MAX_AGE:
+            raise StalePrice()
+        return quote.price
+
+    async def _buy(self, asset_id: int, amount: Decimal, user_id: int) -> Transaction:
+        quoted = self._quote(asset_id)
+        stmt = (
+            update(Asset)
+            .where(Asset.id == asset_id, Asset.available_count >= amount)
+            .values(available_count=Asset.available_count - amount)
+            .returning(Asset.price)
+        )
+        reserved = (await self.session.execute(stmt, execution_options=_RAW_UPDATE)).one_or_none()
+        if reserved is None:
+            if await self.session.scalar(select(exists().where(Asset.id == asset_id))):
+                raise AssetNotAvailable()
+            raise AssetNotFound()
+
+        price = reserved.price if quoted is None else quoted
+        total_value = amount * price
+        transaction = await self._record(TransactionType.BUY, asset_id, user_id, amount, total_value)
+        if await ledger.debit(self.session, user_id, LedgerEntryType.BUY, total_value, transaction.id) is None:
+            raise InsufficientFunds()
+
+        stmt = pg_insert(UserAsset).values(user_id=user_id, asset_id=asset_id, amount=amount, cost_basis=total_value)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserAsset.user_id, UserAsset.asset_id],
+            set_={
+                "amount": UserAsset.amount + stmt.excluded.amount,
+                "cost_basis": UserAsset.cost_basis + stmt.excluded.cost_basis,
+            },
+        )
+        await self.session.execute(stmt)
+        return transaction
+
+    async def _sell(self, asset_id: int, amount: Decimal, user_id: int) -> Transaction:
+        quoted = self._quote(asset_id)
+        stmt = (
+            update(Asset)
+            .where(Asset.id == asset_id)
+            .values(available_count=Asset.available_count + amount)
+            .returning(Asset.price)
+        )
+        returned = (await self.session.execute(stmt, execution_options=_RAW_UPDATE)).one_or_none()
+        if returned is None:
+            raise AssetNotFound()
+
+        if not await self._take_holding(user_id, asset_id, amount):
             raise InsufficientAssets()
 
-        total_value = amount * asset.price
-        user.balance += total_value
-        asset.available_count += amount
+        price = returned.price if quoted is None else quoted
+        total_value = amount * price
+        transaction = await self._record(TransactionType.SELL, asset_id, user_id, amount, total_value)
+        await ledger.credit(self.session, user_id, LedgerEntryType.SELL, total_value, transaction.id)
+        return transaction
 
-        if amount == user_asset.amount:
-            await self.session.delete(user_asset)
-        else:
-            user_asset.amount -= amount
+    async def _take_holding(self, user_id: int, asset_id: int, amount: Decimal) -> bool:
+        """
+        Decrement the holding by `amount`, deleting it when it reaches zero, in one statement.
 
+        The two CTEs' conditions are mutually exclusive, so at most one of them touches the row.
+        Returns False if the user holds less than `amount`.
+        """
+        holding = (UserAsset.user_id == user_id, UserAsset.asset_id == asset_id)
+        sold_out = (
+            delete(UserAsset)
+            .where(*holding, UserAsset.amount == amount)
+            .returning(UserAsset.id)
+            .cte("sold_out")
+        )
+        decremented = (
+            update(UserAsset)
+            .where(*holding, UserAsset.amount > amount)
+            # Справа старые значения строки: списывается доля себестоимости, равная доле проданного
+            .values(
+                amount=UserAsset.amount - amount,
+                cost_basis=func.round(UserAsset.cost_basis - UserAsset.cost_basis * amount / UserAsset.amount, 10),
+            )
+            .returning(UserAsset.id)
+            .cte("decremented")
+        )
+        result = await self.session.execute(union_all(select(sold_out.c.id), select(decremented.c.id)))
+        return result.first() is not None
+
+    async def _record(
+        self, transaction_type: TransactionType, asset_id: int, user_id: int, amount: Decimal, total_value: Decimal
+    ) -> Transaction:
         stmt = (
             insert(Transaction)
             .values(
                 amount=amount,
-                asset_id=asset.id,
-                user_id=user.id,
+                asset_id=asset_id,
+                user_id=user_id,
                 total_value=total_value,
-                type=TransactionType.SELL,
+                type=transaction_type,
             )
             .returning(Transaction)
         )
         result = await self.session.execute(stmt)
-        await self.session.merge(user)
-        self.session.add(asset)
-        await self.session.commit()
         return result.scalar_one()
 
-    async def get_all(self, limit: int, skip: int) -> Sequence[Transaction]:
-        query = select(Transaction).limit(limit).offset(skip)
+    async def get_all(self, pagination: Paginator) -> Sequence[Transaction]:
+        query = pagination.apply(select(Transaction), Transaction.transaction_datetime, Transaction.id, descending=True)
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return pagination.page(result.scalars().all())
 
     async def get_by_id(self, transaction_id: int) -> Transaction:
         query = select(Transaction).where(Transaction.id == transaction_id)
@@ -121,10 +259,12 @@ class TransactionService:
     async def update_full(self, transaction: Transaction, updated_transaction: TransactionUpdate) -> Transaction:
         await self.valid_user_id(transaction.user_id)
         await self.valid_asset_id(transaction.asset_id)
+        previous_user_id = transaction.user_id
         for key, value in updated_transaction.model_dump(exclude_unset=True).items():
             setattr(transaction, key, value)
         merged_transaction = await self.session.merge(transaction)
         await self.session.commit()
+        await self._invalidate_portfolios(previous_user_id, merged_transaction.user_id)
         return merged_transaction
 
     async def update_partial(self, transaction: Transaction, transaction_data: TransactionPatchUpdate) -> Transaction:
@@ -133,12 +273,28 @@ class TransactionService:
             await self.valid_user_id(update_data["user_id"])
         if "asset_id" in update_data:
             await self.valid_asset_id(update_data["asset_id"])
+        previous_user_id = transaction.user_id
         for key, value in update_data.items():
             setattr(transaction, key, value)
         self.session.add(transaction)
         await self.session.commit()
+        await self._invalidate_portfolios(previous_user_id, transaction.user_id)
         return transaction
 
     async def delete(self, transaction: Transaction) -> None:
+        # Внешнего ключа на секционированную таблицу нет, ссылки журнала обнуляются здесь
+        await self.session.execute(
+            update(BalanceLedgerEntry)
+            .where(BalanceLedgerEntry.transaction_id == transaction.id)
+            .values(transaction_id=None),
+            execution_options=_RAW_UPDATE,
+        )
+        user_id = transaction.user_id
         await self.session.delete(transaction)
         await self.session.commit()
+        await portfolio_cache.invalidate(user_id)
+
+    @staticmethod
+    async def _invalidate_portfolios(*user_ids: int) -> None:
+        for user_id in set(user_ids):
+            await portfolio_cache.invalidate(user_id)
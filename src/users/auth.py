@@ -1,17 +1,57 @@
+from typing import Optional
+
+import jwt
 from fastapi import Depends, HTTPException
 from fastapi import status
-from fastapi_users import FastAPIUsers
+from fastapi_users import FastAPIUsers, BaseUserManager, exceptions
 from fastapi_users.authentication import CookieTransport, JWTStrategy, AuthenticationBackend
+from fastapi_users.jwt import decode_jwt, generate_jwt
 
+from .cache import user_cache
 from .manager import get_user_manager
+from .tokens import AUTH_COOKIE_NAME, ROLE_CLAIM, TOKEN_ALGORITHM, TOKEN_AUDIENCE
 from database.models import User, ADMIN_ROLE_ID
 from config import config
 
-cookie_transport = CookieTransport(cookie_name="invest-app", cookie_max_age=3600)
+cookie_transport = CookieTransport(cookie_name=AUTH_COOKIE_NAME, cookie_max_age=3600)
+
+
+class CachedJWTStrategy(JWTStrategy[User, int]):
+    """
+    JWTStrategy that resolves the token's user through user_cache before hitting the database.
+
+    Tokens also carry the user's role, so the rate limiter can pick a quota tier without a lookup.
+    """
+
+    async def write_token(self, user: User) -> str:
+        data = {"sub": str(user.id), "aud": self.token_audience, ROLE_CLAIM: user.role_id}
+        return generate_jwt(data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+    async def read_token(self, token: Optional[str], user_manager: BaseUserManager[User, int]) -> Optional[User]:
+        if token is None or not user_cache.enabled:
+            return await super().read_token(token, user_manager)
+
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            user_id = user_manager.parse_id(data["sub"])
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            return None
+
+        if user := await user_cache.get(user_id, token):
+            return user
+
+        try:
+            user = await user_manager.get(user_id)
+        except exceptions.UserNotExists:
+            return None
+        await user_cache.set(token, user)
+        return user
 
 
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=config.SECRET, lifetime_seconds=3600)
+    return CachedJWTStrategy(
+        secret=config.SECRET, lifetime_seconds=3600, token_audience=TOKEN_AUDIENCE, algorithm=TOKEN_ALGORITHM
+    )
 
 
 auth_backend = AuthenticationBackend(name="jwt", transport=cookie_transport, get_strategy=get_jwt_strategy)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import config
+from database.models import Role, User
+from logger import logger
+
+USER_CACHE_PREFIX = "user-cache"
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _dump_user(user: User) -> dict[str, Any]:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "hashed_password": user.hashed_password,
+        "role_id": user.role_id,
+        "created_at": user.created_at.isoformat(),
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+        "is_verified": user.is_verified,
+        "balance": str(user.balance),
+        "role": {"id": user.role.id, "name": user.role.name, "permissions": user.role.permissions},
+    }
+
+
+def _load_user(data: dict[str, Any]) -> User:
+    """Build a detached User, so it can be merged into a request session like a freshly loaded one."""
+    data = dict(data)
+    role = Role(**data.pop("role"))
+    make_transient_to_detached(role)
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    data["balance"] = Decimal(data["balance"])
+    user = User(**data, role=role)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """
+    Two-tier (in-process LRU, then Redis) cache of authenticated users keyed by user id and token.
+
+    Other workers' in-process entries are not invalidated, so they may stay stale for up to `ttl` seconds.
+    """
+
+    def __init__(self, redis: Optional[aioredis.Redis], ttl: int, max_size: int):
+        self._redis = redis
+        self._ttl = ttl
+        self._max_size = max_size
+        self._local: OrderedDict[tuple[int, str], tuple[float, dict[str, Any]]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    async def get(self, user_id: int, token: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+
+        key = (user_id, _token_digest(token))
+        if entry := self._local.get(key):
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return _load_user(data)
+            del self._local[key]
+
+        try:
+            raw = await self._redis.hget(f"{USER_CACHE_PREFIX}:{user_id}", key[1])
+        except RedisError as e:
+            logger.warning(f"User cache lookup failed: {e}")
+            return None
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        self._set_local(key, data)
+        return _load_user(data)
+
+    async def set(self, token: str, user: User) -> None:
+        if not self.enabled:
+            return
+
+        key = (user.id, _token_digest(token))
+        data = _dump_user(user)
+        self._set_local(key, data)
+        try:
+            redis_key = f"{USER_CACHE_PREFIX}:{user.id}"
+            pipe = self._redis.pipeline(transaction=False)
+            await pipe.hset(redis_key, key[1], json.dumps(data)).expire(redis_key, self._ttl).execute()
+        except RedisError as e:
+            logger.warning(f"User cache write failed: {e}")
+
+    async def invalidate(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+
+        for key in [key for key in self._local if key[0] == user_id]:
+            del self._local[key]
+        try:
+            await self._redis.delete(f"{USER_CACHE_PREFIX}:{user_id}")
+        except RedisError as e:
+            logger.warning(f"User cache invalidation failed for user {user_id}: {e}")
+
+    def _set_local(self, key: tuple[int, str], data: dict[str, Any]) -> None:
+        self._local[key] = (time.monotonic() + self._ttl, data)
+        self._local.move_to_end(key)
+        while len(self._local) > self._max_size:
+            self._local.popitem(last=False)
+
+
+user_cache = UserCache(
+    redis=aioredis.from_url(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}") if config.USER_CACHE_ENABLED else None,
+    ttl=config.USER_CACHE_TTL,
+    max_size=config.USER_CACHE_MAX_SIZE,
+)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import Depends, Request
 from fastapi_users import BaseUserManager, IntegerIDMixin, schemas, models, exceptions
@@ -11,6 +11,7 @@ from config import config
 from logger import logger
 from mail import create_message, mail
 from database.models import User, USER_ROLE_ID
+from users.cache import user_cache
 from users.utils import get_user_db
 from database.database import get_async_session
 
@@ -34,8 +35,12 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             stmt = update(User).where(User.id == 1).values(role_id=2, is_superuser=True)
             await self.session.execute(stmt)
             await self.session.commit()
+            await user_cache.invalidate(user.id)
             logger.debug("Added admin")
 
+    async def on_after_update(self, user: User, update_dict: dict[str, Any], request: Optional[Request] = None):
+        await user_cache.invalidate(user.id)
+
     async def on_after_request_verify(self, user: User, token: str, request: Optional[Request] = None) -> None:
         logger.debug(f"Verification requested for users {user.id}. Verification token: {token}")
         html = f"<h1>Confirm your email</h1>Temporary token: <b>{token}</b>"
@@ -43,6 +48,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
         await mail.send_message(message)
 
     async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        await user_cache.invalidate(user.id)
         logger.debug(f"User {user.id} has been verified")
 
     async def on_after_forgot_password(self, user: User, token: str, request: Optional[Request] = None) -> None:
@@ -52,8 +58,12 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
         await mail.send_message(message)
 
     async def on_after_reset_password(self, user: User, request: Optional[Request] = None) -> None:
+        await user_cache.invalidate(user.id)
         logger.debug(f"User {user.id} have reset their password")
 
+    async def on_after_delete(self, user: User, request: Optional[Request] = None) -> None:
+        await user_cache.invalidate(user.id)
+
     async def create(
         self,
         user_create: schemas.UC,
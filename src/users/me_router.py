@@ -1,25 +1,28 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from fastapi import status
 
 from assets.schemas import UserAssetResponse
+from balance.dependencies import BalanceServiceDep
 from database.models import User
 
 from transactions.schemas import TransactionResponse
 from users.auth import current_user
 from pagination import PaginatorDep
+from response_cache import CACHE_STATUS_HEADER
 from users.dependencies import UserServiceDep
-from users.schemas import UserRead
+from users.portfolio_cache import portfolio_cache
+from users.schemas import UserRead, PortfolioResponse
 
 router = APIRouter(prefix="/me", tags=["Current user"])
 
 
 @router.get("/")
-def get_current_user(user: User = Depends(current_user)):
+async def get_current_user(balance_service: BalanceServiceDep, user: User = Depends(current_user)):
     return UserRead(
         id=user.id,
         email=user.email,
         username=user.username,
-        balance=user.balance,
+        balance=await balance_service.get_balance(user.id),
         role_id=user.role_id,
         is_active=user.is_active,
         is_superuser=user.is_superuser,
@@ -33,7 +36,7 @@ async def get_assets(
     service: UserServiceDep,
     current_user: User = Depends(current_user),
 ):
-    return await service.get_assets(pagination.limit, pagination.skip, current_user.id)
+    return await service.get_assets(pagination, current_user.id)
 
 
 @router.get("/transactions", response_model=list[TransactionResponse], status_code=status.HTTP_200_OK)
@@ -42,4 +45,12 @@ async def get_transactions(
     service: UserServiceDep,
     current_user: User = Depends(current_user),
 ):
-    return await service.get_transactions(pagination.limit, pagination.skip, current_user.id)
+    return await service.get_transactions(pagination, current_user.id)
+
+
+@router.get("/portfolio", response_model=PortfolioResponse, status_code=status.HTTP_200_OK)
+async def get_portfolio(response: Response, service: UserServiceDep, current_user: User = Depends(current_user)):
+    portfolio, hit = await portfolio_cache.get_or_load(current_user.id, lambda: service.get_portfolio(current_user.id))
+    if portfolio_cache.enabled:
+        response.headers[CACHE_STATUS_HEADER] = "HIT" if hit else "MISS"
+    return portfolio
@@ -0,0 +1,81 @@
+from typing import Awaitable, Callable, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from config import config
+from logger import logger
+from users.schemas import PortfolioResponse
+
+PORTFOLIO_CACHE_PREFIX = "portfolio"
+GENERATION_KEY = f"{PORTFOLIO_CACHE_PREFIX}:generation"
+USER_GENERATIONS_KEY = f"{PORTFOLIO_CACHE_PREFIX}:user-generations"
+
+
+class PortfolioCache:
+    """
+    Redis cache of `GET /me/portfolio` per user.
+
+    Keys carry two generation counters: a global one, bumped when prices change, and one per user, bumped by the
+    user's trades. Invalidation is a single INCR - no key scans - and a portfolio computed before it is written
+    under the old generation, so it can never be served afterwards. Entries of old generations expire after `ttl`.
+    """
+
+    def __init__(self, redis: Optional[aioredis.Redis], ttl: int):
+        self._redis = redis
+        self._ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    async def get_or_load(
+        self, user_id: int, load: Callable[[], Awaitable[PortfolioResponse]]
+    ) -> tuple[PortfolioResponse, bool]:
+        """The cached portfolio or, on a miss, `load()`'s result, which is then cached. Returns `(portfolio, hit)`."""
+        if not self.enabled:
+            return await load(), False
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            generation, user_generation = await pipe.get(GENERATION_KEY).hget(USER_GENERATIONS_KEY, user_id).execute()
+            key = f"{PORTFOLIO_CACHE_PREFIX}:{int(generation or 0)}:{user_id}:{int(user_generation or 0)}"
+            raw = await self._redis.get(key)
+        except RedisError as e:
+            logger.warning(f"Portfolio cache lookup failed: {e}")
+            return await load(), False
+        if raw is not None:
+            return PortfolioResponse.model_validate_json(raw), True
+
+        portfolio = await load()
+        try:
+            await self._redis.set(key, portfolio.model_dump_json(), ex=self._ttl)
+        except RedisError as e:
+            logger.warning(f"Portfolio cache write failed: {e}")
+        return portfolio, False
+
+    async def invalidate(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._redis.hincrby(USER_GENERATIONS_KEY, user_id, 1)
+        except RedisError as e:
+            logger.warning(f"Portfolio cache invalidation failed for user {user_id}: {e}")
+
+    async def invalidate_all(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._redis.incr(GENERATION_KEY)
+        except RedisError as e:
+            logger.warning(f"Portfolio cache invalidation failed: {e}")
+
+
+portfolio_cache = PortfolioCache(
+    redis=(
+        aioredis.from_url(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}")
+        if config.PORTFOLIO_CACHE_ENABLED
+        else None
+    ),
+    ttl=config.PORTFOLIO_CACHE_TTL,
+)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, status, Request
 
 from assets.schemas import AssetResponse
-from limiter import limiter
+from limiter import RateLimitTiers, limiter
 from pagination import PaginatorDep
 from transactions.schemas import TransactionResponse
 from users.auth import current_user_admin
@@ -9,13 +9,15 @@ from users.dependencies import UserServiceDep
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+RATE_LIMITS = RateLimitTiers("5/minute", admin="60/minute")  # Маршруты только для админов
+
 
 @router.get(
     "/{user_id}/assets",
     response_model=list[AssetResponse],
     status_code=status.HTTP_200_OK,
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
 async def get_assets(
     request: Request,
     pagination: PaginatorDep,
@@ -23,7 +25,7 @@ async def get_assets(
     user_id: int,
     current_user_admin=Depends(current_user_admin),
 ):
-    return await service.get_assets(pagination.limit, pagination.skip, user_id)
+    return await service.get_assets(pagination, user_id)
 
 
 @router.get(
@@ -31,7 +33,7 @@ async def get_assets(
     response_model=list[TransactionResponse],
     status_code=status.HTTP_200_OK,
 )
-@limiter.limit("5/minute")
+@limiter.limit(RATE_LIMITS)
 async def get_transactions(
     request: Request,
     pagination: PaginatorDep,
@@ -39,4 +41,4 @@ async def get_transactions(
     user_id: int,
     current_user_admin=Depends(current_user_admin),
 ):
-    return await service.get_transactions(pagination.limit, pagination.skip, user_id)
+    return await service.get_transactions(pagination, user_id)
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from fastapi_users import schemas
+from pydantic import BaseModel
 
 
 class UserRead(schemas.BaseUser[int]):
@@ -13,3 +14,20 @@ class UserCreate(schemas.BaseUserCreate):
     username: str
     role_id: int
 
+
+class PortfolioHolding(BaseModel):
+    asset_id: int
+    ticker: str
+    name: str
+    amount: Decimal
+    price: Decimal
+    market_value: Decimal
+    cost_basis: Decimal  # Количество по средней цене покупки
+    unrealized_pnl: Decimal
+
+
+class PortfolioResponse(BaseModel):
+    holdings: list[PortfolioHolding]
+    market_value: Decimal
+    cost_basis: Decimal
+    unrealized_pnl: Decimal
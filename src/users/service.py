@@ -1,23 +1,75 @@
+from decimal import Decimal
 from typing import Sequence
 
 from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_async_session
-from database.models import Transaction, UserAsset
+from assets.price_table import asset_prices
+from database.database import get_read_session
+from database.models import Asset, Transaction, UserAsset
+from pagination import Paginator
+from users.schemas import PortfolioHolding, PortfolioResponse
 
 
 class UserService:
-    def __init__(self, session: AsyncSession = Depends(get_async_session)):
+    """Read-only listings, served from the read replica when one is configured."""
+
+    def __init__(self, session: AsyncSession = Depends(get_read_session)):
         self.session = session
 
-    async def get_transactions(self, limit: int, skip: int, user_id: int) -> Sequence[Transaction]:
-        query = select(Transaction).limit(limit).offset(skip).where(Transaction.user_id == user_id)
+    async def get_transactions(self, pagination: Paginator, user_id: int) -> Sequence[Transaction]:
+        query = pagination.apply(
+            select(Transaction).where(Transaction.user_id == user_id),
+            Transaction.transaction_datetime,
+            Transaction.id,
+            descending=True,
+        )
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return pagination.page(result.scalars().all())
 
-    async def get_assets(self, limit: int, skip: int, user_id: int) -> Sequence[UserAsset]:
-        query = select(UserAsset).limit(limit).offset(skip).where(UserAsset.user_id == user_id)
+    async def get_assets(self, pagination: Paginator, user_id: int) -> Sequence[UserAsset]:
+        query = pagination.apply(select(UserAsset).where(UserAsset.user_id == user_id), UserAsset.id)
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return pagination.page(result.scalars().all())
+
+    async def get_portfolio(self, user_id: int) -> PortfolioResponse:
+        """
+        Market value, cost basis and unrealized P&L of every holding, in one query.
+
+        Cost basis is the holding's average cost, kept on user_asset by the trades (see TransactionService).
+        Prices come from the in-process price table when it is running, like the trade path's.
+        """
+        query = (
+            select(UserAsset.asset_id, Asset.ticker, Asset.name, UserAsset.amount, Asset.price, UserAsset.cost_basis)
+            .join(Asset, Asset.id == UserAsset.asset_id)
+            .where(UserAsset.user_id == user_id)
+            .order_by(UserAsset.asset_id)
+        )
+        result = await self.session.execute(query)
+
+        holdings = []
+        for row in result:
+            quote = asset_prices.table.get(row.asset_id) if asset_prices.enabled else None
+            price = row.price if quote is None else quote.price
+            market_value = row.amount * price
+            holdings.append(
+                PortfolioHolding(
+                    asset_id=row.asset_id,
+                    ticker=row.ticker,
+                    name=row.name,
+                    amount=row.amount,
+                    price=price,
+                    market_value=market_value,
+                    cost_basis=row.cost_basis,
+                    unrealized_pnl=market_value - row.cost_basis,
+                )
+            )
+        market_value = sum((holding.market_value for holding in holdings), Decimal(0))
+        cost_basis = sum((holding.cost_basis for holding in holdings), Decimal(0))
+        return PortfolioResponse(
+            holdings=holdings,
+            market_value=market_value,
+            cost_basis=cost_basis,
+            unrealized_pnl=market_value - cost_basis,
+        )
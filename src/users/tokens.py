@@ -0,0 +1,21 @@
+from typing import Any, Optional
+
+import jwt
+from fastapi_users.jwt import decode_jwt
+
+from config import config
+
+AUTH_COOKIE_NAME = "invest-app"
+TOKEN_AUDIENCE = ["fastapi-users:auth"]
+TOKEN_ALGORITHM = "HS256"
+ROLE_CLAIM = "role_id"
+
+
+def read_token_claims(token: Optional[str]) -> Optional[dict[str, Any]]:
+    """Claims of a valid auth token, or None. Only checks the signature, expiry and audience - no DB access."""
+    if not token:
+        return None
+    try:
+        return decode_jwt(token, config.SECRET, TOKEN_AUDIENCE, algorithms=[TOKEN_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from fastapi import Depends, params
 from httpx import AsyncClient, ASGITransport
 from pytest_asyncio import is_async_test
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from users.auth import current_user_admin, current_user
@@ -40,6 +41,7 @@ app.dependency_overrides[get_async_session] = override_get_async_session
 @pytest.fixture(autouse=True, scope="session")
 async def prepare_database():
     async with engine_test.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(metadata.create_all)
     yield
     async with engine_test.begin() as conn:
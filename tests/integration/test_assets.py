@@ -6,7 +6,11 @@ from httpx import AsyncClient
 
 from fastapi import status
 
+from assets.service import AssetService
+from database.models import Asset, Company
+from pagination import NEXT_CURSOR_HEADER, Paginator
 from utils import DecimalEncoder
+from conftest import async_session_maker
 
 
 @pytest.mark.dependency()
@@ -93,6 +97,16 @@ async def test_search_assets(admin_client: AsyncClient):
     assert response.json()[0]["name"] == "Test Asset"
 
 
+@pytest.mark.dependency(depends=["test_create_asset"])
+async def test_search_assets_pages_by_offset(admin_client: AsyncClient):
+    first = await admin_client.get("/assets/search/", params={"search_query": "test asset", "limit": 1})
+    assert first.status_code == status.HTTP_200_OK
+    assert NEXT_CURSOR_HEADER not in first.headers
+
+    rest = await admin_client.get("/assets/search/", params={"search_query": "test asset", "limit": 100, "skip": 1})
+    assert first.json()[0]["id"] not in [asset["id"] for asset in rest.json()]
+
+
 @pytest.mark.dependency(depends=["test_create_asset"])
 async def test_update_asset(admin_client: AsyncClient):
     updated_data = {
@@ -131,3 +145,23 @@ async def test_delete_asset(admin_client: AsyncClient):
 async def test_delete_nonexistent_asset(admin_client: AsyncClient):
     response = await admin_client.delete("/assets/999")
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_company_assets_paginated_in_sql():
+    async with async_session_maker() as session:
+        company = Company(name="Many Assets Inc")
+        session.add(company)
+        await session.flush()
+        session.add_all(
+            Asset(name=f"Asset {i}", company_id=company.id, listed_year=2020, ticker=f"MANY{i}", price=Decimal("1"))
+            for i in range(10)
+        )
+        await session.commit()
+        company_id = company.id
+
+    async with async_session_maker() as session:
+        assets = await AssetService(session, session).get_all(Paginator(limit=3, skip=2), company_id)
+
+        loaded_assets = [obj for obj in session.identity_map.values() if isinstance(obj, Asset)]
+        assert len(assets) == len(loaded_assets) == 3
+        assert [asset.ticker for asset in assets] == ["MANY2", "MANY3", "MANY4"]
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from database.bulk import bulk_update_asset_prices
+from database.models import Asset, Company
+
+
+async def test_bulk_update_asset_prices(session_fixture):
+    async with session_fixture as session:
+        company = Company(name="Bulk Prices Inc")
+        session.add(company)
+        await session.flush()
+        assets = [
+            Asset(
+                name=f"Bulk asset {i}",
+                company_id=company.id,
+                listed_year=2020,
+                ticker=f"BULK{i}",
+                available_count=10,
+                price=Decimal("10.00"),
+            )
+            for i in range(3)
+        ]
+        session.add_all(assets)
+        await session.commit()
+
+        prices = {assets[0].id: Decimal("11.50"), assets[1].id: Decimal("10.00"), assets[2].id: Decimal("9.25")}
+        updated = await bulk_update_asset_prices(session, prices, chunk_size=2)
+        await session.commit()
+
+        assert updated == {assets[0].id: Decimal("11.50"), assets[2].id: Decimal("9.25")}
+
+        result = await session.execute(
+            select(Asset.id, Asset.price).where(Asset.id.in_(prices)).execution_options(populate_existing=True)
+        )
+        assert dict(result.all()) == prices
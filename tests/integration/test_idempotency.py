@@ -0,0 +1,40 @@
+import pytest
+from redis import asyncio as aioredis
+
+from config import config
+from idempotency import COMPLETED, IN_PROGRESS, IdempotencyStore
+from conftest import override_get_async_session
+
+
+@pytest.fixture(params=["redis", "postgres"])
+def store(request) -> IdempotencyStore:
+    # Недоступный Redis переводит хранилище на запасную таблицу в Postgres
+    port = config.REDIS_PORT if request.param == "redis" else 1
+    return IdempotencyStore(
+        redis=aioredis.from_url(f"redis://{config.REDIS_HOST}:{port}"),
+        ttl=60,
+        lock_ttl=60,
+        session_factory=override_get_async_session,
+    )
+
+
+async def test_claim_complete_and_replay(store: IdempotencyStore, request):
+    key = f"idempotency:test:{request.node.callspec.id}"
+
+    stored, backend = await store.claim(key, "hash")
+    assert (stored, backend) == (None, request.node.callspec.id)
+    assert (await store.claim(key, "hash"))[0]["state"] == IN_PROGRESS
+
+    await store.complete(key, backend, "hash", None, {"new_balance": "10"})
+    stored, _ = await store.claim(key, "hash")
+    assert stored["state"] == COMPLETED
+    assert stored["body"] == {"new_balance": "10"}
+
+
+async def test_release_lets_retry_run(store: IdempotencyStore, request):
+    key = f"idempotency:release:{request.node.callspec.id}"
+
+    stored, backend = await store.claim(key, "hash")
+    assert stored is None
+    await store.release(key, backend)
+    assert (await store.claim(key, "hash"))[0] is None
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from balance.ledger import compact_ledger, credit, current_balance, debit
+from database.models import BalanceLedgerEntry, LedgerEntryType, User
+from conftest import async_session_maker
+
+
+async def test_compaction_moves_tail_into_checkpoint():
+    async with async_session_maker() as session:
+        user = User(username="ledger", email="ledger@test.com", hashed_password="test", role_id=1, balance=Decimal(10))
+        session.add(user)
+        await session.commit()
+
+        await credit(session, user.id, LedgerEntryType.TOP_UP, Decimal(5))
+        assert await debit(session, user.id, LedgerEntryType.BUY, Decimal(12)) == Decimal(3)
+        assert await debit(session, user.id, LedgerEntryType.BUY, Decimal(4)) is None
+        await session.commit()
+        assert await current_balance(session, user.id) == Decimal(3)
+
+        assert await compact_ledger(session, batch_size=1) >= 2
+
+        assert await current_balance(session, user.id) == Decimal(3)
+        assert await session.scalar(select(User.balance).where(User.id == user.id)) == Decimal(3)
+        history = select(func.count()).where(BalanceLedgerEntry.user_id == user.id)
+        assert await session.scalar(history) == 2
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+import pytest
+
+from balance.ledger import current_balance
+from database.models import Asset, Company, TransactionType, User
+from transactions.exceptions import BatchOrderRejected
+from transactions.schemas import BatchMode, OrderLeg, OrderLegStatus
+from transactions.service import TransactionService
+from conftest import async_session_maker
+
+
+async def portfolio(name: str) -> tuple[User, list[Asset]]:
+    async with async_session_maker() as session:
+        company = Company(name=f"{name} Inc")
+        session.add(company)
+        await session.flush()
+        assets = [
+            Asset(
+                name=f"{name} asset {i}",
+                company_id=company.id,
+                listed_year=2020,
+                ticker=f"{name.upper()}{i}",
+                available_count=10,
+                price=Decimal("10.00"),
+            )
+            for i in range(3)
+        ]
+        user = User(username=name, email=f"{name}@test.com", hashed_password="test", role_id=1, balance=Decimal(100))
+        session.add_all([*assets, user])
+        await session.commit()
+    return user, assets
+
+
+async def balance(user: User) -> Decimal:
+    async with async_session_maker() as session:
+        return await current_balance(session, user.id)
+
+
+async def test_all_or_nothing_rolls_back_every_leg():
+    user, assets = await portfolio("atomic")
+    legs = [
+        OrderLeg(asset_id=assets[0].id, type=TransactionType.BUY, amount=Decimal(2)),
+        OrderLeg(asset_id=assets[1].id, type=TransactionType.BUY, amount=Decimal(20)),
+        OrderLeg(asset_id=assets[2].id, type=TransactionType.BUY, amount=Decimal(1)),
+    ]
+
+    async with async_session_maker() as session:
+        with pytest.raises(BatchOrderRejected) as rejected:
+            await TransactionService(session).execute_batch(legs, user, BatchMode.ALL_OR_NOTHING)
+
+    statuses = [leg["status"] for leg in rejected.value.detail["data"]]
+    assert statuses == ["rolled_back", "rejected", "skipped"]
+    assert await balance(user) == Decimal(100)
+
+
+async def test_best_effort_keeps_successful_legs():
+    user, assets = await portfolio("effort")
+    legs = [
+        OrderLeg(asset_id=assets[2].id, type=TransactionType.BUY, amount=Decimal(3)),
+        OrderLeg(asset_id=assets[0].id, type=TransactionType.SELL, amount=Decimal(1)),
+        OrderLeg(asset_id=assets[1].id, type=TransactionType.BUY, amount=Decimal(2)),
+    ]
+
+    async with async_session_maker() as session:
+        results = await TransactionService(session).execute_batch(legs, user, BatchMode.BEST_EFFORT)
+
+    assert [result.status for result in results] == [
+        OrderLegStatus.FILLED,
+        OrderLegStatus.REJECTED,
+        OrderLegStatus.FILLED,
+    ]
+    assert results[1].error == "You own fewer assets than you are trying to sell."
+    assert await balance(user) == Decimal(50)
@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from database.models import Asset, Company, User
+from transactions.service import TransactionService
+from users.service import UserService
+from conftest import async_session_maker
+
+
+async def set_price(asset: Asset, price: Decimal) -> None:
+    async with async_session_maker() as session:
+        await session.execute(update(Asset).where(Asset.id == asset.id).values(price=price))
+        await session.commit()
+
+
+async def test_portfolio_values_holdings_at_average_cost():
+    async with async_session_maker() as session:
+        company = Company(name="Portfolio Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Portfolio asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="PORT",
+            available_count=100,
+            price=Decimal("10.00"),
+        )
+        user = User(
+            username="investor", email="investor@test.com", hashed_password="test", role_id=1, balance=Decimal(1000)
+        )
+        session.add_all([asset, user])
+        await session.commit()
+
+    async with async_session_maker() as session:
+        await TransactionService(session).create_buy(asset.id, Decimal(4), user)
+    await set_price(asset, Decimal("20.00"))
+    async with async_session_maker() as session:
+        await TransactionService(session).create_buy(asset.id, Decimal(4), user)
+        await TransactionService(session).create_sell(asset.id, Decimal(2), user)
+
+    async with async_session_maker() as session:
+        portfolio = await UserService(session).get_portfolio(user.id)
+
+    [holding] = portfolio.holdings
+    assert holding.amount == Decimal(6)
+    assert holding.market_value == Decimal(120)
+    assert holding.cost_basis == Decimal(90)  # 8 за 120, продано 2 по средней цене 15
+    assert holding.unrealized_pnl == Decimal(30)
+    assert (portfolio.market_value, portfolio.cost_basis, portfolio.unrealized_pnl) == (120, 90, 30)
+
+
+async def test_cost_basis_starts_over_after_selling_out():
+    async with async_session_maker() as session:
+        company = Company(name="Round trip Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Round trip asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="TRIP",
+            available_count=100,
+            price=Decimal("100.00"),
+        )
+        user = User(
+            username="trader", email="trader@test.com", hashed_password="test", role_id=1, balance=Decimal(10000)
+        )
+        session.add_all([asset, user])
+        await session.commit()
+
+    async with async_session_maker() as session:
+        await TransactionService(session).create_buy(asset.id, Decimal(10), user)
+        await TransactionService(session).create_sell(asset.id, Decimal(10), user)
+    await set_price(asset, Decimal("200.00"))
+    async with async_session_maker() as session:
+        await TransactionService(session).create_buy(asset.id, Decimal(10), user)
+
+    async with async_session_maker() as session:
+        portfolio = await UserService(session).get_portfolio(user.id)
+
+    [holding] = portfolio.holdings
+    assert holding.cost_basis == Decimal(2000)
+    assert holding.unrealized_pnl == Decimal(0)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from decimal import Decimal
+
+from database.models import Asset, CandleInterval, Company
+from assets.history import apply_retention, load_candles, record_prices, roll_up_candles
+from conftest import async_session_maker
+
+
+async def test_candles_combine_rolled_up_and_live_prices():
+    async with async_session_maker() as session:
+        company = Company(name="History Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="History asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="HIST",
+            available_count=100,
+            price=Decimal("10.00"),
+        )
+        session.add(asset)
+        await session.commit()
+
+    ticks = [
+        (datetime(2026, 1, 5, 10, 0), "10"),
+        (datetime(2026, 1, 5, 10, 20), "14"),
+        (datetime(2026, 1, 5, 10, 40), "8"),
+        (datetime(2026, 1, 5, 10, 55), "12"),
+        (datetime(2026, 1, 5, 11, 5), "13"),
+        (datetime(2026, 1, 5, 11, 10), "11"),
+    ]
+    async with async_session_maker() as session:
+        for recorded_at, price in ticks:
+            await record_prices(session, {asset.id: Decimal(price)}, recorded_at)
+        await session.commit()
+
+    async with async_session_maker() as session:
+        # Час 11:00 ещё не закрыт, поэтому в свечи попадает только 10:00
+        await roll_up_candles(session, datetime(2026, 1, 5, 11, 30))
+        candles = await load_candles(
+            session, asset.id, CandleInterval.HOUR, datetime(2026, 1, 5), datetime(2026, 1, 6), limit=10
+        )
+
+    assert [(c.bucket_start.hour, c.open, c.high, c.low, c.close) for c in candles] == [
+        (10, 10, 14, 8, 12),
+        (11, 13, 13, 11, 11),
+    ]
+
+    async with async_session_maker() as session:
+        minutes = await load_candles(
+            session, asset.id, CandleInterval.MINUTE, datetime(2026, 1, 5, 10), datetime(2026, 1, 5, 11), limit=2
+        )
+        assert [c.close for c in minutes] == [10, 14]
+
+        dropped = await apply_retention(session, datetime(2026, 1, 13), raw_days=7, hourly_days=90)
+        assert dropped == ["asset_price_history_20260105"]
+        # Сырые цены удалены, но свернутая часовая свеча осталась
+        candles = await load_candles(
+            session, asset.id, CandleInterval.HOUR, datetime(2026, 1, 5), datetime(2026, 1, 6), limit=10
+        )
+        assert [c.bucket_start.hour for c in candles] == [10]
+
+
+async def test_candle_range_accepts_timezone_aware_bounds(client):
+    async with async_session_maker() as session:
+        company = Company(name="Candle Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Candle asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="CNDL",
+            available_count=100,
+            price=Decimal("10.00"),
+        )
+        session.add(asset)
+        await session.commit()
+        await record_prices(session, {asset.id: Decimal("10")}, datetime(2026, 2, 1, 10, 30))
+        await session.commit()
+
+    # 12:00+02:00 - это 10:00 UTC, диапазон пуст
+    response = await client.get(
+        f"/assets/{asset.id}/candles",
+        params={"interval": "1h", "start": "2026-02-01T10:00:00Z", "end": "2026-02-01T12:00:00+02:00"},
+    )
+    assert response.status_code == 422
+
+    response = await client.get(
+        f"/assets/{asset.id}/candles",
+        params={"interval": "1h", "start": "2026-02-01T10:00:00Z", "end": "2026-02-01T13:00:00+02:00"},
+    )
+    assert response.status_code == 200
+    assert [candle["bucket_start"] for candle in response.json()] == ["2026-02-01T10:00:00"]
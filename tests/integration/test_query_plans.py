@@ -0,0 +1,64 @@
+import json
+from typing import Any, Awaitable, Callable
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from assets.service import AssetService
+from database.models import UserAsset
+from pagination import Paginator
+from transactions.service import TransactionService
+from users.service import UserService
+from conftest import async_session_maker, engine_test
+
+HOT_QUERIES: dict[str, Callable[[AsyncSession], Awaitable[Any]]] = {
+    "user transactions": lambda session: UserService(session).get_transactions(Paginator(), user_id=1),
+    "user assets": lambda session: UserService(session).get_assets(Paginator(), user_id=1),
+    "all transactions": lambda session: TransactionService(session).get_all(Paginator()),
+    "company assets": lambda session: AssetService(session, session).get_all(Paginator(), company_id=1),
+    "asset search": lambda session: AssetService(session, session).search_assets("test asset", Paginator()),
+    "ticker search": lambda session: AssetService(session, session).search_assets("tst", Paginator()),
+    "holding lookup": lambda session: session.scalar(
+        select(UserAsset).filter(UserAsset.user_id == 1, UserAsset.asset_id == 1)
+    ),
+}
+
+
+async def capture_selects(call: Callable[[AsyncSession], Awaitable[Any]]) -> list[tuple[str, Any]]:
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", collect)
+    try:
+        async with async_session_maker() as session:
+            await call(session)
+    finally:
+        event.remove(engine_test.sync_engine, "before_cursor_execute", collect)
+    return statements
+
+
+def seq_scans(plan: dict[str, Any]) -> list[str]:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_query_uses_indexes(name: str):
+    statements = await capture_selects(HOT_QUERIES[name])
+    assert statements
+
+    async with engine_test.connect() as conn:
+        # On test-sized tables a seq scan is always cheapest, so only a missing index can produce one
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            explain = result.scalar()
+            plan = (json.loads(explain) if isinstance(explain, str) else explain)[0]["Plan"]
+            assert not seq_scans(plan), f"{name}: sequential scan in\n{statement}"
+        await conn.rollback()
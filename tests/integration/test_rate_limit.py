@@ -0,0 +1,16 @@
+from limits import parse
+
+from config import config
+from limiter import build_limiter
+
+
+def test_workers_share_redis_counters():
+    # Два лимитера - как два процесса gunicorn с общим Redis
+    workers = [build_limiter(f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}") for _ in range(2)]
+    limit = parse("3/minute")
+    for worker in workers:
+        worker.reset()
+
+    hits = [workers[i % 2].limiter.hit(limit, "127.0.0.1", "/shared") for i in range(4)]
+
+    assert hits == [True, True, True, False]
@@ -0,0 +1,77 @@
+import asyncio
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from balance.ledger import current_balance
+from database.models import Asset, Company, Transaction, User, UserAsset
+from transactions.service import TransactionService
+from conftest import async_session_maker
+
+ORDERS = 500
+STOCK = 300
+PRICE = Decimal("2.00")
+
+
+async def place(order, *args) -> bool:
+    async with async_session_maker() as session:
+        try:
+            await order(TransactionService(session), *args)
+        except HTTPException:
+            return False
+        return True
+
+
+async def test_parallel_orders_do_not_lose_updates(session_fixture):
+    async with session_fixture as session:
+        company = Company(name="Concurrency Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Contended asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="RACE",
+            available_count=STOCK,
+            price=PRICE,
+        )
+        # Денег хватает на 250 покупок, акций - на 300: ограничивают оба условия
+        user = User(username="racer", email="racer@test.com", hashed_password="test", role_id=1, balance=Decimal(500))
+        session.add_all([asset, user])
+        await session.commit()
+
+    bought = await asyncio.gather(
+        *(place(TransactionService.create_buy, asset.id, Decimal(1), user) for _ in range(ORDERS))
+    )
+    assert sum(bought) == 250
+
+    sold = await asyncio.gather(
+        *(place(TransactionService.create_sell, asset.id, Decimal(1), user) for _ in range(ORDERS))
+    )
+    assert sum(sold) == 250
+
+    async with async_session_maker() as session:
+        assert await session.scalar(select(Asset.available_count).where(Asset.id == asset.id)) == STOCK
+        assert await current_balance(session, user.id) == Decimal(500)
+        assert await session.scalar(select(UserAsset).where(UserAsset.user_id == user.id)) is None
+        trades = select(func.count()).select_from(Transaction).where(Transaction.user_id == user.id)
+        assert await session.scalar(trades) == 500
+
+
+async def test_sell_decrements_holding_and_deletes_it_at_zero(session_fixture):
+    async with session_fixture as session:
+        asset = await session.scalar(select(Asset).where(Asset.ticker == "RACE"))
+        user = await session.scalar(select(User).where(User.username == "racer"))
+
+    assert await place(TransactionService.create_buy, asset.id, Decimal(3), user)
+    assert await place(TransactionService.create_buy, asset.id, Decimal(2), user)
+    assert await place(TransactionService.create_sell, asset.id, Decimal(4), user)
+
+    async with async_session_maker() as session:
+        holding = select(UserAsset.amount).where(UserAsset.user_id == user.id, UserAsset.asset_id == asset.id)
+        assert await session.scalar(holding) == Decimal(1)
+
+        assert not await place(TransactionService.create_sell, asset.id, Decimal(2), user)
+        assert await place(TransactionService.create_sell, asset.id, Decimal(1), user)
+        assert await session.scalar(holding) is None
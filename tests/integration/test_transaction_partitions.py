@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text
+
+from database.models import Asset, Company, Transaction, TransactionType, User
+from transactions.partitions import archive_partitions, ensure_partitions
+from conftest import async_session_maker
+
+
+async def test_partitions_take_over_default_rows_and_get_archived():
+    async with async_session_maker() as session:
+        company = Company(name="Partition Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Partition asset",
+            company_id=company.id,
+            listed_year=2020,
+            ticker="PART",
+            available_count=100,
+            price=Decimal("10.00"),
+        )
+        user = User(username="archivist", email="archivist@test.com", hashed_password="test", role_id=1)
+        session.add_all([asset, user])
+        await session.commit()
+
+        # Для января 2020 секции ещё нет, сделка попадает в transaction_default
+        transaction_id = await session.scalar(
+            insert(Transaction)
+            .values(
+                user_id=user.id,
+                asset_id=asset.id,
+                type=TransactionType.BUY,
+                transaction_datetime=datetime(2020, 1, 15),
+                amount=Decimal(1),
+                total_value=Decimal(10),
+            )
+            .returning(Transaction.id)
+        )
+        await session.commit()
+
+        created = await ensure_partitions(session, datetime(2020, 1, 20), months_ahead=1)
+        await session.commit()
+        assert created == ["transaction_202001", "transaction_202002"]
+        partition = await session.scalar(
+            select(text("tableoid::regclass::text")).select_from(Transaction).where(Transaction.id == transaction_id)
+        )
+        assert partition == "transaction_202001"
+
+        archived = await archive_partitions(
+            session, datetime(2020, 3, 10), after_months=1, schema="archive_test", lock_timeout=1
+        )
+        await session.commit()
+        assert archived == ["transaction_202001"]
+        assert await session.scalar(select(func.count()).where(Transaction.id == transaction_id)) == 0
+        assert await session.scalar(text("SELECT count(*) FROM archive_test.transaction_202001")) == 1
+
+        await session.execute(text("DROP SCHEMA archive_test CASCADE"))
+        await session.commit()
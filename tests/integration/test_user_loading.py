@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import event, text
+
+from database.models import Asset, Company, User
+from conftest import async_session_maker, engine_test
+
+TRANSACTIONS_COUNT = 100_000
+
+
+async def count_user_lookup_statements(user_id: int) -> list[str]:
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", collect)
+    try:
+        async with async_session_maker() as session:
+            user = await SQLAlchemyUserDatabase(session, User).get(user_id)
+            assert user.role is not None
+    finally:
+        event.remove(engine_test.sync_engine, "before_cursor_execute", collect)
+    return statements
+
+
+async def test_user_lookup_does_not_scale_with_history():
+    async with async_session_maker() as session:
+        company = Company(name="Loading Profile Inc")
+        session.add(company)
+        await session.flush()
+        asset = Asset(
+            name="Loading asset", company_id=company.id, listed_year=2020, ticker="LOAD", price=Decimal("1.00")
+        )
+        user = User(username="trader", email="trader@test.com", hashed_password="test", role_id=1)
+        session.add_all([asset, user])
+        await session.commit()
+
+    baseline = await count_user_lookup_statements(user.id)
+
+    async with async_session_maker() as session:
+        await session.execute(
+            text(
+                "INSERT INTO transaction (user_id, asset_id, type, amount, total_value) "
+                "SELECT :user_id, :asset_id, 'BUY', 1, 1 FROM generate_series(1, :count)"
+            ),
+            {"user_id": user.id, "asset_id": asset.id, "count": TRANSACTIONS_COUNT},
+        )
+        await session.commit()
+
+    statements = await count_user_lookup_statements(user.id)
+
+    assert len(statements) == len(baseline) == 1
+    assert not any("transaction" in statement or "user_asset" in statement for statement in statements)
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Iterable
+
+
+class FakePubSub:
+    """Records its subscription in `events`, delivers `messages` and then waits forever, like an idle channel."""
+
+    def __init__(self, events: list[str], messages: Iterable[bytes] = ()):
+        self.events = events
+        self.messages = list(messages)
+
+    async def subscribe(self, channel: str) -> None:
+        self.events.append("subscribe")
+
+    async def reset(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def listen(self):
+        for data in self.messages:
+            yield {"type": "message", "data": data}
+        await asyncio.Event().wait()
+
+
+class FakeRedis:
+    """Hands out `pubsubs` in turn and records what is published."""
+
+    def __init__(self, pubsubs: Iterable[FakePubSub] = ()):
+        self._pubsubs = iter(pubsubs)
+        self.published: list[tuple[str, str]] = []
+
+    def pubsub(self) -> FakePubSub:
+        return next(self._pubsubs)
+
+    async def publish(self, channel: str, message: str) -> None:
+        self.published.append((channel, message))
+
+
+async def settle() -> None:
+    """Let the listener task run until it waits on the channel again."""
+    for _ in range(10):
+        await asyncio.sleep(0)
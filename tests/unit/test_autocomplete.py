@@ -0,0 +1,64 @@
+import json
+import unittest
+
+import pytest
+
+from assets.autocomplete import AssetAutocomplete, PrefixIndex
+from assets.schemas import AssetSuggestion
+
+from fake_redis import FakeRedis
+
+
+def suggestion(asset_id: int, ticker: str, name: str, company_id: int, company_name: str) -> AssetSuggestion:
+    return AssetSuggestion(id=asset_id, ticker=ticker, name=name, company_id=company_id, company_name=company_name)
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.rebuild(
+            [
+                suggestion(1, "AAPL", "Apple Inc", 1, "Apple Inc"),
+                suggestion(2, "APP", "AppLovin Corp", 2, "AppLovin"),
+                suggestion(3, "MSFT", "Microsoft Corp", 3, "Microsoft"),
+            ]
+        )
+
+    def ids(self, prefix: str, limit: int = 10) -> list[int]:
+        return [entry.id for entry in self.index.suggest(prefix, limit)]
+
+    def test_tickers_rank_before_names(self):
+        self.assertEqual(self.ids("app"), [2, 1])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.ids("corp micro"), [3])
+        self.assertEqual(self.ids("apple corp"), [])
+
+    def test_limit(self):
+        self.assertEqual(self.ids("a", limit=1), [1])
+
+    def test_upsert_replaces_old_keys(self):
+        self.index.upsert(suggestion(3, "MSFT", "Macrohard", 3, "Microsoft"))
+
+        self.assertEqual(self.ids("macro"), [3])
+        self.assertEqual(self.ids("corp"), [2])
+
+    def test_remove_and_rename_company(self):
+        self.index.remove(2)
+        self.index.rename_company(1, "Fruit Co")
+
+        self.assertEqual(self.ids("app"), [1])
+        self.assertEqual(self.ids("fruit"), [1])
+        self.assertEqual(len(self.index), 2)
+
+
+@pytest.mark.asyncio
+async def test_changes_are_broadcast_while_the_index_reloads():
+    redis = FakeRedis()
+    autocomplete = AssetAutocomplete()
+    autocomplete._redis, autocomplete._listener = redis, object()  # Subscribed, but the index is still loading
+
+    await autocomplete.asset_deleted(1)
+
+    assert json.loads(redis.published[0][1]) == {"op": "delete", "asset_id": 1}
+    assert not autocomplete.enabled
@@ -0,0 +1,60 @@
+import pytest
+from decimal import Decimal
+
+from finnhub import FinnhubService, FINNHUB_BASE_URL
+from http_client import create_http_client
+
+pytestmark = pytest.mark.asyncio
+
+MOCK_API_KEY = "test_api_key"
+QUOTE_URL = f"{FINNHUB_BASE_URL}/quote?symbol=AAPL&token={MOCK_API_KEY}"
+
+
+@pytest.fixture
+async def client():
+    async with create_http_client(http2=False, max_retries=2, backoff=0, backoff_max=0) as client:
+        yield client
+
+
+async def test_retries_failed_responses(httpx_mock, client):
+    httpx_mock.add_response(url=QUOTE_URL, status_code=502, headers={"Retry-After": "0"})
+    httpx_mock.add_response(url=QUOTE_URL, status_code=503)
+    httpx_mock.add_response(url=QUOTE_URL, json={"c": 175.50})
+
+    async with FinnhubService(MOCK_API_KEY, client) as finnhub:
+        assert await finnhub.get_asset_price("AAPL") == Decimal("175.50")
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_gives_up_after_max_retries(httpx_mock, client):
+    httpx_mock.add_response(url=QUOTE_URL, status_code=500, is_reusable=True)
+
+    async with FinnhubService(MOCK_API_KEY, client) as finnhub:
+        assert await finnhub.get_asset_price("AAPL") is None
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_client_errors_are_not_retried(httpx_mock, client):
+    httpx_mock.add_response(url=QUOTE_URL, status_code=404)
+
+    async with FinnhubService(MOCK_API_KEY, client) as finnhub:
+        assert await finnhub.get_asset_price("AAPL") is None
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_throttled_responses_are_not_retried(httpx_mock, client):
+    httpx_mock.add_response(url=QUOTE_URL, status_code=429, headers={"Retry-After": "0"})
+
+    async with FinnhubService(MOCK_API_KEY, client) as finnhub:
+        assert await finnhub.get_asset_price("AAPL") is None
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_shared_client_outlives_service(httpx_mock, client):
+    httpx_mock.add_response(url=QUOTE_URL, json={"c": 1}, is_reusable=True)
+
+    for _ in range(2):
+        async with FinnhubService(MOCK_API_KEY, client) as finnhub:
+            await finnhub.get_asset_price("AAPL")
+
+    assert not client.is_closed
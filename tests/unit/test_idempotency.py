@@ -0,0 +1,187 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from httpx import ASGITransport, AsyncClient
+from redis.exceptions import ConnectionError
+
+import idempotency
+from idempotency import (
+    IDEMPOTENCY_HEADER,
+    POSTGRES_BACKEND,
+    REDIS_BACKEND,
+    REPLAYED_HEADER,
+    IdempotencyStore,
+    idempotent,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+class MemoryStore(IdempotencyStore):
+    def __init__(self):
+        super().__init__(redis=None, ttl=60, lock_ttl=60)
+        self.records = {}
+
+    async def claim(self, key, request_hash):
+        if key in self.records:
+            return self.records[key], REDIS_BACKEND
+        self.records[key] = {"request_hash": request_hash, "state": idempotency.IN_PROGRESS}
+        return None, REDIS_BACKEND
+
+    async def complete(self, key, backend, request_hash, status_code, body):
+        self.records[key] = {
+            "request_hash": request_hash,
+            "state": idempotency.COMPLETED,
+            "status_code": status_code,
+            "body": body,
+        }
+
+    async def release(self, key, backend):
+        self.records.pop(key, None)
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("Redis is down")
+
+    async def set(self, key, value, nx=False, ex=None):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+
+class TableStore(IdempotencyStore):
+    """The store with the `idempotency_key` table kept in a dict."""
+
+    def __init__(self, redis):
+        super().__init__(redis=redis, ttl=60, lock_ttl=60)
+        self.table = {}
+
+    async def _claim_postgres(self, key, record):
+        if key in self.table:
+            return self.table[key]
+        self.table[key] = record
+        return None
+
+    async def _complete_postgres(self, key, record):
+        self.table[key] = record
+
+    async def _release_postgres(self, key):
+        self.table.pop(key, None)
+
+    async def _find_postgres(self, key):
+        return self.table.get(key)
+
+
+calls = []
+app = FastAPI()
+
+
+def get_user():
+    return SimpleNamespace(id=1)
+
+
+@app.post("/top-up")
+@idempotent()
+async def top_up(request: Request, response: Response, amount: int, current_user=Depends(get_user)):
+    calls.append(amount)
+    if amount < 0:
+        raise HTTPException(400, "negative")
+    if amount == 0:
+        raise HTTPException(409, "try again later")
+    return {"balance": sum(calls)}
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(idempotency, "idempotency_store", MemoryStore())
+    calls.clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_retry_is_replayed(client):
+    first = await client.post("/top-up?amount=5", headers={IDEMPOTENCY_HEADER: "a"})
+    retry = await client.post("/top-up?amount=5", headers={IDEMPOTENCY_HEADER: "a"})
+
+    assert calls == [5]
+    assert retry.json() == first.json() == {"balance": 5}
+    assert retry.headers[REPLAYED_HEADER] == "true"
+
+
+async def test_client_errors_are_replayed(client):
+    await client.post("/top-up?amount=-1", headers={IDEMPOTENCY_HEADER: "b"})
+    retry = await client.post("/top-up?amount=-1", headers={IDEMPOTENCY_HEADER: "b"})
+
+    assert calls == [-1]
+    assert retry.status_code == 400
+
+
+async def test_transient_conflicts_are_not_replayed(client):
+    await client.post("/top-up?amount=0", headers={IDEMPOTENCY_HEADER: "d"})
+    retry = await client.post("/top-up?amount=0", headers={IDEMPOTENCY_HEADER: "d"})
+
+    assert calls == [0, 0]
+    assert REPLAYED_HEADER not in retry.headers
+
+
+async def test_without_key_every_request_runs(client):
+    await client.post("/top-up?amount=1")
+    await client.post("/top-up?amount=1")
+
+    assert calls == [1, 1]
+
+
+async def test_key_reused_with_other_request_is_rejected(client):
+    await client.post("/top-up?amount=1", headers={IDEMPOTENCY_HEADER: "c"})
+    reused = await client.post("/top-up?amount=2", headers={IDEMPOTENCY_HEADER: "c"})
+
+    assert calls == [1]
+    assert reused.status_code == 422
+
+
+async def test_result_stored_during_redis_outage_is_found_after_recovery():
+    redis = FlakyRedis()
+    store = TableStore(redis)
+    stored, backend = await store.claim("key", "hash")
+    assert (stored, backend) == (None, REDIS_BACKEND)
+
+    redis.down = True
+    await store.complete("key", backend, "hash", None, {"balance": 5})
+    # Redis вернулся, а захват в нём истёк
+    redis.down = False
+    redis.data.clear()
+
+    stored, backend = await store.claim("key", "hash")
+    assert backend == POSTGRES_BACKEND
+    assert (stored["state"], stored["body"]) == (idempotency.COMPLETED, {"balance": 5})
+    assert "key" not in redis.data
+
+
+async def test_key_claimed_in_postgres_is_released_there():
+    redis = FlakyRedis()
+    store = TableStore(redis)
+    redis.down = True
+    stored, backend = await store.claim("key", "hash")
+    assert (stored, backend) == (None, POSTGRES_BACKEND)
+
+    redis.down = False
+    assert (await store.claim("key", "hash"))[0]["state"] == idempotency.IN_PROGRESS
+    await store.release("key", backend)
+    assert await store.claim("key", "hash") == (None, REDIS_BACKEND)
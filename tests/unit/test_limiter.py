@@ -0,0 +1,95 @@
+import threading
+from ipaddress import ip_network
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi_users.jwt import generate_jwt
+from httpx import ASGITransport, AsyncClient
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+
+import limiter as limiter_module
+from config import config
+from database.models import ADMIN_ROLE_ID
+from limiter import RateLimitTiers, build_limiter, client_address, rate_limit_key
+from users.tokens import AUTH_COOKIE_NAME, ROLE_CLAIM, TOKEN_AUDIENCE
+
+
+@pytest.mark.asyncio
+async def test_route_limits_apply_locally_while_redis_is_down():
+    limiter = build_limiter("redis://127.0.0.1:1")
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @limiter.limit("2/minute")
+    async def limited(request: Request):
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = [(await client.get("/limited")).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.asyncio
+async def test_limits_of_async_routes_are_checked_off_the_event_loop(monkeypatch):
+    limiter = build_limiter("memory://")
+    app = FastAPI()
+    app.state.limiter = limiter
+    threads = []
+    check = limiter._check_request_limit
+
+    def recording_check(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return check(*args, **kwargs)
+
+    monkeypatch.setattr(limiter, "_check_request_limit", recording_check)
+
+    @app.get("/limited")
+    @limiter.limit("2/minute")
+    async def limited(request: Request):
+        return {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/limited")).status_code == 200
+
+    assert len(threads) == 1 and threads[0] != threading.get_ident()
+
+
+def make_request(peer: str, headers: dict[str, str] | None = None, cookies: str = "") -> Request:
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    if cookies:
+        raw_headers.append((b"cookie", cookies.encode()))
+    return Request({"type": "http", "headers": raw_headers, "client": (peer, 1234)})
+
+
+@pytest.fixture
+def trusted_proxy(monkeypatch):
+    monkeypatch.setattr(limiter_module, "_trusted_proxies", [ip_network("10.0.0.0/8")])
+    limiter_module._is_trusted_proxy.cache_clear()
+    yield
+    limiter_module._is_trusted_proxy.cache_clear()
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peer(trusted_proxy):
+    request = make_request("203.0.113.5", {"X-Forwarded-For": "198.51.100.1"})
+    assert client_address(request) == "203.0.113.5"
+
+
+def test_forwarded_for_skips_trusted_hops(trusted_proxy):
+    request = make_request("10.0.0.2", {"X-Forwarded-For": "198.51.100.1, 203.0.113.7, 10.0.0.1"})
+    assert client_address(request) == "203.0.113.7"
+
+
+def test_key_and_tier_come_from_the_auth_cookie():
+    token = generate_jwt({"sub": "42", "aud": TOKEN_AUDIENCE, ROLE_CLAIM: ADMIN_ROLE_ID}, config.SECRET, 60)
+    tiers = RateLimitTiers("5/minute", admin="50/minute", anonymous="1/minute")
+
+    admin_key = rate_limit_key(make_request("203.0.113.5", cookies=f"{AUTH_COOKIE_NAME}={token}"))
+    anonymous_key = rate_limit_key(make_request("203.0.113.5", cookies=f"{AUTH_COOKIE_NAME}=garbage"))
+
+    assert admin_key == "user:42:admin"
+    assert anonymous_key == "ip:203.0.113.5:anonymous"
+    assert (tiers(admin_key), tiers(anonymous_key)) == ("50/minute", "1/minute")
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from database.models import Transaction
+from pagination import NEXT_CURSOR_HEADER, InvalidCursor, Paginator, decode_cursor, encode_cursor
+
+KEYS = (Transaction.transaction_datetime, Transaction.id)
+
+
+class TestPaginator(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        values = [datetime(2025, 4, 21, 20, 2, 8), 42]
+        self.assertEqual(decode_cursor(encode_cursor(values), KEYS), values)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor", KEYS)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor([42]), KEYS)
+
+    def test_offset_mode(self):
+        query = Paginator(limit=5, skip=10).apply(select(Transaction), *KEYS, descending=True)
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        self.assertIn("ORDER BY transaction.transaction_datetime DESC, transaction.id DESC", sql)
+        self.assertIn("OFFSET", sql)
+
+    def test_cursor_mode_uses_keyset_predicate(self):
+        cursor = encode_cursor([datetime(2025, 4, 21), 42])
+        query = Paginator(limit=5, skip=10, cursor=cursor).apply(select(Transaction), *KEYS, descending=True)
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        self.assertIn("(transaction.transaction_datetime, transaction.id) <", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_next_cursor_only_on_full_page(self):
+        pagination = Paginator(limit=2)
+        pagination._response = Response()
+        pagination.apply(select(Transaction), *KEYS)
+        items = [SimpleNamespace(transaction_datetime=datetime(2025, 1, day), id=day) for day in (1, 2)]
+
+        pagination.page(items[:1])
+        self.assertNotIn(NEXT_CURSOR_HEADER, pagination._response.headers)
+
+        pagination.page(items)
+        cursor = pagination._response.headers[NEXT_CURSOR_HEADER]
+        self.assertEqual(decode_cursor(cursor, KEYS), [datetime(2025, 1, 2), 2])
@@ -0,0 +1,40 @@
+import sqlite3
+import unittest
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from database.pool import PoolMetrics, TimedCheckoutMixin
+
+
+class TimedQueuePool(TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def test_snapshot_is_cumulative(self):
+        metrics = PoolMetrics()
+        for waited in (0.0005, 0.02, 3.0, 10.0):
+            metrics.observe(waited)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["checkouts"], 4)
+        self.assertEqual(snapshot["wait_seconds_max"], 10.0)
+        self.assertEqual(snapshot["wait_seconds_buckets"]["0.001"], 1)
+        self.assertEqual(snapshot["wait_seconds_buckets"]["0.05"], 2)
+        self.assertEqual(snapshot["wait_seconds_buckets"]["+Inf"], 4)
+
+    def test_checkouts_and_timeouts_are_recorded_per_pool(self):
+        timed_pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.01)
+        other_pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0)
+
+        connection = timed_pool.connect()
+        with self.assertRaises(exc.TimeoutError):
+            timed_pool.connect()
+        connection.close()
+        other_pool.connect().close()
+
+        metrics = timed_pool.metrics
+        self.assertEqual((metrics.checkouts, metrics.timeouts), (2, 1))
+        self.assertGreaterEqual(metrics.wait_max, 0.01)
+        self.assertEqual((other_pool.metrics.checkouts, other_pool.metrics.timeouts), (1, 0))
@@ -0,0 +1,85 @@
+import pytest
+from decimal import Decimal
+
+from users.portfolio_cache import PortfolioCache
+from users.schemas import PortfolioResponse
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for PortfolioCache."""
+
+    def __init__(self):
+        self.data: dict = {}
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+
+    async def hincrby(self, key, field, amount):
+        hash_ = self.data.setdefault(key, {})
+        hash_[field] = hash_.get(field, 0) + amount
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._commands = []
+
+    def get(self, key):
+        self._commands.append(lambda: self._redis.data.get(key))
+        return self
+
+    def hget(self, key, field):
+        self._commands.append(lambda: self._redis.data.get(key, {}).get(field))
+        return self
+
+    async def execute(self):
+        return [command() for command in self._commands]
+
+
+def portfolio(value: int) -> PortfolioResponse:
+    return PortfolioResponse(holdings=[], market_value=value, cost_basis=Decimal(0), unrealized_pnl=value)
+
+
+async def test_invalidation_by_user_and_by_prices():
+    cache = PortfolioCache(FakeRedis(), ttl=60)
+    loads = []
+
+    async def load(value):
+        loads.append(value)
+        return portfolio(value)
+
+    assert await cache.get_or_load(1, lambda: load(1)) == (portfolio(1), False)
+    assert await cache.get_or_load(1, lambda: load(2)) == (portfolio(1), True)
+
+    await cache.invalidate(1)
+    assert await cache.get_or_load(1, lambda: load(3)) == (portfolio(3), False)
+    assert await cache.get_or_load(2, lambda: load(4)) == (portfolio(4), False)
+
+    await cache.invalidate_all()
+    assert await cache.get_or_load(2, lambda: load(5)) == (portfolio(5), False)
+    assert loads == [1, 3, 4, 5]
+
+
+async def test_portfolio_loaded_during_invalidation_is_not_served():
+    cache = PortfolioCache(FakeRedis(), ttl=60)
+
+    async def load_while_trading():
+        await cache.invalidate(1)
+        return portfolio(1)
+
+    async def load_after_trade():
+        return portfolio(2)
+
+    await cache.get_or_load(1, load_while_trading)
+    assert await cache.get_or_load(1, load_after_trade) == (portfolio(2), False)
@@ -0,0 +1,47 @@
+import time
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from finnhub import FinnhubService, FINNHUB_BASE_URL
+from price_refresh import PriceRefresher, TokenBucket
+
+pytestmark = pytest.mark.asyncio
+
+MOCK_API_KEY = "test_api_key"
+
+
+@pytest.fixture
+async def finnhub_service():
+    async with FinnhubService(api_key=MOCK_API_KEY) as service:
+        yield service
+
+
+async def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started_at = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+
+    assert time.monotonic() - started_at >= 0.04
+
+
+async def test_fetch_prices_collects_stats(httpx_mock, finnhub_service):
+    httpx_mock.add_response(
+        method="GET", url=f"{FINNHUB_BASE_URL}/quote?symbol=AAPL&token={MOCK_API_KEY}", json={"c": 175.50}
+    )
+    httpx_mock.add_response(
+        method="GET", url=f"{FINNHUB_BASE_URL}/quote?symbol=ZERO&token={MOCK_API_KEY}", json={"c": 0}
+    )
+    httpx_mock.add_exception(
+        httpx.ConnectTimeout("timeout"), method="GET", url=f"{FINNHUB_BASE_URL}/quote?symbol=DOWN&token={MOCK_API_KEY}"
+    )
+
+    refresher = PriceRefresher(finnhub_service, concurrency=2, bucket=TokenBucket(rate=100, capacity=10))
+    prices = await refresher.fetch_prices({1: "AAPL", 2: "ZERO", 3: "DOWN"})
+
+    assert prices == {1: Decimal("175.5")}
+    assert refresher.stats.fetched == 1
+    assert refresher.stats.skipped == 1
+    assert refresher.stats.failed == 1
@@ -0,0 +1,100 @@
+import pytest
+
+from assets.exceptions import PriceStreamUnavailable, TooManyTickers
+from assets import stream, stream_router
+from assets.price_table import AssetPrices
+from assets.stream import PriceBroadcaster, PriceSubscription
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def broadcaster():
+    broadcaster = PriceBroadcaster(max_subscribers=2, max_tickers=2)
+    prices = AssetPrices(use_table=False)
+    prices._listener = object()  # Подписка считается запущенной; уведомления подаются через _apply
+    broadcaster.start(prices)
+    yield broadcaster
+    broadcaster.stop()
+
+
+async def test_subscription_keeps_latest_price_only():
+    subscription = PriceSubscription()
+    for price in range(1000):
+        subscription.offer({"AAPL": str(price)})
+    subscription.offer({"AAPL": "snapshot", "MSFT": "1"}, replace=False)
+
+    assert await subscription.next(timeout=0.1) == {"AAPL": "999", "MSFT": "1"}
+    assert await subscription.next(timeout=0.01) == {}
+
+
+async def test_dispatch_routes_by_ticker(broadcaster):
+    apple, microsoft = broadcaster.connect(), broadcaster.connect()
+    broadcaster.add_tickers(apple, {"AAPL"})
+    broadcaster.add_tickers(microsoft, {"AAPL", "MSFT"})
+
+    broadcaster.dispatch({"AAPL": "1", "MSFT": "2", "TSLA": "3"})
+
+    assert await apple.next(timeout=0.1) == {"AAPL": "1"}
+    assert await microsoft.next(timeout=0.1) == {"AAPL": "1", "MSFT": "2"}
+
+
+async def test_unsubscribe_and_disconnect(broadcaster):
+    subscription = broadcaster.connect()
+    broadcaster.add_tickers(subscription, {"AAPL", "MSFT"})
+    broadcaster.remove_tickers(subscription, ["AAPL"])
+    broadcaster.dispatch({"AAPL": "1"})
+
+    assert await subscription.next(timeout=0.01) == {}
+    broadcaster.disconnect(subscription)
+    assert broadcaster.stats() == {"subscribers": 0, "tickers": 0}
+
+
+async def test_limits(broadcaster):
+    subscription = broadcaster.connect()
+    broadcaster.connect()
+
+    with pytest.raises(PriceStreamUnavailable):
+        broadcaster.connect()
+    with pytest.raises(TooManyTickers):
+        broadcaster.add_tickers(subscription, {"AAPL", "MSFT", "TSLA"})
+
+
+async def test_stream_requires_started_broadcaster():
+    with pytest.raises(PriceStreamUnavailable):
+        PriceBroadcaster(max_subscribers=1, max_tickers=1).connect()
+
+
+async def test_price_notifications_reach_the_stream_without_the_table(broadcaster):
+    subscription = broadcaster.connect()
+    broadcaster.add_tickers(subscription, {"AAPL"})
+
+    prices = broadcaster._prices
+    prices._apply({"updated_at": 1.0, "assets": [[1, "AAPL", "5"]], "refreshed": [1, 2]})
+
+    assert await subscription.next(timeout=0.1) == {"AAPL": "5"}
+    assert len(prices.table) == 0 and not prices.enabled
+
+
+async def test_resubscription_sends_current_prices(broadcaster, monkeypatch):
+    async def load_prices(tickers):
+        return {ticker: "7" for ticker in tickers}
+
+    monkeypatch.setattr(stream, "load_prices", load_prices)
+    subscription = broadcaster.connect()
+    broadcaster.add_tickers(subscription, {"AAPL"})
+
+    # Цена AAPL изменилась, пока подписки не было, и больше не меняется
+    await broadcaster._prices._load()
+
+    assert await subscription.next(timeout=0.1) == {"AAPL": "7"}
+
+
+async def test_sse_takes_a_slot_only_once_streaming(broadcaster, monkeypatch):
+    monkeypatch.setattr(stream_router, "price_broadcaster", broadcaster)
+
+    # Клиент, ушедший до начала потока, не должен занимать подключение
+    await stream_router.stream_prices(request=None, tickers="AAPL")
+    assert broadcaster.stats()["subscribers"] == 0
+    with pytest.raises(TooManyTickers):
+        await stream_router.stream_prices(request=None, tickers="AAPL,MSFT,TSLA")
@@ -0,0 +1,76 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from assets import price_table
+from assets.price_table import AssetPrices, PriceQuote, PriceTable
+from transactions import service
+from transactions.exceptions import StalePrice
+from transactions.service import TransactionService
+
+
+@pytest.fixture
+def table() -> PriceTable:
+    table = PriceTable()
+    table.rebuild([(1, "AAPL", Decimal("10"), 100.0), (2, "MSFT", Decimal("20"), 0.0)])
+    return table
+
+
+def test_lookup_by_id_and_ticker(table):
+    assert table.get(1) == PriceQuote(Decimal("10"), 100.0)
+    assert table.get_by_ticker("MSFT") == PriceQuote(Decimal("20"), 0.0)
+    assert table.get(3) is None
+    assert len(table) == 2
+
+
+def test_set_renames_ticker_and_keeps_newest_time(table):
+    table.set(1, "APPL", Decimal("11"), 50.0)
+
+    assert table.get_by_ticker("AAPL") is None
+    assert table.get_by_ticker("APPL") == PriceQuote(Decimal("11"), 100.0)
+
+
+def test_apply_notification(table):
+    prices = AssetPrices(use_table=True)
+    prices.table = table
+    prices._apply({"updated_at": 200.0, "assets": [[3, "TSLA", "30.5"]], "refreshed": [2, 3, 4]})
+
+    assert table.get(3) == PriceQuote(Decimal("30.5"), 200.0)
+    assert table.get(2) == PriceQuote(Decimal("20"), 200.0)
+    assert table.get(1).updated_at == 100.0
+
+
+def test_trades_refuse_stale_prices(table, monkeypatch):
+    prices = AssetPrices(use_table=True)
+    prices.table = table
+    prices._listener, prices._synced = object(), True  # Таблица считается запущенной
+    monkeypatch.setattr(service, "asset_prices", prices)
+    monkeypatch.setattr(service.config, "PRICE_MAX_AGE", 60)
+
+    table.touch([1], time.time())
+    assert TransactionService._quote(1) == Decimal("10")
+    assert TransactionService._quote(3) is None
+    with pytest.raises(StalePrice):
+        TransactionService._quote(2)
+
+    monkeypatch.setattr(service.config, "PRICE_MAX_AGE", 0)
+    assert TransactionService._quote(2) == Decimal("20")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_table", [True, False])
+async def test_price_edits_are_published_while_the_table_is_unused(monkeypatch, use_table):
+    published = []
+
+    async def publish_prices(redis, changed, updated_at):
+        published.append(changed)
+
+    monkeypatch.setattr(price_table, "publish_prices", publish_prices)
+    prices = AssetPrices(use_table=use_table)
+    prices._listener = object()  # Подписка запущена, но таблица не синхронизирована или выключена
+
+    await prices.publish({1: ("AAPL", Decimal("10"))})
+
+    assert published == [{1: ("AAPL", Decimal("10"))}]
+    assert prices.table.get(1) is None
@@ -0,0 +1,42 @@
+import pytest
+
+import pubsub
+from pubsub import SyncedSubscription
+
+from fake_redis import FakePubSub, FakeRedis, settle
+
+pytestmark = pytest.mark.asyncio
+
+
+class Counter(SyncedSubscription):
+    channel = "counter"
+    name = "Counter"
+
+    def __init__(self, events: list[str]):
+        super().__init__()
+        self.events = events
+        self.value = 0
+
+    async def _load(self) -> None:
+        self.events.append("load")
+
+    def _apply(self, message) -> None:
+        self.value += message["add"]
+
+
+async def test_subscribes_before_loading_and_reloads_after_a_bad_message(monkeypatch):
+    monkeypatch.setattr(pubsub, "RESUBSCRIBE_DELAY", 0)
+    events = []
+    redis = FakeRedis([FakePubSub(events, [b'{"add": 2}', b"not json"]), FakePubSub(events, [b'{"add": 3}'])])
+    counter = Counter(events)
+
+    await counter.start(redis)
+    assert events == ["subscribe", "load"]
+    await settle()
+
+    # Испорченное сообщение не останавливает слушателя, а приводит к перезагрузке состояния
+    assert events == ["subscribe", "load", "subscribe", "load"]
+    assert counter.value == 5
+    assert counter.enabled
+    await counter.stop()
+    assert not counter.enabled and not counter.started
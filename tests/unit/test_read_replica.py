@@ -0,0 +1,51 @@
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import Request, Response
+
+from database import database
+from database.database import PRIMARY_READS_COOKIE, get_read_session, mark_primary_reads
+
+pytestmark = pytest.mark.asyncio
+
+PRIMARY, REPLICA = object(), object()
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    @asynccontextmanager
+    async def replica_session_maker():
+        yield REPLICA
+
+    monkeypatch.setattr(database, "_replica_session_maker", replica_session_maker)
+
+
+def make_request(cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "headers": headers})
+
+
+async def read_session(request: Request):
+    sessions = get_read_session(request, PRIMARY)
+    session = await anext(sessions)
+    await sessions.aclose()
+    return session
+
+
+async def test_reads_go_to_primary_without_replica():
+    assert await read_session(make_request()) is PRIMARY
+
+
+async def test_reads_go_to_replica(replica):
+    assert await read_session(make_request()) is REPLICA
+
+
+async def test_recent_writers_read_from_primary(replica):
+    response = Response()
+    mark_primary_reads(response)
+    cookie = response.headers["set-cookie"].split(";")[0]
+
+    assert await read_session(make_request(cookie)) is PRIMARY
+    expired = f"{PRIMARY_READS_COOKIE}={int(time.time()) - 1}"
+    assert await read_session(make_request(expired)) is REPLICA
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+import response_cache
+from database.database import PRIMARY_READS_COOKIE
+from pagination import NEXT_CURSOR_HEADER
+from response_cache import CACHE_PREFIX, CACHE_STATUS_HEADER, cached_route, invalidate
+
+pytestmark = pytest.mark.asyncio
+
+
+class Item(BaseModel):
+    id: int
+
+
+calls = []
+app = FastAPI()
+
+
+@app.get("/items/", response_model=list[Item])
+@cached_route("items", expire=60, schema=list[Item])
+async def get_items(request: Request, response: Response, limit: int = 2):
+    calls.append(limit)
+    response.headers[NEXT_CURSOR_HEADER] = "next"
+    return [Item(id=i) for i in range(limit)]
+
+
+@pytest.fixture
+async def client():
+    FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX)
+    calls.clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    FastAPICache.reset()
+
+
+async def test_second_request_is_served_from_cache(client):
+    first = await client.get("/items/?limit=2")
+    second = await client.get("/items/?limit=2")
+
+    assert calls == [2]
+    assert first.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert second.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert second.headers[NEXT_CURSOR_HEADER] == "next"
+    assert second.json() == first.json() == [{"id": 0}, {"id": 1}]
+
+
+async def test_invalidate_drops_namespace(client):
+    await client.get("/items/?limit=1")
+    await invalidate("items")
+    await client.get("/items/?limit=1")
+
+    assert calls == [1, 1]
+
+
+async def test_invalidate_bumps_version_without_scanning_keys():
+    class FakeRedis:
+        def __init__(self):
+            self.values = {}
+
+        async def incr(self, key):
+            self.values[key] = self.values.get(key, 0) + 1
+            return self.values[key]
+
+        async def eval(self, *args, **kwargs):
+            raise AssertionError("KEYS must not be used")
+
+    class FakeRedisBackend(InMemoryBackend):
+        def __init__(self):
+            super().__init__()
+            self.redis = FakeRedis()
+
+    backend = FakeRedisBackend()
+    await invalidate("items", backend=backend)
+    await invalidate("items", backend=backend)
+
+    assert backend.redis.values == {f"{CACHE_PREFIX}:items:version": 2}
+
+
+async def test_replica_reads_do_not_break_read_your_writes(client, monkeypatch):
+    monkeypatch.setattr(response_cache.config, "POSTGRES_REPLICA_HOST", "replica")
+    await client.get("/items/?limit=3")
+
+    # Клиент после записи читает с основного сервера, мимо кэша
+    pinned = await client.get("/items/?limit=3", headers={"Cookie": f"{PRIMARY_READS_COOKIE}={int(time.time()) + 60}"})
+    assert pinned.headers[CACHE_STATUS_HEADER] == "BYPASS"
+
+    # Сразу после записи ответы с реплики могут отставать и в кэш не попадают
+    await invalidate("items")
+    assert (await client.get("/items/?limit=3")).headers[CACHE_STATUS_HEADER] == "MISS"
+    assert (await client.get("/items/?limit=3")).headers[CACHE_STATUS_HEADER] == "MISS"
+    assert calls == [3, 3, 3, 3]
@@ -0,0 +1,15 @@
+import unittest
+from datetime import datetime
+
+from transactions.partitions import add_months, month_start
+
+
+class TestMonths(unittest.TestCase):
+    def test_month_start(self):
+        self.assertEqual(month_start(datetime(2026, 10, 18, 15, 10, 42)), datetime(2026, 10, 1))
+
+    def test_add_months_crosses_years(self):
+        self.assertEqual(add_months(datetime(2026, 10, 1), 1), datetime(2026, 11, 1))
+        self.assertEqual(add_months(datetime(2026, 12, 1), 1), datetime(2027, 1, 1))
+        self.assertEqual(add_months(datetime(2026, 1, 1), -1), datetime(2025, 12, 1))
+        self.assertEqual(add_months(datetime(2026, 10, 1), -22), datetime(2024, 12, 1))
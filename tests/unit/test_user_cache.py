@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from redis import asyncio as aioredis
+from sqlalchemy import inspect
+
+from database.models import Role, User
+from users.cache import UserCache
+
+pytestmark = pytest.mark.asyncio
+
+TOKEN = "header.payload.signature"
+
+
+@pytest.fixture
+def user_cache():
+    # Redis is unreachable here, so only the in-process tier is exercised.
+    return UserCache(redis=aioredis.from_url("redis://127.0.0.1:1"), ttl=30, max_size=2)
+
+
+def make_user(user_id: int) -> User:
+    return User(
+        id=user_id,
+        username="user",
+        email=f"user{user_id}@test.com",
+        hashed_password="test",
+        role_id=1,
+        created_at=datetime(2025, 1, 1),
+        is_active=True,
+        is_superuser=False,
+        is_verified=False,
+        balance=Decimal("10.50"),
+        role=Role(id=1, name="users", permissions={}),
+    )
+
+
+async def test_cached_user_is_detached_copy(user_cache):
+    await user_cache.set(TOKEN, make_user(1))
+
+    user = await user_cache.get(1, TOKEN)
+
+    assert inspect(user).detached
+    assert user.balance == Decimal("10.50")
+    assert user.role.name == "users"
+
+
+async def test_invalidate_drops_user_entries(user_cache):
+    await user_cache.set(TOKEN, make_user(1))
+    await user_cache.invalidate(1)
+
+    assert await user_cache.get(1, TOKEN) is None
+
+
+async def test_lru_evicts_oldest_entry(user_cache):
+    for user_id in (1, 2, 3):
+        await user_cache.set(TOKEN, make_user(user_id))
+
+    assert await user_cache.get(1, TOKEN) is None
+    assert await user_cache.get(3, TOKEN) is not None